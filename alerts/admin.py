@@ -1,10 +1,11 @@
 from django.contrib import admin
-from .models import Alert, PreventiveMeasure
+from .models import Alert, AlertState, Notification, NotificationRecipient, PreventiveMeasure
+from .utils import invalidate_alert_summaries
 
 
 @admin.register(Alert)
 class AlertAdmin(admin.ModelAdmin):
-    list_display = ['prediction', 'severity', 'is_read', 'created_at']
+    list_display = ['prediction', 'severity', 'is_read', 'alert_date', 'created_at']
     list_filter = ['severity', 'is_read', 'created_at']
     search_fields = ['message', 'prediction__crop__name', 'prediction__pest__name']
     date_hierarchy = 'created_at'
@@ -12,13 +13,37 @@ class AlertAdmin(admin.ModelAdmin):
     
     def mark_as_read(self, request, queryset):
         queryset.update(is_read=True)
+        invalidate_alert_summaries()
     mark_as_read.short_description = "Mark selected alerts as read"
     
     def mark_as_unread(self, request, queryset):
         queryset.update(is_read=False)
+        invalidate_alert_summaries()
     mark_as_unread.short_description = "Mark selected alerts as unread"
 
 
+@admin.register(AlertState)
+class AlertStateAdmin(admin.ModelAdmin):
+    list_display = ['crop', 'pest', 'status', 'severity', 'opened_on', 'last_evaluated', 'suppressed_count']
+    list_filter = ['status', 'severity']
+    search_fields = ['crop__name', 'pest__name']
+
+
+@admin.register(NotificationRecipient)
+class NotificationRecipientAdmin(admin.ModelAdmin):
+    list_display = ['name', 'channel', 'address', 'min_severity', 'frequency', 'is_active']
+    list_filter = ['channel', 'frequency', 'is_active']
+    search_fields = ['name', 'address']
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'recipient', 'channel', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'channel']
+    search_fields = ['subject', 'address', 'recipient__name']
+    date_hierarchy = 'created_at'
+
+
 @admin.register(PreventiveMeasure)
 class PreventiveMeasureAdmin(admin.ModelAdmin):
     list_display = ['action', 'pest', 'effectiveness', 'timing']
@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class AlertsConfig(AppConfig):
     name = "alerts"
+
+    def ready(self):
+        from .signals import alert_changed
+
+        alert = self.get_model('Alert')
+        post_save.connect(alert_changed, sender=alert, dispatch_uid='alerts.Alert.summary_changed')
+        post_delete.connect(alert_changed, sender=alert, dispatch_uid='alerts.Alert.summary_changed')
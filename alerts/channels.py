@@ -0,0 +1,112 @@
+"""
+Notification delivery channels
+
+A channel sends one queued Notification and raises NotificationError when
+it could not. Channels are looked up by NotificationRecipient.channel in
+CHANNELS; register_channel adds new ones. Email goes through Django's email
+backend (so the locmem backend captures it in tests); SMS and webhooks are
+plain HTTP posts.
+"""
+import smtplib
+
+import httpx
+from django.core.mail import EmailMessage
+
+# Longest SMS text sent; digests are cut to this
+SMS_MAX_LENGTH = 480
+
+CHANNELS = {}
+
+
+class NotificationError(Exception):
+    """A notification could not be delivered (it may be retried)"""
+
+
+def register_channel(cls):
+    """Class decorator adding a channel to CHANNELS under its name"""
+    CHANNELS[cls.name] = cls
+    return cls
+
+
+def get_channel(name, config):
+    try:
+        return CHANNELS[name](config)
+    except KeyError:
+        raise NotificationError(f'Unknown notification channel: {name}')
+
+
+class Channel:
+    """
+    Base class for delivery channels
+
+    config: the NOTIFICATIONS setting. send() is called from worker threads,
+    so channels must not share connections between calls.
+    """
+    name = None
+
+    def __init__(self, config):
+        self.config = config
+
+    def send(self, notification):
+        raise NotImplementedError
+
+
+@register_channel
+class EmailChannel(Channel):
+    name = 'EMAIL'
+
+    def send(self, notification):
+        message = EmailMessage(
+            notification.subject,
+            notification.body,
+            from_email=self.config.get('FROM_EMAIL'),
+            to=[notification.address],
+        )
+        try:
+            message.send()
+        except (smtplib.SMTPException, OSError) as e:
+            raise NotificationError(f'{type(e).__name__}: {e}')
+
+
+@register_channel
+class WebhookChannel(Channel):
+    """POSTs the digest as JSON to the recipient's URL"""
+    name = 'WEBHOOK'
+
+    def url(self, notification):
+        return notification.address
+
+    def payload(self, notification):
+        return {
+            'subject': notification.subject,
+            'body': notification.body,
+            'alert_count': notification.alert_count,
+        }
+
+    def send(self, notification):
+        try:
+            response = httpx.post(
+                self.url(notification),
+                json=self.payload(notification),
+                timeout=self.config.get('TIMEOUT', 10),
+            )
+        except httpx.HTTPError as e:
+            raise NotificationError(f'{type(e).__name__}: {e}')
+        if response.status_code >= 400:
+            raise NotificationError(f'HTTP {response.status_code}')
+
+
+@register_channel
+class SMSChannel(WebhookChannel):
+    """Sends the digest subject and body through the SMS_GATEWAY_URL HTTP gateway"""
+    name = 'SMS'
+
+    def url(self, notification):
+        url = self.config.get('SMS_GATEWAY_URL')
+        if not url:
+            raise NotificationError('SMS_GATEWAY_URL is not configured')
+        return url
+
+    def payload(self, notification):
+        text = f'{notification.subject}\n{notification.body}'
+        return {'to': notification.address, 'message': text[:SMS_MAX_LENGTH]}
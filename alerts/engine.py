@@ -0,0 +1,220 @@
+"""
+Alert escalation and suppression
+
+Each crop/pest pair has at most one AlertState row. A batch of predictions
+is evaluated in one pass against those rows: a pair that turns HIGH opens an
+alert, a pair that stays HIGH is suppressed unless its severity should go up,
+and a pair that drops out of HIGH is resolved. The last WINDOW_DAYS scores of
+each active pair are kept on its state row, so rising risk is detected
+without reading Alert history.
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .events import publish_alerts
+from .models import Alert, AlertState
+from .utils import invalidate_alert_summaries
+
+# Scores kept per pair; an active pair not evaluated for this long is stale
+# and its next HIGH prediction opens a fresh alert
+WINDOW_DAYS = 7
+
+# Consecutive score increases that escalate severity by one level
+RISING_RUN = 3
+
+SEVERITY_ORDER = ['INFO', 'WARNING', 'DANGER', 'CRITICAL']
+
+STATE_FIELDS = [
+    'status', 'severity', 'opened_on', 'last_evaluated',
+    'recent_scores', 'suppressed_count', 'updated_at',
+]
+
+
+def severity_for_score(score):
+    """Alert severity of a high-risk score"""
+    if score >= 80:
+        return 'CRITICAL'
+    elif score >= 70:
+        return 'DANGER'
+    return 'WARNING'
+
+
+def is_rising(scores, run=RISING_RUN):
+    """True when each of the last run scores is higher than the one before"""
+    if len(scores) <= run:
+        return False
+    recent = scores[-run - 1:]
+    return all(later > earlier for earlier, later in zip(recent, recent[1:]))
+
+
+def _escalate(severity):
+    return SEVERITY_ORDER[min(SEVERITY_ORDER.index(severity) + 1, len(SEVERITY_ORDER) - 1)]
+
+
+def _open_message(prediction):
+    return (
+        f"High risk of {prediction.pest.name} outbreak detected on {prediction.crop.name}. "
+        f"Risk score: {prediction.risk_score}%. "
+        f"Immediate preventive action recommended."
+    )
+
+
+def _escalation_message(prediction, scores):
+    return (
+        f"Risk of {prediction.pest.name} on {prediction.crop.name} keeps rising "
+        f"({scores[0]:g}% to {scores[-1]:g}% over {len(scores)} days). "
+        f"Apply preventive measures now."
+    )
+
+
+def _resolved_message(prediction):
+    return (
+        f"Risk of {prediction.pest.name} on {prediction.crop.name} has dropped to "
+        f"{prediction.risk_score}% ({prediction.risk_level}). Alert resolved."
+    )
+
+
+def evaluate_predictions(predictions, day=None):
+    """
+    Update alert states from a batch of predictions and create the alerts due
+
+    predictions: one per crop/pest pair for day, with crop and pest selected.
+    Pairs already evaluated for day are skipped, so re-running is harmless.
+    Returns counts of opened/escalated/suppressed/resolved/skipped pairs,
+    with the created alerts under 'alerts'.
+    """
+    day = day or timezone.now().date()
+    predictions = list(predictions)
+    states = {
+        (state.crop_id, state.pest_id): state
+        for state in AlertState.objects.filter(
+            crop_id__in={prediction.crop_id for prediction in predictions},
+            pest_id__in={prediction.pest_id for prediction in predictions},
+        )
+    }
+
+    result = dict.fromkeys(['opened', 'escalated', 'suppressed', 'resolved', 'skipped'], 0)
+    new_alerts = []
+    changed = []
+    for prediction in predictions:
+        state = states.get((prediction.crop_id, prediction.pest_id))
+        if state and state.last_evaluated >= day:
+            result['skipped'] += 1
+            continue
+
+        score = float(prediction.risk_score)
+        active = (
+            state is not None
+            and state.status == 'ACTIVE'
+            and (day - state.last_evaluated).days <= WINDOW_DAYS
+        )
+
+        if prediction.risk_level != 'HIGH':
+            if active:
+                state.status = 'RESOLVED'
+                state.last_evaluated = day
+                state.recent_scores = (state.recent_scores + [score])[-WINDOW_DAYS:]
+                new_alerts.append(Alert(
+                    prediction=prediction, severity='INFO',
+                    message=_resolved_message(prediction), alert_date=day,
+                ))
+                changed.append(state)
+                result['resolved'] += 1
+            continue
+
+        if not active:
+            state = state or AlertState(crop_id=prediction.crop_id, pest_id=prediction.pest_id)
+            state.status = 'ACTIVE'
+            state.severity = severity_for_score(score)
+            state.opened_on = day
+            state.recent_scores = [score]
+            state.suppressed_count = 0
+            new_alerts.append(Alert(
+                prediction=prediction, severity=state.severity,
+                message=_open_message(prediction), alert_date=day,
+            ))
+            result['opened'] += 1
+        else:
+            state.recent_scores = (state.recent_scores + [score])[-WINDOW_DAYS:]
+            severity = severity_for_score(score)
+            if is_rising(state.recent_scores):
+                severity = max(severity, _escalate(state.severity), key=SEVERITY_ORDER.index)
+
+            if SEVERITY_ORDER.index(severity) > SEVERITY_ORDER.index(state.severity):
+                state.severity = severity
+                state.suppressed_count = 0
+                new_alerts.append(Alert(
+                    prediction=prediction, severity=severity,
+                    message=_escalation_message(prediction, state.recent_scores), alert_date=day,
+                ))
+                result['escalated'] += 1
+            else:
+                state.suppressed_count += 1
+                result['suppressed'] += 1
+
+        state.last_evaluated = day
+        changed.append(state)
+
+    result['alerts'] = _save(new_alerts, changed, day)
+    return result
+
+
+def _save(new_alerts, states, day):
+    """Write alerts and states; returns the alerts actually inserted"""
+    if not new_alerts and not states:
+        return []
+
+    now = timezone.now()
+    for state in states:
+        # bulk_update skips auto_now
+        state.updated_at = now
+    with transaction.atomic():
+        # (prediction, alert_date) is unique, so an overlapping run's rows win
+        existing = set(Alert.objects.filter(
+            alert_date=day,
+            prediction__in=[alert.prediction_id for alert in new_alerts],
+        ).values_list('prediction_id', flat=True))
+        inserted = _insert_alerts([alert for alert in new_alerts if alert.prediction_id not in existing])
+
+        AlertState.objects.bulk_update([state for state in states if state.pk], STATE_FIELDS, batch_size=500)
+        AlertState.objects.bulk_create(
+            [state for state in states if not state.pk],
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['crop', 'pest'],
+            update_fields=STATE_FIELDS,
+        )
+        created = list(Alert.objects.filter(
+            pk__in=[alert.pk for alert in inserted]
+        ).select_related('prediction__crop', 'prediction__pest'))
+
+        # Notify open alert streams once committed
+        if created:
+            publish_alerts(created)
+            invalidate_alert_summaries()
+    return created
+
+
+def _insert_alerts(alerts):
+    """
+    Insert alerts and return them with their pks
+
+    A run overlapping this one may insert the same (prediction, alert_date)
+    between the existence check and the insert; those alerts are skipped.
+    """
+    try:
+        with transaction.atomic():
+            return Alert.objects.bulk_create(alerts, batch_size=500)
+    except IntegrityError:
+        pass
+
+    inserted = []
+    for alert in alerts:
+        alert.pk = None
+        try:
+            with transaction.atomic():
+                alert.save(force_insert=True)
+        except IntegrityError:
+            continue
+        inserted.append(alert)
+    return inserted
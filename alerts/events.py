@@ -0,0 +1,105 @@
+"""
+In-process publish/subscribe for live alert notifications
+
+Every open stream (see ``views.alert_stream``) holds one subscription; alert
+generation publishes to all of them at once instead of each browser polling
+the unread count endpoint.
+"""
+import asyncio
+import json
+import threading
+
+from django.db import transaction
+
+
+class AlertBroadcaster:
+    """
+    Fan-out of alert events to asyncio subscribers
+
+    publish() may be called from any thread (sync views run in worker threads
+    under ASGI); messages are handed to each subscriber's event loop with
+    call_soon_threadsafe.
+    """
+
+    def __init__(self, max_queue_size=100):
+        self.max_queue_size = max_queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        """Register a subscriber on the running event loop and return it"""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.max_queue_size))
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event, data):
+        """Send an event to every subscriber"""
+        message = format_sse(event, data)
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            loop, queue = subscriber
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, message)
+            except RuntimeError:
+                # Event loop already closed - the stream is gone
+                self.unsubscribe(subscriber)
+
+    @staticmethod
+    def _deliver(queue, message):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow consumer: drop the message, the next unread count resyncs it
+            pass
+
+
+alert_broadcaster = AlertBroadcaster()
+
+
+def format_sse(event, data):
+    """Encode a server-sent event frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def serialize_alert(alert):
+    """Payload sent to browsers for a newly created alert"""
+    return {
+        'id': alert.id,
+        'severity': alert.severity,
+        'message': alert.message,
+        'crop': alert.prediction.crop.name,
+        'pest': alert.prediction.pest.name,
+        'risk_score': alert.prediction.risk_score,
+        'created_at': alert.created_at.isoformat() if alert.created_at else None,
+    }
+
+
+def publish_alerts(alerts):
+    """Publish new alerts and the resulting unread count once the transaction commits"""
+    payloads = [serialize_alert(alert) for alert in alerts]
+
+    def send():
+        for payload in payloads:
+            alert_broadcaster.publish('alert', payload)
+        publish_unread_count()
+
+    transaction.on_commit(send)
+
+
+def publish_unread_count():
+    """Publish the current unread alert count"""
+    if not alert_broadcaster.subscriber_count:
+        return
+    from .utils import get_unread_alert_count
+    alert_broadcaster.publish('unread_count', {'count': get_unread_alert_count()})
@@ -0,0 +1,41 @@
+import re
+
+from django import forms
+from django.core.validators import URLValidator, validate_email
+from .models import NotificationRecipient
+
+
+class NotificationRecipientForm(forms.ModelForm):
+    class Meta:
+        model = NotificationRecipient
+        fields = ['name', 'channel', 'address', 'min_severity', 'frequency', 'is_active']
+        widgets = {
+            'name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g., Farm Manager'}),
+            'channel': forms.Select(attrs={'class': 'form-control'}),
+            'address': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'your@email.com, +919876543210 or https://...'}),
+            'min_severity': forms.Select(attrs={'class': 'form-control'}),
+            'frequency': forms.Select(attrs={'class': 'form-control'}),
+        }
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        channel = cleaned_data.get('channel')
+        address = (cleaned_data.get('address') or '').strip()
+        if not address:
+            return cleaned_data
+        
+        try:
+            if channel == 'EMAIL':
+                validate_email(address)
+            elif channel == 'WEBHOOK':
+                URLValidator(schemes=['http', 'https'])(address)
+        except forms.ValidationError:
+            self.add_error('address', f'Enter a valid {"email address" if channel == "EMAIL" else "URL"}.')
+        
+        if channel == 'SMS':
+            address = re.sub(r'[\s-]', '', address)
+            if not re.fullmatch(r'\+?\d{7,15}', address):
+                self.add_error('address', 'Enter a phone number of 7-15 digits, optionally starting with +.')
+        
+        cleaned_data['address'] = address
+        return cleaned_data
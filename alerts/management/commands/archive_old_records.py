@@ -0,0 +1,43 @@
+"""
+Django management command to archive and delete aged alerts and predictions.
+Usage: python manage.py archive_old_records --time-budget 60
+
+Read alerts older than RETENTION['ALERT_DAYS'] and predictions older than
+RETENTION['PREDICTION_DAYS'] (with their alerts) are written to monthly
+gzipped JSON-lines files under RETENTION['ARCHIVE_DIR'] and then deleted in
+batches. A run that hits its time budget stops cleanly; run it again to
+continue.
+"""
+
+from django.core.management.base import BaseCommand
+from alerts.retention import retention_settings, run_retention
+
+
+class Command(BaseCommand):
+    help = 'Archives aged alerts and predictions to compressed monthly files and deletes them in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alert-days', type=int, default=None, help='Keep read alerts for this many days')
+        parser.add_argument('--prediction-days', type=int, default=None, help='Keep predictions for this many days')
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows archived and deleted per transaction')
+        parser.add_argument(
+            '--time-budget',
+            type=float,
+            default=60,
+            help='Seconds after which no new batch is started (0 for no limit)',
+        )
+
+    def handle(self, *args, **options):
+        result = run_retention(
+            alert_days=options['alert_days'],
+            prediction_days=options['prediction_days'],
+            batch_size=options['batch_size'],
+            time_budget=options['time_budget'] or None,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Archived {result["alerts"]} alerts and {result["predictions"]} predictions '
+            f'to {retention_settings()["ARCHIVE_DIR"]} in {result["elapsed_seconds"]}s'
+        ))
+        if not result['complete']:
+            self.stdout.write(self.style.WARNING('Time budget reached; run again to continue.'))
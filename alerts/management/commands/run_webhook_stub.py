@@ -0,0 +1,34 @@
+"""
+Django management command to run a local webhook/SMS gateway stub.
+Usage: python manage.py run_webhook_stub [--port 8766] [--fail-rate 0.2]
+
+Prints every notification it receives, for offline testing of the WEBHOOK
+and SMS channels.
+"""
+
+from django.core.management.base import BaseCommand
+from alerts.webhook_stub import WebhookStub
+
+
+class Command(BaseCommand):
+    help = 'Runs a local stub that accepts webhook and SMS gateway notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8766)
+        parser.add_argument(
+            '--fail-rate',
+            type=float,
+            default=0,
+            help='Share of requests answered with 503 (0-1)',
+        )
+
+    def handle(self, *args, **options):
+        server = WebhookStub((options['host'], options['port']), fail_rate=options['fail_rate'], verbose=True)
+        self.stdout.write(self.style.SUCCESS(f'✓ Webhook stub listening on {server.url} (Ctrl+C to stop)'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,34 @@
+"""
+Django management command to queue and send alert notification digests.
+Usage: python manage.py send_notifications
+
+Run it from cron (e.g. every 5 minutes): new alerts are batched into one
+digest per recipient and failed sends are retried with backoff.
+"""
+
+from django.core.management.base import BaseCommand
+from alerts.notifications import dispatch_notifications, queue_notifications, retry_failed_notifications
+
+
+class Command(BaseCommand):
+    help = 'Batches new alerts into digests and sends due notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Notifications sent in this run')
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Requeue notifications that ran out of attempts',
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            requeued = retry_failed_notifications()
+            self.stdout.write(f'Requeued {requeued} failed notifications')
+
+        queued = queue_notifications()
+        result = dispatch_notifications(limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Queued {queued} digests; sent {result["sent"]}, '
+            f'{result["retrying"]} will be retried, {result["failed"]} failed'
+        ))
@@ -0,0 +1,43 @@
+# Generated by Django 4.2 on 2026-10-19 14:46
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_alert_dates(apps, schema_editor):
+    """Key the first alert of each prediction per day; earlier duplicates stay unkeyed"""
+    Alert = apps.get_model('alerts', 'Alert')
+    seen = set()
+    batch = []
+    for alert in Alert.objects.order_by('created_at', 'id').only('id', 'prediction_id', 'created_at').iterator():
+        key = (alert.prediction_id, timezone.localdate(alert.created_at))
+        if key in seen:
+            continue
+        seen.add(key)
+        alert.alert_date = key[1]
+        batch.append(alert)
+        if len(batch) >= 1000:
+            Alert.objects.bulk_update(batch, ['alert_date'])
+            batch = []
+    Alert.objects.bulk_update(batch, ['alert_date'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0001_initial'),
+        ('alerts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alert',
+            name='alert_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_alert_dates, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='alert',
+            unique_together={('prediction', 'alert_date')},
+        ),
+    ]
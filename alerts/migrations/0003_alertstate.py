@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-19 14:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0003_pest_climate_profile'),
+        ('alerts', '0002_alert_dedup_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('ACTIVE', 'Active'), ('RESOLVED', 'Resolved')], default='ACTIVE', max_length=10)),
+                ('severity', models.CharField(choices=[('INFO', 'Information'), ('WARNING', 'Warning'), ('DANGER', 'Danger'), ('CRITICAL', 'Critical')], max_length=10)),
+                ('opened_on', models.DateField()),
+                ('last_evaluated', models.DateField()),
+                ('recent_scores', models.JSONField(default=list)),
+                ('suppressed_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('crop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alert_states', to='crops.crop')),
+                ('pest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alert_states', to='crops.pest')),
+            ],
+            options={
+                'unique_together': {('crop', 'pest')},
+            },
+        ),
+    ]
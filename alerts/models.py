@@ -1,7 +1,7 @@
 from django.db import models
 from django.utils import timezone
 from predictions.models import RiskPrediction
-from crops.models import Pest
+from crops.models import Crop, Pest
 
 
 class Alert(models.Model):
@@ -17,16 +17,126 @@ class Alert(models.Model):
     severity = models.CharField(max_length=10, choices=SEVERITY_LEVELS)
     message = models.TextField()
     is_read = models.BooleanField(default=False)
+    # Dedup key with prediction: one generated alert per prediction per day.
+    # Left empty on custom alerts, which never conflict.
+    alert_date = models.DateField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        unique_together = ['prediction', 'alert_date']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.severity} Alert - {self.prediction.crop.name}"
 
 
+class AlertState(models.Model):
+    """
+    Alerting state of one crop/pest pair, kept by alerts.engine
+    
+    Replaces scanning Alert history: each evaluation reads and rewrites one
+    row per pair to decide whether to open, escalate, suppress or resolve.
+    """
+    STATUS_CHOICES = [
+        ('ACTIVE', 'Active'),
+        ('RESOLVED', 'Resolved'),
+    ]
+    
+    crop = models.ForeignKey(Crop, on_delete=models.CASCADE, related_name='alert_states')
+    pest = models.ForeignKey(Pest, on_delete=models.CASCADE, related_name='alert_states')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='ACTIVE')
+    severity = models.CharField(max_length=10, choices=Alert.SEVERITY_LEVELS)
+    opened_on = models.DateField()
+    last_evaluated = models.DateField()
+    # Risk scores of the latest evaluations in the rolling window, oldest first
+    recent_scores = models.JSONField(default=list)
+    suppressed_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['crop', 'pest']
+    
+    def __str__(self):
+        return f"{self.pest} on {self.crop} - {self.status} ({self.severity})"
+
+
+class NotificationRecipient(models.Model):
+    """Someone who receives alert digests through one channel"""
+    CHANNEL_CHOICES = [
+        ('EMAIL', 'Email'),
+        ('SMS', 'SMS'),
+        ('WEBHOOK', 'Webhook'),
+    ]
+    
+    FREQUENCY_CHOICES = [
+        ('IMMEDIATE', 'Immediate (as they occur)'),
+        ('DAILY', 'Daily Digest'),
+    ]
+    
+    name = models.CharField(max_length=100)
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES, default='EMAIL')
+    address = models.CharField(max_length=255, help_text="Email address, phone number or webhook URL")
+    min_severity = models.CharField(max_length=10, choices=Alert.SEVERITY_LEVELS, default='WARNING')
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default='IMMEDIATE')
+    is_active = models.BooleanField(default=True)
+    
+    # Highest alert id already considered for this recipient
+    last_alert_id = models.PositiveBigIntegerField(default=0, editable=False)
+    last_queued_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return f"{self.name} ({self.get_channel_display()})"
+    
+    def save(self, *args, **kwargs):
+        # New recipients start from now rather than the whole alert history
+        if self.pk is None and not self.last_alert_id:
+            self.last_alert_id = Alert.objects.aggregate(last=models.Max('id'))['last'] or 0
+        super().save(*args, **kwargs)
+
+
+class Notification(models.Model):
+    """One digest of alerts queued for a recipient; failed sends are retried"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    recipient = models.ForeignKey(NotificationRecipient, on_delete=models.CASCADE, related_name='notifications')
+    channel = models.CharField(max_length=10, choices=NotificationRecipient.CHANNEL_CHOICES)
+    address = models.CharField(max_length=255)
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    alert_count = models.PositiveIntegerField(default=0)
+    
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} to {self.address} ({self.status})"
+
+
 class PreventiveMeasure(models.Model):
     """Model for storing preventive measures for pests/diseases"""
     EFFECTIVENESS_LEVELS = [
@@ -0,0 +1,223 @@
+"""
+Batched alert notifications
+
+queue_notifications() turns the alerts created since each recipient's last
+digest into one Notification row per recipient. dispatch_notifications()
+sends due notifications on a thread pool, with at most
+CHANNEL_CONCURRENCY[channel] sends per channel in flight. Failed sends stay
+PENDING with an exponentially later next_attempt_at - the retry queue - until
+MAX_ATTEMPTS is reached. All database work happens on the calling thread;
+workers only deliver.
+
+Due notifications are claimed before sending by pushing next_attempt_at out
+by CLAIM_LEASE, so concurrent dispatchers (cron and the send view) never
+send the same digest. A dispatcher that dies mid-send leaves its claims to
+be retried once the lease runs out.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .channels import NotificationError, get_channel
+from .engine import SEVERITY_ORDER
+from .models import Alert, Notification, NotificationRecipient
+
+# Alerts listed in a digest body; the rest are summarized in one line
+DIGEST_MAX_ALERTS = 20
+
+# How long a dispatcher owns the notifications it claimed
+CLAIM_LEASE = timedelta(minutes=30)
+
+DIGEST_INTERVALS = {
+    'IMMEDIATE': timedelta(0),
+    'DAILY': timedelta(days=1),
+}
+
+
+def notification_settings():
+    from django.conf import settings
+
+    return {
+        'MAX_WORKERS': 8,
+        'CHANNEL_CONCURRENCY': {'EMAIL': 2, 'SMS': 4, 'WEBHOOK': 4},
+        'MAX_ATTEMPTS': 5,
+        'RETRY_BACKOFF': 60,
+        'BATCH_SIZE': 200,
+        'FROM_EMAIL': settings.DEFAULT_FROM_EMAIL,
+        'SMS_GATEWAY_URL': '',
+        'TIMEOUT': 10,
+        **getattr(settings, 'NOTIFICATIONS', {}),
+    }
+
+
+def build_digest(alerts):
+    """(subject, body) summarizing alerts, most severe first"""
+    alerts = sorted(alerts, key=lambda alert: (-SEVERITY_ORDER.index(alert.severity), alert.id))
+    critical = sum(1 for alert in alerts if alert.severity == 'CRITICAL')
+
+    subject = f'[Pest Alerts] {len(alerts)} new alert{"s" if len(alerts) != 1 else ""}'
+    if critical:
+        subject += f' ({critical} critical)'
+
+    lines = [
+        f'{alert.severity} - {alert.prediction.pest.name} on {alert.prediction.crop.name}: {alert.message}'
+        for alert in alerts[:DIGEST_MAX_ALERTS]
+    ]
+    if len(alerts) > DIGEST_MAX_ALERTS:
+        lines.append(f'...and {len(alerts) - DIGEST_MAX_ALERTS} more.')
+    return subject, '\n'.join(lines)
+
+
+def queue_notifications(now=None):
+    """
+    Queue a digest for every recipient with new alerts at or above their
+    minimum severity; daily recipients get at most one digest a day
+
+    Returns the number of notifications queued.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        recipients = [
+            recipient for recipient in NotificationRecipient.objects.select_for_update().filter(is_active=True)
+            if recipient.last_queued_at is None
+            or now - recipient.last_queued_at >= DIGEST_INTERVALS[recipient.frequency]
+        ]
+        if not recipients:
+            return 0
+
+        # One query covers every recipient's backlog
+        alerts = list(Alert.objects.filter(
+            id__gt=min(recipient.last_alert_id for recipient in recipients)
+        ).select_related('prediction__crop', 'prediction__pest').order_by('id'))
+        if not alerts:
+            return 0
+
+        notifications = []
+        for recipient in recipients:
+            minimum = SEVERITY_ORDER.index(recipient.min_severity)
+            matching = [
+                alert for alert in alerts
+                if alert.id > recipient.last_alert_id and SEVERITY_ORDER.index(alert.severity) >= minimum
+            ]
+            recipient.last_alert_id = max(recipient.last_alert_id, alerts[-1].id)
+            if not matching:
+                continue
+
+            subject, body = build_digest(matching)
+            notifications.append(Notification(
+                recipient=recipient,
+                channel=recipient.channel,
+                address=recipient.address,
+                subject=subject,
+                body=body,
+                alert_count=len(matching),
+                next_attempt_at=now,
+            ))
+            recipient.last_queued_at = now
+
+        Notification.objects.bulk_create(notifications)
+        NotificationRecipient.objects.bulk_update(recipients, ['last_alert_id', 'last_queued_at'])
+    return len(notifications)
+
+
+def dispatch_notifications(now=None, limit=None):
+    """
+    Send the notifications that are due
+
+    Returns counts of sent, retrying (failed, will be retried) and failed
+    (out of attempts) notifications.
+    """
+    config = notification_settings()
+    now = now or timezone.now()
+    due = claim_notifications(now, limit or config['BATCH_SIZE'])
+
+    result = {'sent': 0, 'retrying': 0, 'failed': 0}
+    if not due:
+        return result
+
+    channels = {}
+    limits = {}
+    for name in {notification.channel for notification in due}:
+        try:
+            channels[name] = get_channel(name, config)
+        except NotificationError:
+            channels[name] = None
+        limits[name] = threading.BoundedSemaphore(config['CHANNEL_CONCURRENCY'].get(name, 1))
+
+    def deliver(notification):
+        channel = channels[notification.channel]
+        if channel is None:
+            return f'Unknown notification channel: {notification.channel}'
+        with limits[notification.channel]:
+            try:
+                channel.send(notification)
+            except NotificationError as e:
+                return str(e)
+            except Exception as e:
+                # A channel bug or an unexpected backend error fails this
+                # notification only, not the rest of the batch
+                return f'{type(e).__name__}: {e}'
+        return None
+
+    with ThreadPoolExecutor(max_workers=config['MAX_WORKERS']) as executor:
+        errors = list(executor.map(deliver, due))
+
+    finished = timezone.now()
+    for notification, error in zip(due, errors):
+        notification.attempts += 1
+        if error is None:
+            notification.status = 'SENT'
+            notification.sent_at = finished
+            notification.last_error = ''
+            result['sent'] += 1
+        elif notification.attempts >= config['MAX_ATTEMPTS']:
+            notification.status = 'FAILED'
+            notification.last_error = error
+            result['failed'] += 1
+        else:
+            delay = config['RETRY_BACKOFF'] * 2 ** (notification.attempts - 1)
+            notification.next_attempt_at = finished + timedelta(seconds=delay)
+            notification.last_error = error
+            result['retrying'] += 1
+
+    Notification.objects.bulk_update(
+        due, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'], batch_size=500
+    )
+    return result
+
+
+def claim_notifications(now, limit):
+    """
+    Due PENDING notifications leased to this dispatcher
+
+    Each row is claimed with an update conditioned on the next_attempt_at
+    that was read; a row another dispatcher claimed first matches nothing.
+    """
+    due = Notification.objects.filter(
+        status='PENDING', next_attempt_at__lte=now
+    ).order_by('next_attempt_at')[:limit]
+
+    lease_until = now + CLAIM_LEASE
+    claimed = []
+    with transaction.atomic():
+        for notification in due:
+            if Notification.objects.filter(
+                pk=notification.pk, status='PENDING', next_attempt_at=notification.next_attempt_at
+            ).update(next_attempt_at=lease_until):
+                notification.next_attempt_at = lease_until
+                claimed.append(notification)
+    return claimed
+
+
+def retry_failed_notifications():
+    """Put notifications that ran out of attempts back in the queue"""
+    return Notification.objects.filter(status='FAILED').update(
+        status='PENDING', attempts=0, next_attempt_at=timezone.now()
+    )
+
+
+def pending_notification_count():
+    return Notification.objects.filter(status='PENDING').count()
@@ -0,0 +1,175 @@
+"""
+Retention for alerts and predictions
+
+Aged rows are copied to gzipped JSON-lines files, one per kind and month
+(ARCHIVE_DIR/alerts/2026-01.jsonl.gz), then deleted in batches by primary
+key. Each batch is archived before it is deleted and is its own
+transaction, so a run can stop at any batch boundary - e.g. when its time
+budget runs out - and the next run carries on. A batch interrupted between
+archiving and deleting is archived again; rows are unique by id.
+"""
+import gzip
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from predictions.models import RiskPrediction
+from .models import Alert
+
+
+def retention_settings():
+    from django.conf import settings
+
+    return {
+        'ARCHIVE_DIR': settings.BASE_DIR / 'archives',
+        'ALERT_DAYS': 30,
+        'PREDICTION_DAYS': 365,
+        'BATCH_SIZE': 1000,
+        **getattr(settings, 'RETENTION', {}),
+    }
+
+
+def archive_path(kind, month, archive_dir=None):
+    """Archive file for a kind ('alerts', 'predictions') and 'YYYY-MM' month"""
+    archive_dir = archive_dir or retention_settings()['ARCHIVE_DIR']
+    return os.path.join(archive_dir, kind, f'{month}.jsonl.gz')
+
+
+def read_archive(kind, month, archive_dir=None):
+    """Rows archived for a kind and month, as dicts"""
+    path = archive_path(kind, month, archive_dir)
+    if not os.path.exists(path):
+        return []
+    with gzip.open(path, 'rt', encoding='utf-8') as archive:
+        return [json.loads(line) for line in archive]
+
+
+def _month(value):
+    if hasattr(value, 'hour'):
+        value = timezone.localtime(value)
+    return value.strftime('%Y-%m')
+
+
+def _write_archive(kind, rows, month_field, archive_dir):
+    """Append rows to their monthly archives and flush them to disk"""
+    by_month = defaultdict(list)
+    for row in rows:
+        by_month[_month(row[month_field])].append(row)
+
+    for month, month_rows in by_month.items():
+        path = archive_path(kind, month, archive_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Each append adds a gzip member; readers see one continuous stream
+        with open(path, 'ab') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='ab') as archive:
+                for row in month_rows:
+                    archive.write(json.dumps(row, cls=DjangoJSONEncoder).encode('utf-8') + b'\n')
+            raw.flush()
+            os.fsync(raw.fileno())
+
+
+def _delete(model, ids):
+    """Delete rows of model by id; returns how many were deleted"""
+    _, deleted = model.objects.filter(pk__in=ids).delete()
+    return deleted.get(model._meta.label, 0)
+
+
+def archive_in_batches(queryset, kind, month_field, batch_size, deadline=None, archive_dir=None, before_delete=None):
+    """
+    Archive and delete every row of queryset, batch_size rows at a time
+
+    deadline: time.monotonic() value after which no new batch is started
+    before_delete: called with each batch's ids inside its transaction
+    Returns (rows deleted, whether the queryset was exhausted).
+    """
+    deleted = 0
+    while deadline is None or time.monotonic() < deadline:
+        rows = list(queryset.order_by('pk').values()[:batch_size])
+        if not rows:
+            return deleted, True
+
+        ids = [row['id'] for row in rows]
+        _write_archive(kind, rows, month_field, archive_dir)
+        with transaction.atomic():
+            if before_delete:
+                before_delete(ids)
+            deleted += _delete(queryset.model, ids)
+    return deleted, False
+
+
+def archive_old_alerts(days=None, batch_size=None, deadline=None, archive_dir=None):
+    """Archive and delete read alerts created more than days ago"""
+    config = retention_settings()
+    cutoff = timezone.now() - timedelta(days=days if days is not None else config['ALERT_DAYS'])
+    return archive_in_batches(
+        Alert.objects.filter(is_read=True, created_at__lt=cutoff),
+        'alerts', 'created_at', batch_size or config['BATCH_SIZE'], deadline,
+        archive_dir or config['ARCHIVE_DIR'],
+    )
+
+
+def archive_old_predictions(days=None, batch_size=None, deadline=None, archive_dir=None):
+    """
+    Archive and delete predictions dated more than days ago, with their alerts
+
+    Returns (predictions deleted, alerts deleted, whether all were done).
+    """
+    config = retention_settings()
+    cutoff = timezone.now().date() - timedelta(days=days if days is not None else config['PREDICTION_DAYS'])
+    batch_size = batch_size or config['BATCH_SIZE']
+    archive_dir = archive_dir or config['ARCHIVE_DIR']
+
+    # Alerts cascade from predictions, so they go first
+    alerts, done = archive_in_batches(
+        Alert.objects.filter(prediction__prediction_date__lt=cutoff),
+        'alerts', 'created_at', batch_size, deadline, archive_dir,
+    )
+    if not done:
+        return 0, alerts, False
+
+    late_alerts = 0
+
+    def delete_late_alerts(ids):
+        # Alerts added to these predictions since the pass above
+        nonlocal late_alerts
+        late = list(Alert.objects.filter(prediction_id__in=ids).values())
+        if late:
+            _write_archive('alerts', late, 'created_at', archive_dir)
+            late_alerts += _delete(Alert, [row['id'] for row in late])
+
+    predictions, done = archive_in_batches(
+        RiskPrediction.objects.filter(prediction_date__lt=cutoff),
+        'predictions', 'prediction_date', batch_size, deadline, archive_dir,
+        before_delete=delete_late_alerts,
+    )
+    return predictions, alerts + late_alerts, done
+
+
+def run_retention(alert_days=None, prediction_days=None, batch_size=None, time_budget=None, archive_dir=None):
+    """
+    Apply the alert and prediction retention policies
+
+    time_budget: seconds after which no new batch is started (None = no limit)
+    """
+    started = time.monotonic()
+    deadline = started + time_budget if time_budget else None
+
+    alerts, done = archive_old_alerts(alert_days, batch_size, deadline, archive_dir)
+    predictions = prediction_alerts = 0
+    if done:
+        predictions, prediction_alerts, done = archive_old_predictions(
+            prediction_days, batch_size, deadline, archive_dir
+        )
+
+    return {
+        'alerts': alerts + prediction_alerts,
+        'predictions': predictions,
+        'complete': done,
+        'elapsed_seconds': round(time.monotonic() - started, 2),
+    }
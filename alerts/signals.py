@@ -0,0 +1,11 @@
+"""
+Drop cached alert summaries when an alert is saved or deleted
+
+Connected in AlertsConfig.ready(). queryset.update() and bulk_create() send
+no signals; their callers use invalidate_alert_summaries() directly.
+"""
+from .utils import invalidate_alert_summaries
+
+
+def alert_changed(sender, **kwargs):
+    invalidate_alert_summaries()
@@ -1,3 +1,377 @@
-from django.test import TestCase
+import asyncio
+import json
+import shutil
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from crops.models import Crop, Pest
+from predictions.models import RiskPrediction
+from . import retention
+from .engine import _insert_alerts, evaluate_predictions
+from .events import AlertBroadcaster, alert_broadcaster, format_sse, publish_alerts
+from .models import Alert, AlertState, Notification, NotificationRecipient, PreventiveMeasure
+from .notifications import CLAIM_LEASE, claim_notifications, dispatch_notifications, queue_notifications
+from .retention import archive_in_batches, archive_old_predictions, read_archive, run_retention
+from .utils import get_alert_summary
+from .views import _alert_events
+from .webhook_stub import start_stub
+
+
+class RecommendationsQueryCountTests(TestCase):
+    """Recommendations load every measure in one query and group them in memory"""
+
+    @classmethod
+    def setUpTestData(cls):
+        crop = Crop.objects.create(
+            name='Wheat', crop_type='CEREAL', growth_stage='VEGETATIVE',
+            planting_date=date(2026, 11, 1), field_location='Karnal, Haryana',
+        )
+        cls.pest = Pest.objects.create(name='Yellow Rust', pest_type='FUNGAL', description='-', severity_level='HIGH')
+        cls.prediction = RiskPrediction.objects.create(crop=crop, pest=cls.pest, risk_score=74, risk_level='HIGH')
+
+    def add_measures(self, count):
+        for i in range(count):
+            for effectiveness in ['HIGH', 'MEDIUM', 'LOW']:
+                PreventiveMeasure.objects.create(
+                    pest=self.pest, action=f'{effectiveness} {i}', description='-', effectiveness=effectiveness,
+                )
+
+    def test_get_recommendations(self):
+        url = reverse('alerts:get_recommendations', args=[self.prediction.pk])
+        self.add_measures(1)
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+        self.add_measures(10)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        for key in ['high_effectiveness', 'medium_effectiveness', 'low_effectiveness']:
+            self.assertEqual(len(response.context[key]), 11)
+        self.assertTrue(all(measure.effectiveness == 'LOW' for measure in response.context['low_effectiveness']))
+
+
+class AlertEngineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        crop = Crop.objects.create(
+            name='Wheat', crop_type='CEREAL', growth_stage='VEGETATIVE',
+            planting_date=date(2026, 11, 1), field_location='Karnal, Haryana',
+        )
+        cls.predictions = [
+            RiskPrediction.objects.create(
+                crop=crop, pest=Pest.objects.create(name=name, pest_type='FUNGAL', description='-', severity_level='HIGH'),
+                risk_score=74, risk_level='HIGH', prediction_date=date(2026, 12, 1),
+            )
+            for name in ['Yellow Rust', 'Aphids']
+        ]
+
+    def predictions_for_run(self):
+        return list(RiskPrediction.objects.select_related('crop', 'pest'))
+
+    @mock.patch('alerts.engine.publish_alerts')
+    def test_overlapping_run_alerts_are_not_reported(self, publish_alerts):
+        day = date(2026, 12, 1)
+        # An overlapping run inserted an alert for the first pair while this run was saving
+        other = Alert.objects.create(prediction=self.predictions[0], severity='DANGER', message='-', alert_date=day)
+        Alert.objects.filter(pk=other.pk).update(created_at=timezone.now() + timedelta(seconds=1))
+
+        result = evaluate_predictions(self.predictions_for_run(), day)
+
+        self.assertEqual(result['opened'], 2)
+        self.assertEqual([alert.prediction for alert in result['alerts']], [self.predictions[1]])
+        publish_alerts.assert_called_once_with(result['alerts'])
+        self.assertEqual(Alert.objects.count(), 2)
+        self.assertEqual(AlertState.objects.filter(status='ACTIVE').count(), 2)
+
+    def test_insert_skips_alerts_inserted_after_the_check(self):
+        day = date(2026, 12, 1)
+        Alert.objects.create(prediction=self.predictions[0], severity='DANGER', message='-', alert_date=day)
+        alerts = [Alert(prediction=prediction, severity='DANGER', message='-', alert_date=day) for prediction in self.predictions]
+
+        inserted = _insert_alerts(alerts)
+
+        self.assertEqual(inserted, [alerts[1]])
+        self.assertIsNotNone(alerts[1].pk)
+        self.assertEqual(Alert.objects.count(), 2)
+
+
+@override_settings(NOTIFICATIONS={'MAX_ATTEMPTS': 3, 'RETRY_BACKOFF': 60})
+class NotificationTests(TestCase):
+    """Digests through the locmem email backend and the webhook stub"""
+
+    @classmethod
+    def setUpTestData(cls):
+        crop = Crop.objects.create(
+            name='Wheat', crop_type='CEREAL', growth_stage='VEGETATIVE',
+            planting_date=date(2026, 11, 1), field_location='Karnal, Haryana',
+        )
+        pest = Pest.objects.create(name='Yellow Rust', pest_type='FUNGAL', description='-', severity_level='HIGH')
+        cls.prediction = RiskPrediction.objects.create(crop=crop, pest=pest, risk_score=74, risk_level='HIGH')
+
+    def start_stub(self, **options):
+        stub = start_stub(**options)
+        self.addCleanup(stub.server_close)
+        self.addCleanup(stub.shutdown)
+        return stub
+
+    def add_alerts(self, *severities):
+        for severity in severities:
+            Alert.objects.create(prediction=self.prediction, severity=severity, message=f'{severity} risk')
+
+    def test_alerts_are_batched_into_one_digest_per_recipient(self):
+        stub = self.start_stub()
+        NotificationRecipient.objects.create(name='Ops', channel='EMAIL', address='ops@example.com')
+        NotificationRecipient.objects.create(name='Hook', channel='WEBHOOK', address=f'{stub.url}/hook')
+        self.add_alerts('WARNING', 'CRITICAL', 'DANGER')
+
+        self.assertEqual(queue_notifications(), 2)
+        self.assertEqual(dispatch_notifications(), {'sent': 2, 'retrying': 0, 'failed': 0})
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, '[Pest Alerts] 3 new alerts (1 critical)')
+        self.assertEqual(mail.outbox[0].body.splitlines()[0], 'CRITICAL - Yellow Rust on Wheat: CRITICAL risk')
+        self.assertEqual([request['payload']['alert_count'] for request in stub.received], [3])
+        self.assertEqual(queue_notifications(), 0)
+
+    def test_min_severity(self):
+        NotificationRecipient.objects.create(name='Ops', channel='EMAIL', address='ops@example.com', min_severity='DANGER')
+        NotificationRecipient.objects.create(name='Boss', channel='EMAIL', address='boss@example.com', min_severity='CRITICAL')
+        self.add_alerts('WARNING', 'DANGER', 'INFO')
+
+        self.assertEqual(queue_notifications(), 1)
+        notification = Notification.objects.get()
+        self.assertEqual((notification.address, notification.alert_count), ('ops@example.com', 1))
+        self.assertNotIn('WARNING', notification.body)
+
+    def test_failed_sends_back_off_then_fail(self):
+        stub = self.start_stub(fail_rate=1)
+        NotificationRecipient.objects.create(name='Hook', channel='WEBHOOK', address=f'{stub.url}/hook')
+        self.add_alerts('DANGER')
+        queue_notifications()
+
+        now = timezone.now()
+        for attempt, delay in [(1, 60), (2, 120)]:
+            self.assertEqual(dispatch_notifications(now), {'sent': 0, 'retrying': 1, 'failed': 0})
+            notification = Notification.objects.get()
+            self.assertEqual((notification.status, notification.attempts, notification.last_error), ('PENDING', attempt, 'HTTP 503'))
+            self.assertAlmostEqual((notification.next_attempt_at - timezone.now()).total_seconds(), delay, delta=5)
+
+            # Not due again until the backoff has passed
+            self.assertEqual(dispatch_notifications(now)['retrying'], 0)
+            now = notification.next_attempt_at
+
+        self.assertEqual(dispatch_notifications(now), {'sent': 0, 'retrying': 0, 'failed': 1})
+        self.assertEqual(Notification.objects.get().status, 'FAILED')
+        self.assertEqual(dispatch_notifications(now + timedelta(days=1))['failed'], 0)
+
+    def test_unexpected_channel_error_is_retried(self):
+        NotificationRecipient.objects.create(name='Hook', channel='WEBHOOK', address='not a url')
+        NotificationRecipient.objects.create(name='Ops', channel='EMAIL', address='ops@example.com')
+        self.add_alerts('DANGER')
+        queue_notifications()
+
+        with mock.patch('alerts.channels.httpx.post', side_effect=RuntimeError('boom')):
+            result = dispatch_notifications()
+
+        self.assertEqual(result, {'sent': 1, 'retrying': 1, 'failed': 0})
+        failed = Notification.objects.get(channel='WEBHOOK')
+        self.assertEqual((failed.status, failed.attempts, failed.last_error), ('PENDING', 1, 'RuntimeError: boom'))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_claimed_notifications_are_not_sent_twice(self):
+        NotificationRecipient.objects.create(name='Ops', channel='EMAIL', address='ops@example.com')
+        self.add_alerts('DANGER')
+        queue_notifications()
+
+        now = timezone.now()
+        # Another dispatcher claimed the digest and is still sending it
+        self.assertEqual(len(claim_notifications(now, 10)), 1)
+        self.assertEqual(claim_notifications(now, 10), [])
+        self.assertEqual(dispatch_notifications(now)['sent'], 0)
+
+        # ...until its lease runs out
+        self.assertEqual(dispatch_notifications(now + CLAIM_LEASE)['sent'], 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class RetentionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        crop = Crop.objects.create(
+            name='Wheat', crop_type='CEREAL', growth_stage='VEGETATIVE',
+            planting_date=date(2024, 11, 1), field_location='Karnal, Haryana',
+        )
+        pest = Pest.objects.create(name='Yellow Rust', pest_type='FUNGAL', description='-', severity_level='HIGH')
+        cls.old_prediction = RiskPrediction.objects.create(
+            crop=crop, pest=pest, risk_score=74, risk_level='HIGH', prediction_date=date(2025, 1, 15),
+        )
+        cls.new_prediction = RiskPrediction.objects.create(
+            crop=crop, pest=pest, risk_score=74, risk_level='HIGH', prediction_date=timezone.now().date(),
+        )
+
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+
+    def add_read_alerts(self, count, created_at):
+        alerts = [
+            Alert.objects.create(prediction=self.new_prediction, severity='DANGER', message=f'alert {i}', is_read=True)
+            for i in range(count)
+        ]
+        Alert.objects.filter(pk__in=[alert.pk for alert in alerts]).update(created_at=created_at)
+        return alerts
+
+    def test_archives_then_deletes_in_batches(self):
+        created_at = timezone.now() - timedelta(days=90)
+        alerts = self.add_read_alerts(5, created_at)
+        Alert.objects.create(prediction=self.new_prediction, severity='DANGER', message='unread')
+
+        with mock.patch.object(retention, '_delete', wraps=retention._delete) as delete:
+            result = run_retention(batch_size=2, archive_dir=self.archive_dir)
+
+        self.assertEqual([len(call.args[1]) for call in delete.call_args_list], [2, 2, 1, 1])
+        self.assertEqual((result['alerts'], result['predictions'], result['complete']), (5, 1, True))
+        self.assertEqual(list(Alert.objects.values_list('message', flat=True)), ['unread'])
+
+        archived = read_archive('alerts', timezone.localtime(created_at).strftime('%Y-%m'), self.archive_dir)
+        self.assertEqual([row['id'] for row in archived], [alert.pk for alert in alerts])
+        self.assertEqual(archived[0]['message'], 'alert 0')
+        predictions = read_archive('predictions', '2025-01', self.archive_dir)
+        self.assertEqual([(row['id'], row['prediction_date']) for row in predictions], [(self.old_prediction.pk, '2025-01-15')])
+
+    def test_stops_at_deadline(self):
+        self.add_read_alerts(5, timezone.now() - timedelta(days=90))
+
+        # The deadline passes after the first batch
+        with mock.patch.object(retention, 'time') as clock:
+            clock.monotonic.side_effect = [0, 10]
+            deleted, done = archive_in_batches(
+                Alert.objects.all(), 'alerts', 'created_at', 2, deadline=5, archive_dir=self.archive_dir,
+            )
+
+        self.assertEqual((deleted, done), (2, False))
+        self.assertEqual(Alert.objects.count(), 3)
+
+    def test_counts_alerts_added_during_the_run(self):
+        Alert.objects.create(prediction=self.old_prediction, severity='DANGER', message='before')
+
+        def add_late_alert(queryset, kind, *args, **kwargs):
+            result = archive_in_batches(queryset, kind, *args, **kwargs)
+            if kind == 'alerts':
+                Alert.objects.create(prediction=self.old_prediction, severity='DANGER', message='late')
+            return result
+
+        with mock.patch.object(retention, 'archive_in_batches', side_effect=add_late_alert):
+            predictions, alerts, done = archive_old_predictions(archive_dir=self.archive_dir)
+
+        self.assertEqual((predictions, alerts, done), (1, 2, True))
+        self.assertFalse(Alert.objects.filter(prediction=self.old_prediction).exists())
+        archived = read_archive('alerts', timezone.localtime().strftime('%Y-%m'), self.archive_dir)
+        self.assertEqual([row['message'] for row in archived], ['before', 'late'])
+
+
+class AlertSummaryCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        crop = Crop.objects.create(
+            name='Wheat', crop_type='CEREAL', growth_stage='VEGETATIVE',
+            planting_date=date(2026, 11, 1), field_location='Karnal, Haryana',
+        )
+        pest = Pest.objects.create(name='Yellow Rust', pest_type='FUNGAL', description='-', severity_level='HIGH')
+        cls.prediction = RiskPrediction.objects.create(crop=crop, pest=pest, risk_score=74, risk_level='HIGH')
+
+    def setUp(self):
+        cache.clear()
+
+    def add_alert(self, severity='DANGER'):
+        return Alert.objects.create(prediction=self.prediction, severity=severity, message='-')
+
+    def test_summary_is_cached_per_window(self):
+        self.add_alert()
+        old = self.add_alert('CRITICAL')
+        Alert.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=30))
+
+        with self.assertNumQueries(2):
+            self.assertEqual(get_alert_summary()['total'], 2)
+            self.assertEqual(get_alert_summary(days=7)['total'], 1)
+        with self.assertNumQueries(0):
+            get_alert_summary()
+            get_alert_summary(days=7)
+
+    def test_alert_writes_invalidate(self):
+        # Invalidation waits for the commit
+        with self.captureOnCommitCallbacks(execute=True):
+            alert = self.add_alert()
+        self.assertEqual(get_alert_summary()['unread'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_alert('CRITICAL')
+        self.assertEqual(get_alert_summary()['critical'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('alerts:mark_all_as_read'))
+        self.assertEqual(get_alert_summary()['unread'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            alert.delete()
+        self.assertEqual(get_alert_summary()['total'], 1)
+
+
+class AlertStreamTests(TestCase):
+    """New alerts reach open streams once the creating transaction commits"""
+
+    @classmethod
+    def setUpTestData(cls):
+        crop = Crop.objects.create(
+            name='Wheat', crop_type='CEREAL', growth_stage='VEGETATIVE',
+            planting_date=date(2026, 11, 1), field_location='Karnal, Haryana',
+        )
+        pest = Pest.objects.create(name='Yellow Rust', pest_type='FUNGAL', description='-', severity_level='HIGH')
+        prediction = RiskPrediction.objects.create(crop=crop, pest=pest, risk_score=74, risk_level='HIGH')
+        cls.alert = Alert.objects.create(prediction=prediction, severity='DANGER', message='Rust risk')
+
+    def publish(self):
+        """Call publish_alerts() and hold back its on_commit callbacks"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            publish_alerts([self.alert])
+        return callbacks
+
+    async def test_subscriber_gets_alert_after_commit_and_heartbeats(self):
+        events = _alert_events(heartbeat=0.05)
+        try:
+            self.assertEqual(await anext(events), 'retry: 3000\n' + format_sse('unread_count', {'count': 1}))
+            self.assertEqual(alert_broadcaster.subscriber_count, 1)
+
+            callbacks = await sync_to_async(self.publish)()
+            self.assertEqual(len(callbacks), 1)
+            # Nothing is sent before the commit: the idle stream only heartbeats
+            self.assertEqual(await anext(events), ': keepalive\n\n')
+
+            await sync_to_async(callbacks[0])()
+            event, data = (await anext(events)).split('\n')[:2]
+            self.assertEqual(event, 'event: alert')
+            payload = json.loads(data.removeprefix('data: '))
+            self.assertEqual((payload['id'], payload['crop'], payload['pest']), (self.alert.id, 'Wheat', 'Yellow Rust'))
+            self.assertEqual(await anext(events), format_sse('unread_count', {'count': 1}))
+            self.assertEqual(await anext(events), ': keepalive\n\n')
+        finally:
+            await events.aclose()
+        self.assertEqual(alert_broadcaster.subscriber_count, 0)
+
+    async def test_full_queue_drops_messages(self):
+        broadcaster = AlertBroadcaster(max_queue_size=1)
+        loop, queue = broadcaster.subscribe()
+
+        broadcaster.publish('unread_count', {'count': 1})
+        broadcaster.publish('unread_count', {'count': 2})
+        await asyncio.sleep(0)
+        self.assertEqual(queue.qsize(), 1)
+        self.assertEqual(queue.get_nowait(), format_sse('unread_count', {'count': 1}))
@@ -10,8 +10,11 @@ urlpatterns = [
     path('mark-all-read/', views.mark_all_as_read, name='mark_all_as_read'),
     path('<int:pk>/delete/', views.delete_alert, name='delete_alert'),
     path('api/unread-count/', views.unread_alert_count, name='unread_alert_count'),
+    path('api/stream/', views.alert_stream, name='alert_stream'),
     path('preventive-measures/', views.preventive_measures, name='preventive_measures'),
     path('recommendations/<int:prediction_id>/', views.get_recommendations, name='get_recommendations'),
     path('settings/', views.alert_settings, name='alert_settings'),
+    path('settings/recipients/<int:pk>/delete/', views.delete_recipient, name='delete_recipient'),
+    path('settings/send/', views.send_notifications_view, name='send_notifications'),
     path('generate/', views.generate_alerts_view, name='generate_alerts'),
 ]
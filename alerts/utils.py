@@ -1,58 +1,40 @@
 """
 Alert generation and management utilities
 """
+import uuid
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
 from .models import Alert, PreventiveMeasure
+from .events import publish_alerts
 from predictions.models import RiskPrediction
 
 
+# Cached summaries are keyed by this version; bumping it drops them all
+ALERT_SUMMARY_VERSION_KEY = 'alerts:summary_version'
+
+# Windows end now, so a cached windowed summary lags by at most this (seconds)
+ALERT_SUMMARY_TIMEOUT = 60
+
+
 def generate_alerts_from_predictions():
     """
-    Automatically generate alerts for high-risk predictions
+    Automatically generate alerts from today's predictions
     Returns: number of alerts created
-    """
-    # Get today's high-risk predictions that don't have alerts yet
-    today = timezone.now().date()
-    high_risk_predictions = RiskPrediction.objects.filter(
-        prediction_date=today,
-        risk_level='HIGH'
-    )
     
-    alerts_created = 0
+    Repeats of an open alert are suppressed; see alerts.engine for when
+    alerts are opened, escalated and resolved.
+    """
+    from .engine import evaluate_predictions
     
-    for prediction in high_risk_predictions:
-        # Check if alert already exists
-        existing_alert = Alert.objects.filter(
-            prediction=prediction,
-            created_at__date=today
-        ).first()
-        
-        if not existing_alert:
-            # Determine severity based on risk score
-            if prediction.risk_score >= 80:
-                severity = 'CRITICAL'
-            elif prediction.risk_score >= 70:
-                severity = 'DANGER'
-            else:
-                severity = 'WARNING'
-            
-            # Create alert message
-            message = (
-                f"High risk of {prediction.pest.name} outbreak detected on {prediction.crop.name}. "
-                f"Risk score: {prediction.risk_score}%. "
-                f"Immediate preventive action recommended."
-            )
-            
-            # Create alert
-            Alert.objects.create(
-                prediction=prediction,
-                severity=severity,
-                message=message,
-                is_read=False
-            )
-            alerts_created += 1
+    today = timezone.now().date()
+    predictions = RiskPrediction.objects.filter(
+        prediction_date=today
+    ).select_related('crop', 'pest')
     
-    return alerts_created
+    result = evaluate_predictions(predictions, today)
+    return len(result['alerts'])
 
 
 def get_recommended_actions(pest):
@@ -95,16 +77,13 @@ def get_critical_alerts():
 
 def cleanup_old_alerts(days=30):
     """
-    Delete read alerts older than specified days
-    """
-    from datetime import timedelta
+    Archive and delete read alerts older than specified days
     
-    cutoff_date = timezone.now() - timedelta(days=days)
-    deleted_count = Alert.objects.filter(
-        is_read=True,
-        created_at__lt=cutoff_date
-    ).delete()[0]
+    Runs in batches (see alerts.retention) instead of one large delete.
+    """
+    from .retention import archive_old_alerts
     
+    deleted_count, _ = archive_old_alerts(days)
     return deleted_count
 
 
@@ -118,20 +97,72 @@ def create_custom_alert(prediction, severity, message):
         message=message,
         is_read=False
     )
+    publish_alerts([alert])
     return alert
 
 
-def get_alert_summary():
+def alert_counts(alerts=None):
     """
-    Get summary statistics for alerts
+    Alert totals by read state and severity in one conditional-aggregate query
+    
+    Severity counts are keyed by severity code (e.g. 'CRITICAL').
     """
-    from django.db.models import Count
+    from django.db.models import Count, Q
     
-    summary = {
-        'total': Alert.objects.count(),
-        'unread': Alert.objects.filter(is_read=False).count(),
-        'critical': Alert.objects.filter(severity='CRITICAL', is_read=False).count(),
-        'by_severity': Alert.objects.values('severity').annotate(count=Count('id')),
+    alerts = Alert.objects.all() if alerts is None else alerts
+    severities = {
+        severity: Count('id', filter=Q(severity=severity))
+        for severity, _ in Alert.SEVERITY_LEVELS
     }
+    return alerts.order_by().aggregate(
+        total=Count('id'),
+        unread=Count('id', filter=Q(is_read=False)),
+        critical_unread=Count('id', filter=Q(severity='CRITICAL', is_read=False)),
+        **severities
+    )
+
+
+def invalidate_alert_summaries():
+    """
+    Drop every cached alert summary once the current transaction commits
+
+    Alert saves and deletes do this through signals; call it after
+    queryset.update() or bulk_create(), which send none.
+    """
+    transaction.on_commit(lambda: cache.set(ALERT_SUMMARY_VERSION_KEY, uuid.uuid4().hex, None))
+
+
+def get_alert_summary(days=None):
+    """
+    Get summary statistics for alerts
+    
+    days limits the summary to alerts created in the last days days. All
+    counts come from one alert_counts() query, cached per window until an
+    alert changes.
+    """
+    version = cache.get_or_set(ALERT_SUMMARY_VERSION_KEY, lambda: uuid.uuid4().hex, None)
+    return cache.get_or_set(
+        f'alerts:summary:{version}:{days or "all"}',
+        lambda: _alert_summary(days),
+        ALERT_SUMMARY_TIMEOUT,
+    )
+
+
+def _alert_summary(days):
+    alerts = Alert.objects.all()
+    if days:
+        alerts = alerts.filter(created_at__gte=timezone.now() - timedelta(days=days))
+    counts = alert_counts(alerts)
     
-    return summary
+    return {
+        'total': counts['total'],
+        'unread': counts['unread'],
+        'read': counts['total'] - counts['unread'],
+        'critical': counts['critical_unread'],
+        'severity_counts': {severity: counts[severity] for severity, _ in Alert.SEVERITY_LEVELS},
+        'by_severity': [
+            {'severity': severity, 'count': counts[severity]}
+            for severity, _ in Alert.SEVERITY_LEVELS
+            if counts[severity]
+        ],
+    }
@@ -1,12 +1,14 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import timedelta
 from .models import Alert, PreventiveMeasure
-from .utils import generate_alerts_from_predictions, get_alert_summary
+from .utils import generate_alerts_from_predictions, get_alert_summary, get_unread_alert_count, invalidate_alert_summaries
+from .events import alert_broadcaster, format_sse, publish_unread_count
 from predictions.models import RiskPrediction
+from pest_prediction.pagination import keyset_paginate
 
 
 def alert_list(request):
@@ -19,7 +21,7 @@ def alert_list(request):
     alerts = Alert.objects.all().select_related(
         'prediction__crop', 
         'prediction__pest'
-    ).order_by('-created_at')
+    )
     
     # Apply filters
     if status == 'unread':
@@ -34,7 +36,7 @@ def alert_list(request):
     summary = get_alert_summary()
     
     context = {
-        'alerts': alerts[:50],  # Limit to 50 for performance
+        'alerts': keyset_paginate(request, alerts, ['-created_at', '-id']),
         'status': status,
         'severity': severity,
         'summary': summary,
@@ -53,27 +55,33 @@ def alert_dashboard(request):
     # Get alerts for period
     alerts = Alert.objects.filter(created_at__gte=start_date)
     
-    # Statistics
+    # Statistics and severity distribution (one query, cached per window)
+    summary = get_alert_summary(days=days)
+    severity_counts = summary['severity_counts']
     stats = {
-        'total': alerts.count(),
-        'unread': alerts.filter(is_read=False).count(),
-        'critical': alerts.filter(severity='CRITICAL').count(),
-        'danger': alerts.filter(severity='DANGER').count(),
-        'warning': alerts.filter(severity='WARNING').count(),
-        'info': alerts.filter(severity='INFO').count(),
+        'total': summary['total'],
+        'unread': summary['unread'],
+        'critical': severity_counts['CRITICAL'],
+        'danger': severity_counts['DANGER'],
+        'warning': severity_counts['WARNING'],
+        'info': severity_counts['INFO'],
     }
+    severity_dist = summary['by_severity']
     
-    # Severity distribution
-    severity_dist = alerts.values('severity').annotate(count=Count('id'))
+    # Daily trend (one grouped query)
+    from django.db.models.functions import TruncDate
     
-    # Daily trend
+    counts_by_day = dict(
+        alerts.annotate(day=TruncDate('created_at')).order_by().values('day').annotate(
+            count=Count('id')
+        ).values_list('day', 'count')
+    )
     daily_trend = []
     for i in range(days, -1, -1):
         date = timezone.now().date() - timedelta(days=i)
-        count = alerts.filter(created_at__date=date).count()
         daily_trend.append({
             'date': date.strftime('%b %d'),
-            'count': count
+            'count': counts_by_day.get(date, 0)
         })
     
     # Top affected crops
@@ -109,6 +117,7 @@ def mark_as_read(request, pk):
     alert = get_object_or_404(Alert, pk=pk)
     alert.is_read = True
     alert.save()
+    publish_unread_count()
     
     messages.success(request, 'Alert marked as read.')
     return redirect('alerts:alert_list')
@@ -118,6 +127,8 @@ def mark_all_as_read(request):
     """Mark all alerts as read"""
     if request.method == 'POST':
         count = Alert.objects.filter(is_read=False).update(is_read=True)
+        invalidate_alert_summaries()
+        publish_unread_count()
         messages.success(request, f'Marked {count} alerts as read.')
     
     return redirect('alerts:alert_list')
@@ -129,6 +140,7 @@ def delete_alert(request, pk):
     
     if request.method == 'POST':
         alert.delete()
+        publish_unread_count()
         messages.success(request, 'Alert deleted successfully.')
         return redirect('alerts:alert_list')
     
@@ -141,6 +153,52 @@ def unread_alert_count(request):
     return JsonResponse({'count': count})
 
 
+async def alert_stream(request):
+    """
+    Server-sent event stream of new alerts and unread counts
+
+    Requires the ASGI server (pest_prediction/asgi.py); under WSGI the stream
+    would tie up a worker, so the client is told to fall back to polling.
+    """
+    from django.core.handlers.asgi import ASGIRequest
+    
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Alert stream requires the ASGI server'}, status=503)
+    
+    response = StreamingHttpResponse(_alert_events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def _alert_events(heartbeat=15, max_age=300):
+    """
+    Yield SSE frames for one subscriber
+
+    The stream ends after max_age seconds and the browser's EventSource
+    reconnects on its own, so a connection whose client went away without
+    the server noticing is released within a bounded time.
+    """
+    import asyncio
+    from asgiref.sync import sync_to_async
+    
+    subscriber = alert_broadcaster.subscribe()
+    loop, queue = subscriber
+    deadline = loop.time() + max_age
+    try:
+        count = await sync_to_async(get_unread_alert_count)()
+        yield 'retry: 3000\n' + format_sse('unread_count', {'count': count})
+        
+        while loop.time() < deadline:
+            try:
+                yield await asyncio.wait_for(queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                # Comment frame keeps proxies from closing an idle connection
+                yield ': keepalive\n\n'
+    finally:
+        alert_broadcaster.unsubscribe(subscriber)
+
+
 def preventive_measures(request):
     """List all preventive measures with filtering"""
     # Get filter parameters
@@ -171,41 +229,79 @@ def preventive_measures(request):
 
 def get_recommendations(request, prediction_id):
     """Get preventive measure recommendations for a specific prediction"""
-    prediction = get_object_or_404(RiskPrediction, pk=prediction_id)
+    prediction = get_object_or_404(RiskPrediction.objects.select_related('crop', 'pest'), pk=prediction_id)
     
-    # Get preventive measures for this pest
+    # Get preventive measures for this pest in one query
     measures = PreventiveMeasure.objects.filter(
-        pest=prediction.pest
+        pest_id=prediction.pest_id
     ).order_by('-effectiveness', 'timing')
     
     # Categorize by effectiveness
-    high_effectiveness = measures.filter(effectiveness='HIGH')
-    medium_effectiveness = measures.filter(effectiveness='MEDIUM')
-    low_effectiveness = measures.filter(effectiveness='LOW')
+    by_effectiveness = {'HIGH': [], 'MEDIUM': [], 'LOW': []}
+    for measure in measures:
+        by_effectiveness.setdefault(measure.effectiveness, []).append(measure)
     
     context = {
         'prediction': prediction,
-        'high_effectiveness': high_effectiveness,
-        'medium_effectiveness': medium_effectiveness,
-        'low_effectiveness': low_effectiveness,
+        'high_effectiveness': by_effectiveness['HIGH'],
+        'medium_effectiveness': by_effectiveness['MEDIUM'],
+        'low_effectiveness': by_effectiveness['LOW'],
     }
     return render(request, 'alerts/recommendations.html', context)
 
 
 def alert_settings(request):
-    """Alert notification settings (placeholder for future email/SMS integration)"""
+    """Notification recipients and recent deliveries"""
+    from .forms import NotificationRecipientForm
+    from .models import Notification, NotificationRecipient
+    
     if request.method == 'POST':
-        # This will be implemented when email/SMS is added
-        messages.info(request, 'Email/SMS notifications will be available in a future update.')
-        return redirect('alerts:alert_dashboard')
+        form = NotificationRecipientForm(request.POST)
+        if form.is_valid():
+            recipient = form.save()
+            messages.success(request, f'{recipient.name} will receive alert notifications.')
+            return redirect('alerts:alert_settings')
+    else:
+        form = NotificationRecipientForm()
     
     context = {
-        'email_enabled': False,
-        'sms_enabled': False,
+        'form': form,
+        'recipients': NotificationRecipient.objects.all(),
+        'recent_notifications': Notification.objects.select_related('recipient')[:10],
+        'pending_count': Notification.objects.filter(status='PENDING').count(),
+        'failed_count': Notification.objects.filter(status='FAILED').count(),
     }
     return render(request, 'alerts/settings.html', context)
 
 
+def delete_recipient(request, pk):
+    """Stop notifying a recipient"""
+    from .models import NotificationRecipient
+    
+    recipient = get_object_or_404(NotificationRecipient, pk=pk)
+    if request.method == 'POST':
+        recipient.delete()
+        messages.success(request, f'{recipient.name} removed from notifications.')
+    return redirect('alerts:alert_settings')
+
+
+def send_notifications_view(request):
+    """Queue digests for new alerts and send everything that is due"""
+    from .notifications import dispatch_notifications, queue_notifications, retry_failed_notifications
+    
+    if request.method == 'POST':
+        if request.POST.get('retry_failed'):
+            retry_failed_notifications()
+        queued = queue_notifications()
+        result = dispatch_notifications()
+        messages.info(
+            request,
+            f'Queued {queued} digests; sent {result["sent"]}, '
+            f'{result["retrying"]} will be retried, {result["failed"]} failed.'
+        )
+    return redirect('alerts:alert_settings')
+
+
 def generate_alerts_view(request):
     """Manually trigger alert generation from predictions"""
     if request.method == 'POST':
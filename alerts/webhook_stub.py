@@ -0,0 +1,62 @@
+"""
+Local stand-in for webhook and SMS gateway endpoints
+
+Accepts JSON POSTs on any path and keeps them in memory, so the WEBHOOK and
+SMS channels can be exercised offline. Failures can be injected to exercise
+the retry queue.
+"""
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class WebhookRequestHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        if server.fail_rate and random.random() < server.fail_rate:
+            return self._send(503)
+        try:
+            payload = json.loads(body or b'null')
+        except ValueError:
+            return self._send(400)
+
+        with server.lock:
+            server.received.append({'path': self.path, 'payload': payload})
+        if server.verbose:
+            print(f'{self.path}: {json.dumps(payload)}', flush=True)
+        self._send(200)
+
+    def _send(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WebhookStub(ThreadingHTTPServer):
+    """received holds {'path', 'payload'} of every accepted POST"""
+    daemon_threads = True
+
+    def __init__(self, address, fail_rate=0, verbose=False):
+        super().__init__(address, WebhookRequestHandler)
+        self.fail_rate = fail_rate
+        self.verbose = verbose
+        self.received = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+def start_stub(host='127.0.0.1', port=0, **options):
+    """Run a WebhookStub on a background thread; port 0 picks a free port"""
+    server = WebhookStub((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class CropsConfig(AppConfig):
     name = "crops"
+
+    def ready(self):
+        from .search import SEARCH_FIELDS
+        from .signals import index_saved, unindex_deleted
+
+        for label in SEARCH_FIELDS:
+            model = self.apps.get_model(label)
+            post_save.connect(index_saved, sender=model, dispatch_uid=f'{label}.index_saved')
+            post_delete.connect(unindex_deleted, sender=model, dispatch_uid=f'{label}.unindex_deleted')
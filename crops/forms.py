@@ -19,14 +19,31 @@ class CropForm(forms.ModelForm):
 class PestForm(forms.ModelForm):
     class Meta:
         model = Pest
-        fields = ['name', 'pest_type', 'description', 'severity_level', 'affected_crops']
+        fields = [
+            'name', 'pest_type', 'description', 'severity_level', 'affected_crops',
+            'base_temperature', 'optimal_temp_min', 'optimal_temp_max',
+            'humidity_threshold', 'leaf_wetness_humidity',
+        ]
         widgets = {
             'name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g., Brown Planthopper'}),
             'pest_type': forms.Select(attrs={'class': 'form-control'}),
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 4, 'placeholder': 'Detailed description...'}),
             'severity_level': forms.Select(attrs={'class': 'form-control'}),
             'affected_crops': forms.CheckboxSelectMultiple(),
+            'base_temperature': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.1', 'placeholder': 'Type default'}),
+            'optimal_temp_min': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.1', 'placeholder': 'Type default'}),
+            'optimal_temp_max': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.1', 'placeholder': 'Type default'}),
+            'humidity_threshold': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.1', 'placeholder': 'Type default'}),
+            'leaf_wetness_humidity': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.1', 'placeholder': 'Type default'}),
         }
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        optimal_min = cleaned_data.get('optimal_temp_min')
+        optimal_max = cleaned_data.get('optimal_temp_max')
+        if optimal_min is not None and optimal_max is not None and optimal_min > optimal_max:
+            self.add_error('optimal_temp_max', 'Optimal temperature maximum cannot be below the minimum.')
+        return cleaned_data
 
 
 class InfestationRecordForm(forms.ModelForm):
@@ -7,7 +7,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta, date
 from crops.models import Crop, Pest, InfestationRecord
-from weather.models import WeatherData
+from weather.models import WeatherData, WeatherRollup
 from alerts.models import PreventiveMeasure
 import random
 
@@ -27,6 +27,7 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('Clearing existing data...'))
             InfestationRecord.objects.all().delete()
             WeatherData.objects.all().delete()
+            WeatherRollup.objects.all().delete()
             PreventiveMeasure.objects.all().delete()
             Crop.objects.all().delete()
             Pest.objects.all().delete()
@@ -0,0 +1,22 @@
+"""
+Django management command to rebuild the crop and pest full-text search index.
+Usage: python manage.py rebuild_search_index
+
+Needed only after crops or pests are changed with queryset.update(),
+bulk_create() or raw SQL, which bypass the incremental index maintenance.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from crops.models import Crop, Pest
+from crops.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index for crops and pests'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            crops = rebuild_index(Crop)
+            pests = rebuild_index(Pest)
+        self.stdout.write(self.style.SUCCESS(f'✓ Indexed {crops} crops and {pests} pests'))
@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-19 14:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_crop_locations(apps, schema_editor):
+    """Link crops to the Location matching their free-text field location"""
+    Location = apps.get_model('weather', 'Location')
+    Crop = apps.get_model('crops', 'Crop')
+    for name in Crop.objects.values_list('field_location', flat=True).distinct():
+        key = ' '.join((name or '').split()).casefold()
+        if not key:
+            continue
+        canonical = ' '.join(name.split())
+        parts = [part.strip() for part in canonical.split(',')]
+        location, _ = Location.objects.get_or_create(
+            normalized_name=key,
+            defaults={'name': canonical, 'region': parts[-1] if len(parts) > 1 else ''},
+        )
+        Crop.objects.filter(field_location=name).update(location_ref=location)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0003_location'),
+        ('crops', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crop',
+            name='location_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='crops', to='weather.location'),
+        ),
+        migrations.RunPython(backfill_crop_locations, migrations.RunPython.noop),
+    ]
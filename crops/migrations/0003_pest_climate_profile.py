@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-19 14:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0002_crop_location_ref'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pest',
+            name='base_temperature',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Development threshold for degree days (°C)', max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='pest',
+            name='humidity_threshold',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Humidity above which conditions are favorable (%)', max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='pest',
+            name='leaf_wetness_humidity',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Humidity at which leaves count as wet, as do rainy days (%)', max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='pest',
+            name='optimal_temp_max',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Upper bound of optimal temperature (°C)', max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='pest',
+            name='optimal_temp_min',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Lower bound of optimal temperature (°C)', max_digits=5, null=True),
+        ),
+    ]
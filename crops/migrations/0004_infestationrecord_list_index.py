@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0003_pest_climate_profile'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='infestationrecord',
+            index=models.Index(fields=['-date', '-id'], name='crops_infes_date_a90dc8_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2 on 2026-10-19 15:02
+
+from django.db import migrations
+
+
+# (table, indexed columns); see crops.search
+SEARCH_TABLES = [
+    ('crops_crop', ['name', 'field_location']),
+    ('crops_pest', ['name', 'description']),
+]
+
+
+def create_search_index(apps, schema_editor):
+    """Create the full-text tables and index existing crops and pests"""
+    vendor = schema_editor.connection.vendor
+    for source, fields in SEARCH_TABLES:
+        table = f'{source}_fts'
+        if vendor == 'sqlite':
+            # prefix: extra indexes for 2- and 3-letter prefix queries
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE {table} USING fts5('
+                f"{', '.join(fields)}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            schema_editor.execute(
+                f'INSERT INTO {table} (rowid, {", ".join(fields)}) SELECT id, {", ".join(fields)} FROM {source}'
+            )
+        elif vendor == 'postgresql':
+            document = ' || '.join(
+                f"setweight(to_tsvector('simple', coalesce({field}, '')), '{weight}')"
+                for field, weight in zip(fields, 'AB')
+            )
+            schema_editor.execute(
+                f'CREATE TABLE {table} ('
+                f'rowid integer PRIMARY KEY REFERENCES {source} (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+                f'document tsvector NOT NULL)'
+            )
+            schema_editor.execute(f'CREATE INDEX {table}_document ON {table} USING gin (document)')
+            schema_editor.execute(f'INSERT INTO {table} (rowid, document) SELECT id, {document} FROM {source}')
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        for source, fields in SEARCH_TABLES:
+            schema_editor.execute(f'DROP TABLE IF EXISTS {source}_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0004_infestationrecord_list_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -27,6 +27,10 @@ class Crop(models.Model):
     growth_stage = models.CharField(max_length=20, choices=GROWTH_STAGES)
     planting_date = models.DateField()
     field_location = models.CharField(max_length=200)
+    location_ref = models.ForeignKey(
+        'weather.Location', on_delete=models.SET_NULL, null=True, blank=True,
+        editable=False, related_name='crops'
+    )
     area_hectares = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -36,6 +40,12 @@ class Crop(models.Model):
     
     def __str__(self):
         return f"{self.name} - {self.field_location}"
+    
+    def save(self, *args, **kwargs):
+        from weather.models import Location, normalize_location_name
+        if self.location_ref_id is None or normalize_location_name(self.field_location) != self.location_ref.normalized_name:
+            self.location_ref = Location.objects.for_name(self.field_location)
+        super().save(*args, **kwargs)
 
 
 class Pest(models.Model):
@@ -56,11 +66,31 @@ class Pest(models.Model):
         ('CRITICAL', 'Critical'),
     ]
     
+    # Climate profile used when a pest leaves a field blank (°C and %):
+    # development base temperature, optimal temperature range, humidity above
+    # which it thrives, and humidity at which leaves are assumed to stay wet
+    CLIMATE_DEFAULTS = {
+        'INSECT': {'base_temperature': 10, 'optimal_temp_min': 22, 'optimal_temp_max': 32, 'humidity_threshold': 60, 'leaf_wetness_humidity': 95},
+        'FUNGAL': {'base_temperature': 5, 'optimal_temp_min': 15, 'optimal_temp_max': 28, 'humidity_threshold': 85, 'leaf_wetness_humidity': 90},
+        'BACTERIAL': {'base_temperature': 10, 'optimal_temp_min': 25, 'optimal_temp_max': 35, 'humidity_threshold': 80, 'leaf_wetness_humidity': 90},
+        'VIRAL': {'base_temperature': 10, 'optimal_temp_min': 20, 'optimal_temp_max': 30, 'humidity_threshold': 60, 'leaf_wetness_humidity': 95},
+        'WEED': {'base_temperature': 8, 'optimal_temp_min': 20, 'optimal_temp_max': 35, 'humidity_threshold': 50, 'leaf_wetness_humidity': 95},
+        'OTHER': {'base_temperature': 10, 'optimal_temp_min': 20, 'optimal_temp_max': 30, 'humidity_threshold': 70, 'leaf_wetness_humidity': 90},
+    }
+    
     name = models.CharField(max_length=100)
     pest_type = models.CharField(max_length=20, choices=PEST_TYPES)
     description = models.TextField()
     severity_level = models.CharField(max_length=20, choices=SEVERITY_LEVELS)
     affected_crops = models.ManyToManyField(Crop, related_name='pests', blank=True)
+    
+    # Climate profile - blank fields fall back to CLIMATE_DEFAULTS for the type
+    base_temperature = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, help_text="Development threshold for degree days (°C)")
+    optimal_temp_min = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, help_text="Lower bound of optimal temperature (°C)")
+    optimal_temp_max = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, help_text="Upper bound of optimal temperature (°C)")
+    humidity_threshold = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, help_text="Humidity above which conditions are favorable (%)")
+    leaf_wetness_humidity = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, help_text="Humidity at which leaves count as wet, as do rainy days (%)")
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -69,6 +99,15 @@ class Pest(models.Model):
     
     def __str__(self):
         return f"{self.name} ({self.pest_type})"
+    
+    @property
+    def climate_profile(self):
+        """Climate profile with blank fields filled from the pest type defaults"""
+        defaults = self.CLIMATE_DEFAULTS.get(self.pest_type, self.CLIMATE_DEFAULTS['OTHER'])
+        return {
+            name: float(getattr(self, name)) if getattr(self, name) is not None else float(default)
+            for name, default in defaults.items()
+        }
 
 
 class InfestationRecord(models.Model):
@@ -92,6 +131,9 @@ class InfestationRecord(models.Model):
     
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['-date', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.pest.name} on {self.crop.name} - {self.date}"
@@ -0,0 +1,161 @@
+"""
+Full-text search over crops and pests
+
+Each searchable model has a side table (<db_table>_fts) holding one row per
+object, keyed by its id: an FTS5 virtual table on SQLite, a tsvector column
+with a GIN index on PostgreSQL. post_save/post_delete signals (crops.signals)
+keep it in step; rebuild_index() refills it after bulk changes. search()
+joins the table to a queryset, so matches are ranked by relevance (name hits
+first) and every word of the query also matches as a prefix.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+# Indexed fields per model label; the first field is weighted highest
+SEARCH_FIELDS = {
+    'crops.Crop': ['name', 'field_location'],
+    'crops.Pest': ['name', 'description'],
+}
+
+# SQLite bm25() column weights, in SEARCH_FIELDS order
+SQLITE_WEIGHTS = (10.0, 1.0)
+
+# PostgreSQL setweight() labels, in SEARCH_FIELDS order
+POSTGRES_WEIGHTS = ('A', 'B')
+
+SUPPORTED_VENDORS = ('sqlite', 'postgresql')
+
+
+def index_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def _fields(model):
+    return SEARCH_FIELDS[model._meta.label]
+
+
+def _enabled():
+    return connection.vendor in SUPPORTED_VENDORS
+
+
+def search_terms(query):
+    """Words of a search box query, lower-cased; punctuation is dropped"""
+    return re.findall(r'\w+', query.lower())
+
+
+def _postgres_document(fields, source=''):
+    """SQL building the weighted tsvector of a row from its column values"""
+    return ' || '.join(
+        f"setweight(to_tsvector('simple', coalesce({source}{field}, '')), '{weight}')"
+        for field, weight in zip(fields, POSTGRES_WEIGHTS)
+    )
+
+
+def index_objects(objects):
+    """Add or replace the index rows of saved objects of one model"""
+    objects = list(objects)
+    if not objects or not _enabled():
+        return
+    model = type(objects[0])
+    table = index_table(model)
+    fields = _fields(model)
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(f'DELETE FROM {table} WHERE rowid = %s', [(obj.pk,) for obj in objects])
+            cursor.executemany(
+                f'INSERT INTO {table} (rowid, {", ".join(fields)}) VALUES (%s{", %s" * len(fields)})',
+                [[obj.pk] + [getattr(obj, field) or '' for field in fields] for obj in objects],
+            )
+        else:
+            values = ', '.join(f'%s AS {field}' for field in fields)
+            cursor.executemany(
+                f'INSERT INTO {table} (rowid, document) '
+                f'SELECT %s, {_postgres_document(fields, "v.")} FROM (SELECT {values}) v '
+                f'ON CONFLICT (rowid) DO UPDATE SET document = EXCLUDED.document',
+                [[obj.pk] + [getattr(obj, field) or '' for field in fields] for obj in objects],
+            )
+
+
+def unindex_objects(model, pks):
+    """Remove the index rows of deleted objects"""
+    if not pks or not _enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {index_table(model)} WHERE rowid = %s', [(pk,) for pk in pks])
+
+
+def rebuild_index(model):
+    """
+    Refill a model's index from its table
+
+    Needed only after queryset.update()/bulk_create() or raw SQL, which
+    send no signals. Returns the number of rows indexed.
+    """
+    if not _enabled():
+        return 0
+    table = index_table(model)
+    fields = _fields(model)
+    source = model._meta.db_table
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table}')
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f'INSERT INTO {table} (rowid, {", ".join(fields)}) '
+                f'SELECT id, {", ".join(fields)} FROM {source}'
+            )
+        else:
+            cursor.execute(
+                f'INSERT INTO {table} (rowid, document) '
+                f'SELECT id, {_postgres_document(fields)} FROM {source}'
+            )
+    return model.objects.count()
+
+
+def search(queryset, query):
+    """
+    Rows of queryset matching every word of query, best match first
+
+    Words match as prefixes ("aph" finds "Aphids"). The relevance is
+    available as search_rank (lower is better on SQLite, higher on
+    PostgreSQL). Databases without a full-text index fall back to
+    icontains on the indexed fields.
+    """
+    model = queryset.model
+    fields = _fields(model)
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+
+    if not _enabled():
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(condition)
+
+    table = index_table(model)
+    where = [f'{table}.rowid = {model._meta.db_table}.id']
+    if connection.vendor == 'sqlite':
+        # "term"* is a quoted (operator-safe) prefix query; terms are ANDed
+        match = ' '.join(f'"{term}"*' for term in terms)
+        weights = ', '.join(str(weight) for weight in SQLITE_WEIGHTS[:len(fields)])
+        rank = f'bm25({table}, {weights})'
+        where.append(f'{table} MATCH %s')
+        order_by = ['search_rank']
+    else:
+        match = ' & '.join(f'{term}:*' for term in terms)
+        rank = f"ts_rank({table}.document, to_tsquery('simple', %s))"
+        where.append(f"{table}.document @@ to_tsquery('simple', %s)")
+        order_by = ['-search_rank']
+
+    return queryset.extra(
+        select={'search_rank': rank},
+        select_params=[match] if connection.vendor == 'postgresql' else [],
+        tables=[table],
+        where=where,
+        params=[match],
+        order_by=order_by,
+    )
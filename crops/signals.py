@@ -0,0 +1,15 @@
+"""
+Keep the crop and pest full-text index in step with their tables
+
+Connected in CropsConfig.ready(). Unlike save()/delete() overrides, the
+signals also fire for queryset.delete() and cascading deletes.
+"""
+from .search import index_objects, unindex_objects
+
+
+def index_saved(sender, instance, **kwargs):
+    index_objects([instance])
+
+
+def unindex_deleted(sender, instance, **kwargs):
+    unindex_objects(sender, [instance.pk])
@@ -1,3 +1,79 @@
+from datetime import date
+
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+
+from alerts.models import PreventiveMeasure
+from .models import Crop, Pest, InfestationRecord
+from .search import index_table, search
+
+
+class DetailQueryCountTests(TestCase):
+    """Detail pages issue a fixed number of queries however many related rows exist"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.crop = Crop.objects.create(
+            name='Rice', crop_type='CEREAL', growth_stage='FLOWERING',
+            planting_date=date(2026, 6, 1), field_location='Cuttack, Odisha', area_hectares=2,
+        )
+        cls.pest = Pest.objects.create(
+            name='Brown Planthopper', pest_type='INSECT', description='Sap-sucking insect', severity_level='HIGH',
+        )
+
+    def add_related(self, count):
+        for i in range(count):
+            crop = Crop.objects.create(
+                name=f'Crop {i}', crop_type='CEREAL', growth_stage='VEGETATIVE',
+                planting_date=date(2026, 6, 1), field_location='Cuttack, Odisha',
+            )
+            pest = Pest.objects.create(name=f'Pest {i}', pest_type='FUNGAL', description='-', severity_level='LOW')
+            InfestationRecord.objects.create(crop=self.crop, pest=pest, date=date(2026, 7, 1 + i), severity=3, area_affected=1)
+            InfestationRecord.objects.create(crop=crop, pest=self.pest, date=date(2026, 7, 1 + i), severity=3, area_affected=1)
+            PreventiveMeasure.objects.create(pest=self.pest, action=f'Measure {i}', description='-', effectiveness='HIGH')
+
+    def test_crop_detail(self):
+        url = reverse('crops:crop_detail', args=[self.crop.pk])
+        self.add_related(1)
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+        self.add_related(10)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['infestations']), 5)
+        self.assertContains(response, 'Pest 9')
+
+    def test_pest_detail(self):
+        url = reverse('crops:pest_detail', args=[self.pest.pk])
+        self.add_related(1)
+        with self.assertNumQueries(3):
+            self.client.get(url)
+
+        self.add_related(10)
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['records']), 5)
+        self.assertContains(response, 'Crop 9')
+        self.assertContains(response, 'Measure 9')
+
+
+class SearchIndexTests(TestCase):
+    def index_rows(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM {index_table(Pest)} ORDER BY rowid')
+            return [row[0] for row in cursor.fetchall()]
+
+    def test_index_follows_saves_and_deletes(self):
+        aphids = Pest.objects.create(name='Aphids', pest_type='INSECT', description='Sap-sucking insects', severity_level='HIGH')
+        rust = Pest.objects.create(name='Yellow Rust', pest_type='FUNGAL', description='Stripe rust', severity_level='HIGH')
+        self.assertEqual(list(search(Pest.objects.all(), 'aph')), [aphids])
+
+        rust.name = 'Brown Rust'
+        rust.save()
+        self.assertEqual(list(search(Pest.objects.all(), 'brown')), [rust])
 
-# Create your tests here.
+        # queryset.delete() skips delete() but still sends post_delete
+        Pest.objects.filter(pk=aphids.pk).delete()
+        self.assertEqual(self.index_rows(), [rust.pk])
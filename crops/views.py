@@ -1,8 +1,9 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.db.models import Q
 from .models import Crop, Pest, InfestationRecord
 from .forms import CropForm, PestForm, InfestationRecordForm
+from .search import search
+from pest_prediction.pagination import keyset_paginate
 
 
 # ===== Crop Views =====
@@ -13,10 +14,7 @@ def crop_list(request):
     # Search functionality
     search_query = request.GET.get('search', '')
     if search_query:
-        crops = crops.filter(
-            Q(name__icontains=search_query) | 
-            Q(field_location__icontains=search_query)
-        )
+        crops = search(crops, search_query)
     
     # Filter by crop type
     crop_type = request.GET.get('crop_type', '')
@@ -35,7 +33,7 @@ def crop_list(request):
 def crop_detail(request, pk):
     """View single crop details"""
     crop = get_object_or_404(Crop, pk=pk)
-    infestations = crop.infestations.all()[:5]  # Last 5 infestations
+    infestations = crop.infestations.select_related('pest')[:5]  # Last 5 infestations
     context = {
         'crop': crop,
         'infestations': infestations,
@@ -91,10 +89,7 @@ def pest_list(request):
     
     search_query = request.GET.get('search', '')
     if search_query:
-        pests = pests.filter(
-            Q(name__icontains=search_query) | 
-            Q(description__icontains=search_query)
-        )
+        pests = search(pests, search_query)
     
     pest_type = request.GET.get('pest_type', '')
     if pest_type:
@@ -112,7 +107,7 @@ def pest_list(request):
 def pest_detail(request, pk):
     """View single pest details"""
     pest = get_object_or_404(Pest, pk=pk)
-    records = pest.records.all()[:5]
+    records = pest.records.select_related('crop')[:5]
     preventive_measures = pest.preventive_measures.all()
     context = {
         'pest': pest,
@@ -166,7 +161,7 @@ def pest_delete(request, pk):
 # ===== Infestation Record Views =====
 def infestation_list(request):
     """List all infestation records"""
-    records = InfestationRecord.objects.all()
+    records = InfestationRecord.objects.all().select_related('crop', 'pest')
     
     crop_id = request.GET.get('crop', '')
     if crop_id:
@@ -177,7 +172,7 @@ def infestation_list(request):
         records = records.filter(pest_id=pest_id)
     
     context = {
-        'records': records,
+        'records': keyset_paginate(request, records, ['-date', '-id']),
         'crops': Crop.objects.all(),
         'pests': Pest.objects.all(),
     }
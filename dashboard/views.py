@@ -5,6 +5,7 @@ from datetime import timedelta
 import json
 from crops.models import Crop, Pest, InfestationRecord
 from weather.models import WeatherData
+from weather.utils import count_high_risk
 from predictions.models import RiskPrediction
 from alerts.models import Alert
 
@@ -41,26 +42,23 @@ def home(request):
         date__gte=last_week
     ).order_by('-date')[:7]
     
-    high_risk_weather_days = sum(1 for w in recent_weather if w.is_high_risk_conditions())
+    high_risk_weather_days = count_high_risk(recent_weather)
     
     # Pest distribution data for chart
     pest_distribution = Pest.objects.values('pest_type').annotate(
         count=Count('id')
     ).order_by('-count')
     
-    # Risk trend data (last 30 days)
-    last_month = timezone.now().date() - timedelta(days=30)
-    risk_trend = []
-    for i in range(30, -1, -5):
-        date = timezone.now().date() - timedelta(days=i)
-        count = RiskPrediction.objects.filter(
-            prediction_date=date,
-            risk_level='HIGH'
-        ).count()
-        risk_trend.append({
-            'date': date.strftime('%b %d'),
-            'count': count
-        })
+    # Risk trend data (last 30 days), counted in one grouped query
+    trend_dates = [timezone.now().date() - timedelta(days=i) for i in range(30, -1, -5)]
+    high_risk_by_date = dict(RiskPrediction.objects.filter(
+        prediction_date__in=trend_dates,
+        risk_level='HIGH'
+    ).order_by().values('prediction_date').annotate(count=Count('id')).values_list('prediction_date', 'count'))
+    risk_trend = [
+        {'date': date.strftime('%b %d'), 'count': high_risk_by_date.get(date, 0)}
+        for date in trend_dates
+    ]
     
     context = {
         'total_crops': total_crops,
@@ -2,6 +2,8 @@
 ASGI config for pest_prediction project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve through ASGI (e.g. uvicorn) to enable the live alert stream at
+/alerts/api/stream/; under WSGI browsers fall back to polling.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
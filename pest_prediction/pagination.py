@@ -0,0 +1,155 @@
+"""
+Keyset (cursor) pagination for list views
+
+A page is selected with a WHERE on the ordering columns of the last row
+shown instead of an OFFSET, so a deep page costs the same as the first one.
+The ordering must end in a unique column (normally id), its columns must be
+non-null, and an index on them keeps every page an index range scan.
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Q
+
+PER_PAGE = 25
+
+# Widest integer any backend can bind; SQLite reports no range of its own
+INTEGER_RANGE = (-2 ** 63, 2 ** 63 - 1)
+
+
+def _dump(value):
+    # Full precision: a cursor rounded to milliseconds would skip or repeat rows
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    data = json.dumps([_dump(value) for value in values]).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields):
+    """Ordering values from a cursor; raises ValueError/ValidationError if it is malformed"""
+    data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+    values = json.loads(data)
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise ValueError('cursor does not match the ordering')
+
+    values = [field.to_python(value) for field, value in zip(fields, values)]
+    for field, value in zip(fields, values):
+        # Ordering columns are non-null, and a value the column cannot hold
+        # would fail in the database rather than here
+        if value is None:
+            raise ValueError(f'cursor has no value for {field.name}')
+        if isinstance(value, int) and not isinstance(value, bool):
+            low, high = connection.ops.integer_field_range(field.get_internal_type())
+            low = INTEGER_RANGE[0] if low is None else low
+            high = INTEGER_RANGE[1] if high is None else high
+            if not low <= value <= high:
+                raise ValueError(f'cursor value for {field.name} is out of range')
+    return values
+
+
+def keyset_filter(ordering, values, forward=True):
+    """
+    Rows after (forward) or before the row with values, in ordering
+
+    ordering: [(field name, descending)]. Expands the row comparison into
+    (a < x) OR (a = x AND b < y) OR ..., which every database can evaluate.
+    """
+    condition = Q()
+    equal = {}
+    for (name, descending), value in zip(ordering, values):
+        lookup = 'lt' if descending == forward else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
+
+
+class KeysetPage:
+    """One page of rows plus query strings for the neighbouring pages"""
+
+    def __init__(self, items, params, next_cursor=None, previous_cursor=None):
+        self.items = items
+        self.params = params
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def _query(self, name, cursor):
+        params = self.params.copy()
+        params.pop('after', None)
+        params.pop('before', None)
+        params[name] = cursor
+        return params.urlencode()
+
+    @property
+    def next_query(self):
+        return self._query('after', self.next_cursor)
+
+    @property
+    def previous_query(self):
+        return self._query('before', self.previous_cursor)
+
+
+def keyset_paginate(request, queryset, ordering, per_page=PER_PAGE):
+    """
+    Page of queryset for the after/before cursor in request.GET
+
+    ordering: order_by() style names, e.g. ['-prediction_date', '-risk_score', '-id'].
+    An invalid cursor shows the first page.
+    """
+    parsed = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+    fields = [queryset.model._meta.get_field(name) for name, _ in parsed]
+
+    cursor = request.GET.get('before') or request.GET.get('after')
+    forward = not request.GET.get('before')
+    if cursor:
+        try:
+            queryset = queryset.filter(keyset_filter(parsed, decode_cursor(cursor, fields), forward))
+        except (ValueError, TypeError, ValidationError):
+            cursor, forward = None, True
+
+    if forward:
+        queryset = queryset.order_by(*ordering)
+    else:
+        # Walk backwards from the cursor, then restore display order
+        queryset = queryset.order_by(*[name[1:] if name.startswith('-') else f'-{name}' for name in ordering])
+
+    rows = list(queryset[:per_page + 1])
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+
+    def row_cursor(row):
+        return encode_cursor([field.value_from_object(row) for field in fields])
+
+    has_next = more if forward else bool(rows)
+    has_previous = bool(cursor) and bool(rows) if forward else more
+    return KeysetPage(
+        rows,
+        request.GET,
+        next_cursor=row_cursor(rows[-1]) if rows and has_next else None,
+        previous_cursor=row_cursor(rows[0]) if rows and has_previous else None,
+    )
@@ -0,0 +1,200 @@
+"""
+N+1 query detection for development and tests
+
+QueryRecorder records every query run on a connection together with the
+line that issued it: the innermost template tag/variable, or else the
+innermost frame of project code. Queries whose SQL differs only in parameters
+share a shape; a shape run THRESHOLD or more times in one request usually
+means a relation is being loaded once per row (a missing select_related or
+prefetch_related).
+
+NPlusOneMiddleware checks each request (when NPLUSONE["ENABLED"], DEBUG by
+default) and logs the repeated shapes, or raises NPlusOneError if
+NPLUSONE["RAISE"]. Under ASGI requests pass through unchecked: their queries
+run on sync_to_async worker threads, outside the connection the recorder
+wraps. Tests use assert_query_budget().
+"""
+import logging
+import os
+import re
+import sys
+from collections import defaultdict
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection as default_connection
+
+logger = logging.getLogger(__name__)
+
+# Call sites listed per repeated shape in a report
+MAX_CALL_SITES = 3
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_NUMBER = re.compile(r'\b\d+\b')
+_TEMPLATE_BASE = os.path.join('django', 'template', 'base.py')
+
+
+def nplusone_settings():
+    from django.conf import settings
+
+    return {
+        'ENABLED': settings.DEBUG,
+        'THRESHOLD': 3,
+        'RAISE': False,
+        **getattr(settings, 'NPLUSONE', {}),
+    }
+
+
+class NPlusOneError(AssertionError):
+    """A request repeated a query shape or went over its query budget"""
+
+
+def query_shape(sql):
+    """SQL with IN lists and literal numbers (LIMIT/OFFSET) collapsed"""
+    return _NUMBER.sub('N', _IN_LIST.sub('IN (...)', sql))
+
+
+def _project_dir():
+    from django.conf import settings
+
+    return str(settings.BASE_DIR)
+
+
+def call_site(frame):
+    """'template.html:12' or 'app/views.py:34 in view' for the code that ran a query"""
+    project_dir = _project_dir()
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == 'render_annotated' and code.co_filename.endswith(_TEMPLATE_BASE):
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                return f'{origin.template_name or origin.name}:{token.lineno}'
+        elif (
+            code.co_filename.startswith(project_dir)
+            and code.co_filename != __file__
+            and 'site-packages' not in code.co_filename
+        ):
+            return f'{os.path.relpath(code.co_filename, project_dir)}:{frame.f_lineno} in {code.co_name}'
+        frame = frame.f_back
+    return 'unknown'
+
+
+class RecordedQuery:
+    def __init__(self, sql, params, site):
+        self.sql = sql
+        self.params = params
+        self.site = site
+
+    @property
+    def shape(self):
+        return query_shape(self.sql)
+
+
+class RepeatedQuery:
+    """A query shape run count times, with the lines that ran it"""
+
+    def __init__(self, shape, count, sites):
+        self.shape = shape
+        self.count = count
+        self.sites = sites
+
+    def __str__(self):
+        sites = ', '.join(self.sites[:MAX_CALL_SITES])
+        if len(self.sites) > MAX_CALL_SITES:
+            sites += f' (+{len(self.sites) - MAX_CALL_SITES} more)'
+        return f'{self.count}x from {sites}: {self.shape}'
+
+
+class QueryRecorder:
+    """Context manager recording the queries run on a connection"""
+
+    def __init__(self, connection=None):
+        self.connection = connection or default_connection
+        self.queries = []
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(RecordedQuery(sql, params, call_site(sys._getframe(1))))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = self.connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def repeated(self, threshold=None):
+        """Shapes run at least threshold times, most frequent first"""
+        threshold = threshold or nplusone_settings()['THRESHOLD']
+        sites = defaultdict(list)
+        for query in self.queries:
+            sites[query.shape].append(query.site)
+
+        repeated = [
+            RepeatedQuery(shape, len(shape_sites), list(dict.fromkeys(shape_sites)))
+            for shape, shape_sites in sites.items()
+            if len(shape_sites) >= threshold
+        ]
+        return sorted(repeated, key=lambda query: -query.count)
+
+
+def format_report(label, recorder, repeated, budget=None):
+    lines = [f'{label}: {len(recorder)} queries' + (f' (budget {budget})' if budget is not None else '')]
+    lines += [f'  {query}' for query in repeated]
+    return '\n'.join(lines)
+
+
+@contextmanager
+def assert_query_budget(budget=None, threshold=None, label='block', connection=None):
+    """
+    Fail if the block runs more than budget queries or repeats a query shape
+
+    Raises NPlusOneError listing the repeated shapes and their call sites.
+    """
+    with QueryRecorder(connection) as recorder:
+        yield recorder
+
+    repeated = recorder.repeated(threshold)
+    if repeated or (budget is not None and len(recorder) > budget):
+        raise NPlusOneError(format_report(label, recorder, repeated, budget))
+
+
+class NPlusOneMiddleware:
+    """Reports requests that repeat a query shape; see NPLUSONE in settings"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.config = nplusone_settings()
+        if not self.config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+
+        repeated = recorder.repeated(self.config['THRESHOLD'])
+        if repeated:
+            report = format_report(f'{request.method} {request.path}', recorder, repeated)
+            if self.config['RAISE']:
+                raise NPlusOneError(report)
+            logger.warning('Repeated queries (N+1)\n%s', report)
+        return response
+
+    async def __acall__(self, request):
+        # Not recorded; stays async so ASGI requests are not forced onto a thread
+        return await self.get_response(request)
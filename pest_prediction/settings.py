@@ -54,6 +54,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "pest_prediction.querycount.NPlusOneMiddleware",
 ]
 
 ROOT_URLCONF = "pest_prediction.urls"
@@ -131,3 +132,48 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Weather feed fetcher (weather/feeds.py). The defaults point at the local
+# stand-in server started with: python manage.py run_weather_feed_server
+WEATHER_FEED = {
+    "ADAPTER": "standin",
+    "BASE_URL": "http://127.0.0.1:8765",
+    "MAX_CONNECTIONS": 10,
+    "RATE_LIMIT": 20,  # requests per second per host
+    "RETRIES": 3,
+    "BACKOFF": 0.5,  # seconds, doubled on every retry
+    "TIMEOUT": 10,  # seconds
+}
+
+# Alert notifications (alerts/notifications.py), sent by:
+# python manage.py send_notifications
+# Emails are printed to the console; use django.core.mail.backends.smtp.EmailBackend
+# with EMAIL_HOST/EMAIL_PORT/EMAIL_HOST_USER/EMAIL_HOST_PASSWORD to deliver them.
+EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+DEFAULT_FROM_EMAIL = "alerts@pest-prediction.local"
+
+NOTIFICATIONS = {
+    "MAX_WORKERS": 8,
+    "CHANNEL_CONCURRENCY": {"EMAIL": 2, "SMS": 4, "WEBHOOK": 4},
+    "MAX_ATTEMPTS": 5,
+    "RETRY_BACKOFF": 60,  # seconds, doubled after each failed attempt
+    # HTTP gateway for SMS; python manage.py run_webhook_stub serves one locally
+    "SMS_GATEWAY_URL": "http://127.0.0.1:8766/sms",
+}
+
+# Retention (alerts/retention.py): python manage.py archive_old_records
+RETENTION = {
+    "ARCHIVE_DIR": BASE_DIR / "archives",
+    "ALERT_DAYS": 30,  # read alerts
+    "PREDICTION_DAYS": 365,
+    "BATCH_SIZE": 1000,
+}
+
+# N+1 query detection (pest_prediction/querycount.py). Requests that run the
+# same query THRESHOLD or more times are logged with the lines that ran it;
+# set RAISE to turn them into errors.
+NPLUSONE = {
+    "ENABLED": DEBUG,
+    "THRESHOLD": 3,
+    "RAISE": False,
+}
@@ -0,0 +1,232 @@
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from alerts.models import Alert, Notification, NotificationRecipient, PreventiveMeasure
+from crops.models import Crop, Pest, InfestationRecord
+from predictions.models import RiskPrediction
+from weather.models import WeatherData, WeatherImportJob
+from .pagination import encode_cursor
+from .querycount import NPlusOneError, NPlusOneMiddleware, assert_query_budget
+
+# Most queries a GET of each URL may run against the seeded database. Every
+# named URL needs an entry here or in SKIPPED_URLS.
+QUERY_BUDGETS = {
+    'dashboard:home': 10,
+    'crops:crop_list': 1,
+    'crops:crop_detail': 2,
+    'crops:crop_create': 0,
+    'crops:crop_update': 1,
+    'crops:crop_delete': 1,
+    'crops:pest_list': 1,
+    'crops:pest_detail': 3,
+    'crops:pest_create': 1,
+    'crops:pest_update': 3,
+    'crops:pest_delete': 1,
+    'crops:infestation_list': 3,
+    'crops:infestation_create': 2,
+    'crops:infestation_update': 3,
+    'crops:infestation_delete': 3,
+    'weather:weather_dashboard': 5,
+    'weather:weather_create': 0,
+    'weather:weather_update': 1,
+    'weather:weather_delete': 1,
+    'weather:weather_import': 1,
+    'weather:weather_import_progress': 2,
+    'weather:weather_import_status': 1,
+    'weather:weather_import_resume': 1,
+    'weather:weather_fetch': 0,
+    'weather:weather_analysis': 2,
+    'weather:weather_trend_api': 2,
+    'weather:weather_analysis_api': 2,
+    'predictions:prediction_list': 4,
+    'predictions:generate_predictions': 4,
+    'predictions:prediction_detail': 4,
+    'predictions:prediction_analytics': 6,
+    'predictions:export_predictions_csv': 1,
+    'predictions:export_all_data': 6,
+    'predictions:export_columnar': 4,
+    'alerts:alert_list': 2,
+    'alerts:alert_dashboard': 5,
+    'alerts:mark_as_read': 2,
+    'alerts:mark_all_as_read': 0,
+    'alerts:delete_alert': 1,
+    'alerts:unread_alert_count': 1,
+    'alerts:preventive_measures': 2,
+    'alerts:get_recommendations': 2,
+    'alerts:alert_settings': 4,
+    'alerts:delete_recipient': 1,
+    'alerts:send_notifications': 0,
+    'alerts:generate_alerts': 1,
+    'reports:risk_assessment_report': 1,
+}
+
+SKIPPED_URLS = {
+    'alerts:alert_stream': 'open-ended server-sent event stream',
+}
+
+
+def named_urls(patterns=None, namespace=''):
+    """(name, route) of every named URL outside the admin"""
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace == 'admin':
+                continue
+            prefix = f'{pattern.namespace}:' if pattern.namespace else namespace
+            yield from named_urls(pattern.url_patterns, prefix)
+        elif pattern.name:
+            yield namespace + pattern.name, str(pattern.pattern)
+
+
+class SeededDataMixin:
+    """Several rows of every model, so per-row queries show up as repeats"""
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.now().date()
+        cls.crops = [
+            Crop.objects.create(
+                name=f'Crop {i}', crop_type='CEREAL', growth_stage='FLOWERING',
+                planting_date=today - timedelta(days=60), field_location=['Ludhiana, Punjab', 'Karnal, Haryana'][i % 2],
+            )
+            for i in range(4)
+        ]
+        cls.pests = [
+            Pest.objects.create(name=f'Pest {i}', pest_type=['INSECT', 'FUNGAL'][i % 2], description='-', severity_level='HIGH')
+            for i in range(4)
+        ]
+        for pest in cls.pests:
+            pest.affected_crops.set(cls.crops)
+            for effectiveness in ['HIGH', 'MEDIUM', 'LOW']:
+                PreventiveMeasure.objects.create(pest=pest, action=effectiveness, description='-', effectiveness=effectiveness)
+
+        for location in ['Ludhiana, Punjab', 'Karnal, Haryana']:
+            for day in range(10):
+                WeatherData.objects.create(
+                    date=today - timedelta(days=day), location=location, temperature_avg=25, temperature_min=20,
+                    temperature_max=30, humidity=80, rainfall=6, wind_speed=3,
+                )
+
+        for i, crop in enumerate(cls.crops):
+            for pest in cls.pests:
+                InfestationRecord.objects.create(crop=crop, pest=pest, date=today - timedelta(days=i), severity=3, area_affected=1)
+                prediction = RiskPrediction.objects.create(
+                    crop=crop, pest=pest, risk_score=75, risk_level='HIGH', confidence=80,
+                    prediction_date=today - timedelta(days=i),
+                )
+                Alert.objects.create(prediction=prediction, severity='DANGER', message='-')
+
+        recipients = [
+            NotificationRecipient.objects.create(name='Email', channel='EMAIL', address='ops@example.com'),
+            NotificationRecipient.objects.create(name='Webhook', channel='WEBHOOK', address='http://127.0.0.1:8766/hook'),
+        ]
+        for recipient in recipients * 2:
+            Notification.objects.create(
+                recipient=recipient, channel=recipient.channel, address=recipient.address,
+                subject='-', body='-', next_attempt_at=timezone.now(),
+            )
+        cls.import_job = WeatherImportJob.objects.create(
+            file_path='/tmp/weather.csv', original_name='weather.csv', status='COMPLETED',
+        )
+
+    def url_kwargs(self, name, route):
+        objects = {
+            'crops:crop': self.crops[0],
+            'crops:pest': self.pests[0],
+            'crops:infestation': InfestationRecord.objects.first(),
+            'weather:weather_import': self.import_job,
+            'weather:weather': WeatherData.objects.first(),
+            'predictions:prediction': RiskPrediction.objects.first(),
+            'alerts:get_recommendations': RiskPrediction.objects.first(),
+            'alerts:delete_recipient': NotificationRecipient.objects.first(),
+            'alerts:': Alert.objects.first(),
+        }
+        for prefix, obj in objects.items():
+            if name.startswith(prefix):
+                parameter = route[route.index('<int:') + 5:route.index('>')]
+                return {parameter: obj.pk}
+        raise KeyError(name)
+
+
+class URLQueryBudgetTests(SeededDataMixin, TestCase):
+    """GET every URL and check its query count and repeated queries"""
+
+    def test_every_url_has_a_budget(self):
+        names = {name for name, route in named_urls()}
+        self.assertEqual(names - set(QUERY_BUDGETS) - set(SKIPPED_URLS), set())
+        self.assertEqual(set(QUERY_BUDGETS) - names, set())
+
+    def test_query_budgets(self):
+        for name, route in named_urls():
+            if name in SKIPPED_URLS:
+                continue
+            url = reverse(name, kwargs=self.url_kwargs(name, route) if '<' in route else None)
+            with self.subTest(url=url):
+                with assert_query_budget(QUERY_BUDGETS[name], label=f'GET {url}'):
+                    response = self.client.get(url)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                self.assertLess(response.status_code, 400)
+
+
+class KeysetPaginationTests(SeededDataMixin, TestCase):
+    def test_tampered_cursor_shows_first_page(self):
+        url = reverse('predictions:prediction_list')
+        first_page = list(self.client.get(url).context['predictions'])
+        cursors = [
+            encode_cursor(['2026-10-01', None, None]),
+            encode_cursor(['2026-10-01', 50, 10 ** 30]),
+            encode_cursor(['2026-10-01', 50]),
+            'not-a-cursor',
+        ]
+        for cursor in cursors:
+            for direction in ['after', 'before']:
+                with self.subTest(cursor=cursor, direction=direction):
+                    response = self.client.get(url, {direction: cursor})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(list(response.context['predictions']), first_page)
+
+
+class NPlusOneDetectionTests(SeededDataMixin, TestCase):
+    def test_reports_python_call_site(self):
+        with self.assertRaisesMessage(NPlusOneError, 'pest_prediction/tests.py'):
+            with assert_query_budget():
+                [record.pest.name for record in InfestationRecord.objects.all()]
+
+    def test_reports_template_line(self):
+        template = Template('{% for record in records %}\n{{ record.crop.name }}\n{% endfor %}')
+        with self.assertRaisesMessage(NPlusOneError, ':2'):
+            with assert_query_budget():
+                template.render(Context({'records': InfestationRecord.objects.all()}))
+
+    def test_select_related_passes(self):
+        with assert_query_budget(budget=1):
+            [record.pest.name for record in InfestationRecord.objects.select_related('pest')]
+
+    def test_budget(self):
+        with self.assertRaisesMessage(NPlusOneError, '2 queries (budget 1)'):
+            with assert_query_budget(budget=1):
+                Crop.objects.count()
+                Pest.objects.count()
+
+    @override_settings(NPLUSONE={'ENABLED': True, 'RAISE': True})
+    def test_middleware(self):
+        def view(request):
+            return [record.crop.name for record in InfestationRecord.objects.all()]
+
+        middleware = NPlusOneMiddleware(view)
+        with self.assertRaisesMessage(NPlusOneError, 'GET /crops/'):
+            middleware(RequestFactory().get('/crops/'))
+
+    @override_settings(NPLUSONE={'ENABLED': True, 'RAISE': True})
+    def test_middleware_passes_async_requests_through(self):
+        async def view(request):
+            return 'response'
+
+        middleware = NPlusOneMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertEqual(async_to_sync(middleware)(RequestFactory().get('/crops/')), 'response')
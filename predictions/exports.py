@@ -0,0 +1,325 @@
+"""
+Streaming data export helpers
+
+Rows are read with chunked values-only cursors and written straight into the
+response, so export memory stays flat regardless of table size.
+"""
+import csv
+import io
+import zipfile
+
+from django.db.models import Prefetch
+
+from crops.models import Crop, Pest, InfestationRecord
+from weather.models import WeatherData
+from alerts.models import Alert
+from .models import RiskPrediction
+
+CHUNK_SIZE = 2000
+
+# Number of weather/alert rows included unless the full history is requested
+RECENT_HISTORY_LIMIT = 100
+
+
+class _StreamSink(io.RawIOBase):
+    """
+    Write-only, unseekable buffer drained into the response
+
+    ZipFile falls back to data descriptors when it cannot seek, which lets
+    each member be emitted as soon as it is written.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+def stream_zip(members, compression=zipfile.ZIP_DEFLATED, flush_size=64 * 1024):
+    """
+    Yield a ZIP archive as bytes
+
+    members: iterable of (filename, write) where write(fileobj) is a generator
+    that writes the member to fileobj and yields whenever it has made progress
+    """
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, 'w', compression) as zip_file:
+        for filename, write in members:
+            with zip_file.open(filename, 'w', force_zip64=True) as member:
+                for _ in write(member):
+                    if sink.size >= flush_size:
+                        yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
+
+
+def stream_file(write, flush_size=64 * 1024):
+    """Yield a single file produced by a write(fileobj) generator as bytes"""
+    sink = _StreamSink()
+    for _ in write(sink):
+        if sink.size >= flush_size:
+            yield sink.drain()
+    yield sink.drain()
+
+
+def csv_member(rows):
+    """Member writer that encodes rows as UTF-8 CSV"""
+    def write(fileobj):
+        text = io.TextIOWrapper(fileobj, encoding='utf-8', newline='')
+        writer = csv.writer(text)
+        for row in rows:
+            writer.writerow(row)
+            yield
+        text.flush()
+        text.detach()
+    return write
+
+
+def prediction_rows():
+    yield ['Date', 'Crop', 'Pest', 'Risk Score', 'Risk Level', 'Confidence']
+    yield from RiskPrediction.objects.order_by('-prediction_date', '-risk_score').values_list(
+        'prediction_date', 'crop__name', 'pest__name', 'risk_score', 'risk_level', 'confidence'
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+def crop_rows():
+    crop_types = dict(Crop.CROP_TYPES)
+    growth_stages = dict(Crop.GROWTH_STAGES)
+
+    yield ['Name', 'Type', 'Growth Stage', 'Planting Date', 'Area (hectares)', 'Location']
+    crops = Crop.objects.values_list(
+        'name', 'crop_type', 'growth_stage', 'planting_date', 'area_hectares', 'field_location'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    for name, crop_type, growth_stage, planting_date, area, location in crops:
+        yield [
+            name,
+            crop_types.get(crop_type, crop_type),
+            growth_stages.get(growth_stage, growth_stage),
+            planting_date,
+            area,
+            location,
+        ]
+
+
+def pest_rows():
+    pest_types = dict(Pest.PEST_TYPES)
+    severity_levels = dict(Pest.SEVERITY_LEVELS)
+
+    yield ['Name', 'Type', 'Description', 'Severity', 'Affected Crops']
+    pests = Pest.objects.only(
+        'name', 'pest_type', 'description', 'severity_level'
+    ).prefetch_related(
+        Prefetch('affected_crops', queryset=Crop.objects.only('name'))
+    ).iterator(chunk_size=CHUNK_SIZE)
+    for pest in pests:
+        yield [
+            pest.name,
+            pest_types.get(pest.pest_type, pest.pest_type),
+            pest.description[:200] if pest.description else '',
+            severity_levels.get(pest.severity_level, pest.severity_level),
+            ', '.join(crop.name for crop in pest.affected_crops.all()),
+        ]
+
+
+def weather_rows(limit=RECENT_HISTORY_LIMIT):
+    """Weather history, newest first; limit=None exports every record"""
+    yield ['Date', 'Location', 'Temp Min', 'Temp Max', 'Temp Avg', 'Humidity', 'Rainfall', 'Wind Speed']
+    weather = WeatherData.objects.order_by('-date').values_list(
+        'date', 'location', 'temperature_min', 'temperature_max',
+        'temperature_avg', 'humidity', 'rainfall', 'wind_speed'
+    )
+    if limit is not None:
+        weather = weather[:limit]
+    yield from weather.iterator(chunk_size=CHUNK_SIZE)
+
+
+def alert_rows(limit=RECENT_HISTORY_LIMIT):
+    """Alert history, newest first; limit=None exports every alert"""
+    yield ['Created', 'Severity', 'Message', 'Is Read', 'Crop', 'Pest', 'Risk Score']
+    alerts = Alert.objects.order_by('-created_at').values_list(
+        'created_at', 'severity', 'message', 'is_read',
+        'prediction__crop__name', 'prediction__pest__name', 'prediction__risk_score'
+    )
+    if limit is not None:
+        alerts = alerts[:limit]
+    for created_at, severity, message, is_read, crop_name, pest_name, risk_score in alerts.iterator(chunk_size=CHUNK_SIZE):
+        yield [
+            created_at,
+            severity,
+            message,
+            'Yes' if is_read else 'No',
+            crop_name or '-',
+            pest_name or '-',
+            risk_score if risk_score is not None else '-',
+        ]
+
+
+def all_data_members(full_history=False):
+    """CSV members of the complete data export"""
+    limit = None if full_history else RECENT_HISTORY_LIMIT
+    return [
+        ('predictions.csv', csv_member(prediction_rows())),
+        ('crops.csv', csv_member(crop_rows())),
+        ('pests.csv', csv_member(pest_rows())),
+        ('weather_data.csv', csv_member(weather_rows(limit))),
+        ('alerts.csv', csv_member(alert_rows(limit))),
+    ]
+
+
+# ===== Columnar (Parquet / Arrow IPC) export =====
+
+COLUMNAR_FORMATS = {
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+
+COLUMNAR_TABLE_NAMES = ['predictions', 'weather', 'infestations', 'alerts']
+
+
+def _columnar_tables():
+    """
+    Table name -> (queryset, [(column, field lookup, arrow type)])
+
+    Decimal columns keep the model's precision and scale so values round-trip
+    exactly; dates and timestamps are stored as native temporal types.
+    """
+    import pyarrow as pa
+
+    def decimal(field):
+        return pa.decimal128(field.max_digits, field.decimal_places)
+
+    def model_field(model, name):
+        return model._meta.get_field(name)
+
+    timestamp = pa.timestamp('us', tz='UTC')
+
+    return {
+        'predictions': (
+            RiskPrediction.objects.order_by('prediction_date', 'id'),
+            [
+                ('id', 'id', pa.int64()),
+                ('prediction_date', 'prediction_date', pa.date32()),
+                ('crop_id', 'crop_id', pa.int64()),
+                ('crop', 'crop__name', pa.string()),
+                ('pest_id', 'pest_id', pa.int64()),
+                ('pest', 'pest__name', pa.string()),
+                ('risk_score', 'risk_score', decimal(model_field(RiskPrediction, 'risk_score'))),
+                ('risk_level', 'risk_level', pa.string()),
+                ('confidence', 'confidence', decimal(model_field(RiskPrediction, 'confidence'))),
+                ('created_at', 'created_at', timestamp),
+            ],
+        ),
+        'weather': (
+            WeatherData.objects.order_by('date', 'location'),
+            [
+                ('date', 'date', pa.date32()),
+                ('location', 'location', pa.string()),
+                ('temperature_avg', 'temperature_avg', decimal(model_field(WeatherData, 'temperature_avg'))),
+                ('temperature_min', 'temperature_min', decimal(model_field(WeatherData, 'temperature_min'))),
+                ('temperature_max', 'temperature_max', decimal(model_field(WeatherData, 'temperature_max'))),
+                ('humidity', 'humidity', decimal(model_field(WeatherData, 'humidity'))),
+                ('rainfall', 'rainfall', decimal(model_field(WeatherData, 'rainfall'))),
+                ('wind_speed', 'wind_speed', decimal(model_field(WeatherData, 'wind_speed'))),
+                ('soil_moisture', 'soil_moisture', decimal(model_field(WeatherData, 'soil_moisture'))),
+            ],
+        ),
+        'infestations': (
+            InfestationRecord.objects.order_by('date', 'id'),
+            [
+                ('id', 'id', pa.int64()),
+                ('date', 'date', pa.date32()),
+                ('crop_id', 'crop_id', pa.int64()),
+                ('crop', 'crop__name', pa.string()),
+                ('pest_id', 'pest_id', pa.int64()),
+                ('pest', 'pest__name', pa.string()),
+                ('severity', 'severity', pa.int8()),
+                ('area_affected', 'area_affected', decimal(model_field(InfestationRecord, 'area_affected'))),
+                ('notes', 'notes', pa.string()),
+            ],
+        ),
+        'alerts': (
+            Alert.objects.order_by('created_at', 'id'),
+            [
+                ('id', 'id', pa.int64()),
+                ('created_at', 'created_at', timestamp),
+                ('severity', 'severity', pa.string()),
+                ('message', 'message', pa.string()),
+                ('is_read', 'is_read', pa.bool_()),
+                ('prediction_id', 'prediction_id', pa.int64()),
+                ('crop', 'prediction__crop__name', pa.string()),
+                ('pest', 'prediction__pest__name', pa.string()),
+                ('risk_score', 'prediction__risk_score', decimal(model_field(RiskPrediction, 'risk_score'))),
+            ],
+        ),
+    }
+
+
+def columnar_member(table, file_format='parquet', chunk_size=CHUNK_SIZE * 5):
+    """
+    Member writer that encodes one table as Parquet or Arrow IPC, both
+    zstd-compressed (Arrow readers older than 1.0 cannot read compressed IPC)
+
+    Rows are converted in chunks of chunk_size; each chunk becomes one
+    Parquet row group / Arrow record batch.
+    """
+    def write(fileobj):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        queryset, columns = _columnar_tables()[table]
+        schema = pa.schema([(name, arrow_type) for name, _, arrow_type in columns])
+        rows = queryset.values_list(*[lookup for _, lookup, _ in columns]).iterator(chunk_size=CHUNK_SIZE)
+
+        sink = pa.PythonFile(fileobj, mode='w')
+        if file_format == 'parquet':
+            writer = pq.ParquetWriter(sink, schema, compression='zstd')
+        else:
+            writer = pa.ipc.new_file(sink, schema, options=pa.ipc.IpcWriteOptions(compression='zstd'))
+
+        try:
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    writer.write_batch(_record_batch(chunk, schema))
+                    chunk = []
+                    yield
+            if chunk:
+                writer.write_batch(_record_batch(chunk, schema))
+        finally:
+            writer.close()
+        yield
+    return write
+
+
+def _record_batch(rows, schema):
+    import pyarrow as pa
+
+    columns = list(zip(*rows))
+    return pa.record_batch(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+def columnar_members(file_format='parquet'):
+    """Columnar members for the bulk export archive"""
+    extension = COLUMNAR_FORMATS[file_format]
+    return [
+        (f'{table}{extension}', columnar_member(table, file_format))
+        for table in COLUMNAR_TABLE_NAMES
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='riskprediction',
+            index=models.Index(fields=['-prediction_date', '-risk_score', '-id'], name='predictions_predict_8a7af0_idx'),
+        ),
+    ]
@@ -10,6 +10,18 @@ from sklearn.preprocessing import StandardScaler
 import pickle
 import os
 
+from weather import risk
+from weather.risk import score_weather
+from weather.climate import CLIMATE_FEATURES
+
+# Position of the CLIMATE_FEATURES columns in prepare_features() output
+CLIMATE_FEATURE_OFFSET = 18
+
+# Degree days over the recent window at which the rule-based score gives full
+# development-pressure points (about a week at 14 degrees above base)
+RECENT_DEGREE_DAYS_FULL = 100
+DEGREE_DAY_POINTS = 10
+
 
 class PestRiskPredictor:
     """
@@ -21,7 +33,7 @@ class PestRiskPredictor:
         self.scaler = StandardScaler()
         self.is_trained = False
         
-    def prepare_features(self, crop, pest, weather_data, historical_records=None):
+    def prepare_features(self, crop, pest, weather_data, historical_records=None, climate_features=None):
         """
         Extract and engineer features for prediction
         
@@ -31,20 +43,33 @@ class PestRiskPredictor:
         - Pest characteristics (type, severity level)
         - Historical infestation patterns
         - Seasonal factors
+        - Pest climate suitability and degree days (weather.climate), if given
         """
         features = []
         
-        # Weather features (most recent 7 days average)
-        if weather_data:
+        # Weather features (most recent 7 days average). weather_data is either
+        # a list of WeatherData rows or a rollup summary (weather.rollups).
+        if isinstance(weather_data, dict):
+            avg_temp = float(weather_data['avg_temp'])
+            avg_humidity = float(weather_data['avg_humidity'])
+            total_rainfall = float(weather_data['total_rainfall'])
+            avg_wind = float(weather_data['avg_wind_speed'])
+        elif weather_data:
             avg_temp = np.mean([w.temperature_avg for w in weather_data])
             avg_humidity = np.mean([w.humidity for w in weather_data])
             total_rainfall = np.sum([w.rainfall for w in weather_data])
             avg_wind = np.mean([w.wind_speed for w in weather_data])
-            
-            # Weather risk indicators
-            temp_risk = 1 if 20 <= avg_temp <= 30 else 0
-            humidity_risk = 1 if avg_humidity > 70 else 0
-            rainfall_risk = 1 if total_rainfall > 50 else 0
+        
+        if weather_data:
+            # Weather risk indicators: temperature and humidity against the
+            # pest's own climate profile, rainfall as in weather.risk
+            profile = pest.climate_profile
+            flags = int(score_weather(
+                avg_temp, avg_humidity, total_rainfall, rainfall_threshold=risk.WEEKLY_RAINFALL_RISK
+            ).flags)
+            temp_risk = 1 if profile['optimal_temp_min'] <= avg_temp <= profile['optimal_temp_max'] else 0
+            humidity_risk = 1 if avg_humidity > profile['humidity_threshold'] else 0
+            rainfall_risk = 1 if flags & risk.FLAG_RAINFALL else 0
         else:
             avg_temp = avg_humidity = total_rainfall = avg_wind = 0
             temp_risk = humidity_risk = rainfall_risk = 0
@@ -62,7 +87,7 @@ class PestRiskPredictor:
         }
         growth_stage_value = growth_stage_encoding.get(crop.growth_stage, 0)
         
-        crop_area = float(crop.area) if crop.area else 0
+        crop_area = float(crop.area_hectares) if crop.area_hectares else 0
         
         # Pest features
         pest_type_encoding = {
@@ -117,6 +142,9 @@ class PestRiskPredictor:
             is_summer,
         ]
         
+        climate_features = climate_features or {}
+        features.extend(climate_features.get(name, 0.0) for name in CLIMATE_FEATURES)
+        
         return np.array(features).reshape(1, -1)
     
     def train(self, training_data):
@@ -186,17 +214,28 @@ class PestRiskPredictor:
         pest_severity = features[11]
         recent_infestations = features[12]
         avg_historical_severity = features[13]
+        climate = dict(zip(CLIMATE_FEATURES, features[CLIMATE_FEATURE_OFFSET:]))
         
         # Calculate risk score based on rules
         risk_score = 0
         
-        # Weather contribution (40%)
-        if temp_risk:
-            risk_score += 15
-        if humidity_risk:
-            risk_score += 15
-        if rainfall_risk:
-            risk_score += 10
+        # Weather contribution (40%). With a daily series, the share of days
+        # suiting this pest replaces the weekly-average flags, and leaf
+        # wetness counts like rain.
+        if any(climate.values()):
+            risk_score += 15 * climate['temp_suitable_ratio']
+            risk_score += 15 * climate['humidity_suitable_ratio']
+            risk_score += 10 * max(rainfall_risk, climate['leaf_wetness_ratio'])
+            
+            # Development pressure from degree days above the pest's base temperature
+            risk_score += DEGREE_DAY_POINTS * min(1, climate['gdd_recent'] / RECENT_DEGREE_DAYS_FULL)
+        else:
+            if temp_risk:
+                risk_score += 15
+            if humidity_risk:
+                risk_score += 15
+            if rainfall_risk:
+                risk_score += 10
         
         # Pest severity contribution (30%)
         risk_score += pest_severity * 7.5
@@ -209,8 +248,9 @@ class PestRiskPredictor:
         # Ensure within bounds
         risk_score = max(0, min(100, risk_score))
         
-        # Confidence is lower for rule-based predictions
-        confidence = 65
+        # Confidence is lower for rule-based predictions, and for weather
+        # that was mostly gap-filled
+        confidence = 65 - 10 * climate.get('imputed_ratio', 0)
         
         return risk_score, confidence
     
@@ -265,22 +305,43 @@ def generate_predictions_for_all_crops():
     Generate risk predictions for all active crops and known pests
     """
     from crops.models import Crop, Pest, InfestationRecord
-    from weather.models import WeatherData
+    from weather.rollups import window_summary, window_summary_by_location
+    from weather.climate import MAX_SEASON_DAYS, load_climate_series, pest_climate_features
     from predictions.models import RiskPrediction
     
     predictor = PestRiskPredictor()
     
-    # Get recent weather data (last 7 days)
-    last_week = timezone.now().date() - timedelta(days=7)
-    recent_weather = list(WeatherData.objects.filter(date__gte=last_week).order_by('-date'))
+    # Recent weather (last 7 days) from rollups, per crop location with the
+    # all-location summary as fallback
+    today = timezone.now().date()
+    last_week = today - timedelta(days=7)
+    weather_by_location = window_summary_by_location(last_week, today)
+    recent_weather = window_summary(last_week, today)
     
     # Get all active crops
     crops = Crop.objects.all()
     pests = Pest.objects.all()
     
+    # Gap-filled daily series per crop location over the last season, loaded
+    # once; each crop/pest pair reads its degree days from running sums
+    season_start = today - timedelta(days=MAX_SEASON_DAYS)
+    climate_series = load_climate_series(
+        season_start, today,
+        location_ids={crop.location_ref_id for crop in crops if crop.location_ref_id},
+    )
+    
     predictions_created = 0
     
     for crop in crops:
+        # Prefer the gap-filled series so missing days don't shrink the
+        # rainfall total; fall back to the rollup summaries
+        series = climate_series.get(crop.location_ref_id)
+        crop_weather = (
+            (series.summary(last_week, today) if series else None)
+            or weather_by_location.get(crop.location_ref_id)
+            or recent_weather
+        )
+        
         for pest in pests:
             # Get historical records for this crop-pest combination
             historical_records = list(InfestationRecord.objects.filter(
@@ -292,8 +353,15 @@ def generate_predictions_for_all_crops():
             features = predictor.prepare_features(
                 crop=crop,
                 pest=pest,
-                weather_data=recent_weather,
-                historical_records=historical_records
+                weather_data=crop_weather,
+                historical_records=historical_records,
+                climate_features=pest_climate_features(
+                    series,
+                    pest.climate_profile,
+                    crop.planting_date,
+                    last_week,
+                    today,
+                ),
             )
             
             # Predict
@@ -302,7 +370,6 @@ def generate_predictions_for_all_crops():
             # Only create prediction if risk is significant or there's historical data
             if risk_score > 20 or historical_records:
                 # Check if prediction already exists for today
-                today = timezone.now().date()
                 existing = RiskPrediction.objects.filter(
                     crop=crop,
                     pest=pest,
@@ -322,7 +389,9 @@ def generate_predictions_for_all_crops():
                         risk_score=risk_score,
                         confidence=confidence,
                         prediction_date=today,
-                        contributing_factors=f"Weather conditions, historical patterns, crop stage: {crop.growth_stage}"
+                        factors={
+                            'summary': f"Weather conditions, historical patterns, crop stage: {crop.growth_stage}"
+                        }
                     )
                     predictions_created += 1
     
@@ -32,6 +32,9 @@ class RiskPrediction(models.Model):
     
     class Meta:
         ordering = ['-prediction_date', '-risk_score']
+        indexes = [
+            models.Index(fields=['-prediction_date', '-risk_score', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.pest.name} on {self.crop.name} - {self.risk_level} ({self.risk_score}%)"
@@ -1,3 +1,182 @@
+import csv
+import io
+import zipfile
+from datetime import date, timedelta
+from unittest import mock
+
 from django.test import TestCase
+from django.urls import reverse
+
+from alerts.models import Alert, PreventiveMeasure
+from crops.models import Crop, Pest, InfestationRecord
+from weather.climate import ClimateSeries, pest_climate_features
+from weather.models import WeatherData
+from .ml_engine import PestRiskPredictor
+from .models import RiskPrediction
+
+
+class PredictionDetailQueryCountTests(TestCase):
+    """The prediction page issues a fixed number of queries however many related rows exist"""
+
+    @classmethod
+    def setUpTestData(cls):
+        crop = Crop.objects.create(
+            name='Cotton', crop_type='OTHER', growth_stage='FLOWERING',
+            planting_date=date(2026, 6, 1), field_location='Guntur, Andhra Pradesh',
+        )
+        cls.pest = Pest.objects.create(name='Pink Bollworm', pest_type='INSECT', description='-', severity_level='HIGH')
+        cls.prediction = RiskPrediction.objects.create(
+            crop=crop, pest=cls.pest, risk_score=82, risk_level='HIGH', prediction_date=date(2026, 8, 1),
+        )
+
+    def add_related(self, count):
+        for i in range(count):
+            InfestationRecord.objects.create(
+                crop=self.prediction.crop, pest=self.pest, date=date(2026, 7, 1 + i), severity=3, area_affected=1,
+            )
+            PreventiveMeasure.objects.create(pest=self.pest, action=f'Measure {i}', description='-', effectiveness='MEDIUM')
+
+    def test_prediction_detail(self):
+        url = reverse('predictions:prediction_detail', args=[self.prediction.pk])
+        self.add_related(1)
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+        self.add_related(10)
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['historical_records']), 10)
+        self.assertContains(response, 'Pink Bollworm')
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        crop = Crop.objects.create(
+            name='Cotton', crop_type='OTHER', growth_stage='FLOWERING',
+            planting_date=date(2026, 6, 1), field_location='Guntur, Andhra Pradesh',
+        )
+        pests = [
+            Pest.objects.create(name=name, pest_type='INSECT', description='-', severity_level='HIGH')
+            for name in ['Pink Bollworm', 'Whitefly']
+        ]
+        cls.predictions = [
+            RiskPrediction.objects.create(
+                crop=crop, pest=pest, risk_score=score, risk_level=level, confidence=80, prediction_date=date(2026, 8, 1),
+            )
+            for pest, score, level in [(pests[0], 82.5, 'HIGH'), (pests[1], 35, 'MEDIUM')]
+        ]
+        Alert.objects.create(prediction=cls.predictions[0], severity='CRITICAL', message='High risk')
+        InfestationRecord.objects.create(crop=crop, pest=pests[0], date=date(2026, 7, 1), severity=3, area_affected=1)
+        for day in range(60):
+            WeatherData.objects.create(
+                date=date(2026, 6, 1) + timedelta(days=day), location='Guntur, Andhra Pradesh',
+                temperature_avg=28, temperature_min=22, temperature_max=34, humidity=75, rainfall=day % 3, wind_speed=4,
+            )
+
+    def test_predictions_csv(self):
+        RiskPrediction.objects.filter(pk=self.predictions[0].pk).update(factors={'temperature': 'optimal', 'humidity': 'high'})
+
+        response = self.client.get(reverse('predictions:export_predictions_csv'))
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows, [
+            [
+                'Prediction Date', 'Crop Name', 'Crop Type', 'Growth Stage', 'Pest/Disease Name', 'Pest Type',
+                'Risk Score (%)', 'Risk Level', 'Confidence (%)', 'Contributing Factors',
+            ],
+            [
+                '2026-08-01', 'Cotton', 'Other', 'Flowering', 'Pink Bollworm', 'Insect',
+                '82.50', 'High Risk (67-100)', '80.00', 'temperature: optimal; humidity: high',
+            ],
+            ['2026-08-01', 'Cotton', 'Other', 'Flowering', 'Whitefly', 'Insect', '35.00', 'Medium Risk (34-66)', '80.00', '-'],
+        ])
+
+        response = self.client.get(reverse('predictions:export_predictions_csv'), {'risk_level': 'MEDIUM'})
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row[4] for row in rows[1:]], ['Whitefly'])
+
+    def read_csv_archive(self, params=None):
+        response = self.client.get(reverse('predictions:export_all_data'), params or {})
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        return {
+            name: list(csv.reader(io.StringIO(archive.read(name).decode('utf-8'))))
+            for name in archive.namelist()
+        }
+
+    def test_all_data_archive(self):
+        members = self.read_csv_archive()
+        self.assertEqual(
+            {name: len(rows) - 1 for name, rows in members.items()},
+            {'predictions.csv': 2, 'crops.csv': 1, 'pests.csv': 2, 'weather_data.csv': 60, 'alerts.csv': 1},
+        )
+        self.assertEqual(members['predictions.csv'], [
+            ['Date', 'Crop', 'Pest', 'Risk Score', 'Risk Level', 'Confidence'],
+            ['2026-08-01', 'Cotton', 'Pink Bollworm', '82.50', 'HIGH', '80.00'],
+            ['2026-08-01', 'Cotton', 'Whitefly', '35.00', 'MEDIUM', '80.00'],
+        ])
+        self.assertEqual(members['weather_data.csv'][1][:2], ['2026-07-30', 'Guntur, Andhra Pradesh'])
+        self.assertEqual(members['alerts.csv'][1][1:], ['CRITICAL', 'High risk', 'No', 'Cotton', 'Pink Bollworm', '82.50'])
+
+    @mock.patch('predictions.exports.RECENT_HISTORY_LIMIT', 10)
+    def test_all_data_archive_history_limit(self):
+        self.assertEqual(len(self.read_csv_archive()['weather_data.csv']) - 1, 10)
+        self.assertEqual(len(self.read_csv_archive({'full': '1'})['weather_data.csv']) - 1, 60)
+
+    def test_columnar_archives(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        expected = {'predictions': 2, 'weather': 60, 'infestations': 1, 'alerts': 1}
+        for file_format, extension in [('parquet', '.parquet'), ('arrow', '.arrow')]:
+            response = self.client.get(reverse('predictions:export_columnar'), {'format': file_format})
+            archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+            self.assertEqual(archive.namelist(), [f'{table}{extension}' for table in expected])
+
+            for table, rows in expected.items():
+                data = archive.read(f'{table}{extension}')
+                if file_format == 'parquet':
+                    self.assertEqual(pq.read_table(io.BytesIO(data)).num_rows, rows)
+                else:
+                    self.assertEqual(pa.ipc.open_file(pa.BufferReader(data)).read_all().num_rows, rows)
+
+            if file_format == 'arrow':
+                # Record batches are zstd-compressed, not stored raw
+                weather = pa.ipc.open_file(pa.BufferReader(archive.read('weather.arrow'))).read_all()
+                raw = pa.BufferOutputStream()
+                with pa.ipc.new_file(raw, weather.schema) as writer:
+                    writer.write_table(weather)
+                self.assertLess(len(archive.read('weather.arrow')), raw.getvalue().size)
+
+
+class RuleBasedPredictionTests(TestCase):
+    def test_pest_profiles_change_the_score(self):
+        crop = Crop(name='Wheat', crop_type='CEREAL', growth_stage='FLOWERING', planting_date=date(2026, 11, 1))
+        # Same optimal range and humidity threshold; only the degree-day base
+        # and leaf-wetness humidity differ
+        profile = {'optimal_temp_min': 15, 'optimal_temp_max': 25, 'humidity_threshold': 80}
+        warm_loving = Pest(name='A', pest_type='FUNGAL', severity_level='HIGH', base_temperature=15, leaf_wetness_humidity=99, **profile)
+        cool_tolerant = Pest(name='B', pest_type='FUNGAL', severity_level='HIGH', base_temperature=5, leaf_wetness_humidity=85, **profile)
+
+        end = date(2026, 12, 8)
+        start = end - timedelta(days=7)
+        days = [start + timedelta(days=i) for i in range(8)]
+        series = ClimateSeries(days, [18] * 8, [14] * 8, [22] * 8, [90] * 8, [0] * 8)
+        weather = series.summary(start, end)
+
+        predictor = PestRiskPredictor()
+        scores = {}
+        for pest in [warm_loving, cool_tolerant]:
+            climate = pest_climate_features(series, pest.climate_profile, crop.planting_date, start, end)
+            features = predictor.prepare_features(crop, pest, weather, climate_features=climate)
+            scores[pest.name], _ = predictor.predict(features)
+
+            # Without a daily series the weekly-average rules apply
+            self.assertEqual(predictor.predict(predictor.prepare_features(crop, pest, weather))[0], 52.5)
 
-# Create your tests here.
+        # Both: every day suitable (30) and HIGH severity (22.5). A: 24 degree
+        # days, leaves never wet. B: wet leaves (10), 104 degree days (capped).
+        self.assertAlmostEqual(scores['A'], 30 + 2.4 + 22.5)
+        self.assertAlmostEqual(scores['B'], 30 + 10 + 10 + 22.5)
@@ -10,4 +10,5 @@ urlpatterns = [
     path('analytics/', views.prediction_analytics, name='prediction_analytics'),
     path('export/csv/', views.export_predictions_csv, name='export_predictions_csv'),
     path('export/all/', views.export_all_data_csv, name='export_all_data'),
+    path('export/columnar/', views.export_columnar, name='export_columnar'),
 ]
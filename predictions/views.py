@@ -4,6 +4,7 @@ from django.db.models import Count, Q
 from .models import RiskPrediction
 from .ml_engine import generate_predictions_for_all_crops
 from crops.models import Crop, Pest
+from pest_prediction.pagination import keyset_paginate
 
 
 def prediction_list(request):
@@ -14,7 +15,7 @@ def prediction_list(request):
     pest_id = request.GET.get('pest', '')
     
     # Base query
-    predictions = RiskPrediction.objects.all().select_related('crop', 'pest').order_by('-prediction_date', '-risk_score')
+    predictions = RiskPrediction.objects.all().select_related('crop', 'pest')
     
     # Apply filters
     if risk_level:
@@ -28,16 +29,19 @@ def prediction_list(request):
     crops = Crop.objects.all()
     pests = Pest.objects.all()
     
-    # Get statistics
-    stats = {
-        'total': predictions.count(),
-        'high_risk': predictions.filter(risk_level='HIGH').count(),
-        'medium_risk': predictions.filter(risk_level='MEDIUM').count(),
-        'low_risk': predictions.filter(risk_level='LOW').count(),
-    }
+    # Get statistics (one query)
+    stats = predictions.order_by().aggregate(
+        total=Count('id'),
+        high_risk=Count('id', filter=Q(risk_level='HIGH')),
+        medium_risk=Count('id', filter=Q(risk_level='MEDIUM')),
+        low_risk=Count('id', filter=Q(risk_level='LOW')),
+    )
+    
+    # One page, continuing after the last row of the previous one
+    page = keyset_paginate(request, predictions, ['-prediction_date', '-risk_score', '-id'])
     
     context = {
-        'predictions': predictions[:50],  # Limit to 50 for performance
+        'predictions': page,
         'crops': crops,
         'pests': pests,
         'risk_level': risk_level,
@@ -116,26 +120,27 @@ def prediction_detail(request, pk):
     """View detailed prediction information"""
     from django.shortcuts import get_object_or_404
     
-    prediction = get_object_or_404(RiskPrediction, pk=pk)
+    prediction = get_object_or_404(RiskPrediction.objects.select_related('crop', 'pest'), pk=pk)
     
     # Get related historical data
     from crops.models import InfestationRecord
     historical_records = InfestationRecord.objects.filter(
-        crop=prediction.crop,
-        pest=prediction.pest
+        crop_id=prediction.crop_id,
+        pest_id=prediction.pest_id
     ).order_by('-date')[:10]
     
-    # Get recent weather data
+    # Get recent weather data, scored in one call for the risk badges
     from weather.models import WeatherData
+    from weather.risk import annotate_risk
     from datetime import timedelta
     from django.utils import timezone
     
     last_week = timezone.now().date() - timedelta(days=7)
-    recent_weather = WeatherData.objects.filter(date__gte=last_week).order_by('-date')[:7]
+    recent_weather = annotate_risk(WeatherData.objects.filter(date__gte=last_week).order_by('-date')[:7])
     
     # Get preventive measures
     from alerts.models import PreventiveMeasure
-    preventive_measures = PreventiveMeasure.objects.filter(pest=prediction.pest)
+    preventive_measures = PreventiveMeasure.objects.filter(pest_id=prediction.pest_id)
     
     context = {
         'prediction': prediction,
@@ -170,14 +175,16 @@ def prediction_analytics(request):
         count=Count('id')
     ).order_by('-count')[:5]
     
-    # Daily trend
+    # Daily trend, counted in one grouped query
+    high_risk_by_date = dict(predictions.filter(risk_level='HIGH').order_by().values(
+        'prediction_date'
+    ).annotate(count=Count('id')).values_list('prediction_date', 'count'))
     daily_trend = []
     for i in range(30, -1, -1):
         date = timezone.now().date() - timedelta(days=i)
-        high_risk = predictions.filter(prediction_date=date, risk_level='HIGH').count()
         daily_trend.append({
             'date': date.strftime('%b %d'),
-            'count': high_risk
+            'count': high_risk_by_date.get(date, 0)
         })
     
     # Average confidence by risk level
@@ -196,10 +203,30 @@ def prediction_analytics(request):
     return render(request, 'predictions/analytics.html', context)
 
 
+class Echo:
+    """Pseudo-buffer whose write() hands the row back for streaming"""
+    def write(self, value):
+        return value
+
+
+def _format_factors(factors):
+    """Flatten the factors JSON into a single CSV cell"""
+    if not factors:
+        return '-'
+    if isinstance(factors, dict):
+        return '; '.join(f'{key}: {value}' for key, value in factors.items())
+    return str(factors)
+
+
 def export_predictions_csv(request):
-    """Export predictions to CSV"""
+    """
+    Export predictions to CSV
+
+    Streams rows straight from a values-only cursor so memory stays flat
+    regardless of how many predictions are exported.
+    """
     import csv
-    from django.http import HttpResponse
+    from django.http import StreamingHttpResponse
     from datetime import datetime
     
     # Get filter parameters (same as list view)
@@ -208,7 +235,7 @@ def export_predictions_csv(request):
     pest_id = request.GET.get('pest', '')
     
     # Base query
-    predictions = RiskPrediction.objects.all().select_related('crop', 'pest').order_by('-prediction_date', '-risk_score')
+    predictions = RiskPrediction.objects.order_by('-prediction_date', '-risk_score')
     
     # Apply filters
     if risk_level:
@@ -218,147 +245,123 @@ def export_predictions_csv(request):
     if pest_id:
         predictions = predictions.filter(pest_id=pest_id)
     
-    # Create CSV response
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="predictions_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow([
-        'Prediction Date',
-        'Crop Name',
-        'Crop Type',
-        'Growth Stage',
-        'Pest/Disease Name',
-        'Pest Type',
-        'Risk Score (%)',
-        'Risk Level',
-        'Confidence (%)',
-        'Contributing Factors'
-    ])
-    
-    for pred in predictions:
-        writer.writerow([
-            pred.prediction_date.strftime('%Y-%m-%d'),
-            pred.crop.name,
-            pred.crop.get_crop_type_display(),
-            pred.crop.get_growth_stage_display(),
-            pred.pest.name,
-            pred.pest.get_pest_type_display(),
-            pred.risk_score,
-            pred.get_risk_level_display(),
-            pred.confidence,
-            pred.contributing_factors or '-'
+    rows = predictions.values_list(
+        'prediction_date',
+        'crop__name',
+        'crop__crop_type',
+        'crop__growth_stage',
+        'pest__name',
+        'pest__pest_type',
+        'risk_score',
+        'risk_level',
+        'confidence',
+        'factors',
+    ).iterator(chunk_size=2000)
+    
+    # Choice labels resolved without instantiating models
+    crop_types = dict(Crop.CROP_TYPES)
+    growth_stages = dict(Crop.GROWTH_STAGES)
+    pest_types = dict(Pest.PEST_TYPES)
+    risk_levels = dict(RiskPrediction.RISK_LEVELS)
+    
+    def generate_rows():
+        writer = csv.writer(Echo())
+        yield writer.writerow([
+            'Prediction Date',
+            'Crop Name',
+            'Crop Type',
+            'Growth Stage',
+            'Pest/Disease Name',
+            'Pest Type',
+            'Risk Score (%)',
+            'Risk Level',
+            'Confidence (%)',
+            'Contributing Factors'
         ])
+        for (prediction_date, crop_name, crop_type, growth_stage, pest_name,
+                pest_type, risk_score, level, confidence, factors) in rows:
+            yield writer.writerow([
+                prediction_date.strftime('%Y-%m-%d'),
+                crop_name,
+                crop_types.get(crop_type, crop_type),
+                growth_stages.get(growth_stage, growth_stage),
+                pest_name,
+                pest_types.get(pest_type, pest_type),
+                risk_score,
+                risk_levels.get(level, level),
+                confidence,
+                _format_factors(factors)
+            ])
+    
+    response = StreamingHttpResponse(generate_rows(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="predictions_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
     
     return response
 
 
 def export_all_data_csv(request):
-    """Export comprehensive data including crops, pests, weather, and predictions"""
-    import csv
-    from django.http import HttpResponse
+    """
+    Export comprehensive data including crops, pests, weather, and predictions
+
+    The ZIP archive is streamed member by member. Weather and alerts are
+    limited to the latest records unless ?full=1 is passed.
+    """
+    from django.http import StreamingHttpResponse
     from datetime import datetime
-    import zipfile
-    import io
-    
-    # Create in-memory ZIP file
-    zip_buffer = io.BytesIO()
+    from .exports import stream_zip, all_data_members
     
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # 1. Export Predictions
-        pred_buffer = io.StringIO()
-        pred_writer = csv.writer(pred_buffer)
-        pred_writer.writerow(['Date', 'Crop', 'Pest', 'Risk Score', 'Risk Level', 'Confidence'])
-        
-        predictions = RiskPrediction.objects.all().select_related('crop', 'pest')
-        for pred in predictions:
-            pred_writer.writerow([
-                pred.prediction_date,
-                pred.crop.name,
-                pred.pest.name,
-                pred.risk_score,
-                pred.risk_level,
-                pred.confidence
-            ])
-        zip_file.writestr('predictions.csv', pred_buffer.getvalue())
-        
-        # 2. Export Crops
-        crop_buffer = io.StringIO()
-        crop_writer = csv.writer(crop_buffer)
-        crop_writer.writerow(['Name', 'Type', 'Growth Stage', 'Planting Date', 'Area (hectares)', 'Location'])
-        
-        crops = Crop.objects.all()
-        for crop in crops:
-            crop_writer.writerow([
-                crop.name,
-                crop.get_crop_type_display(),
-                crop.get_growth_stage_display(),
-                crop.planting_date,
-                crop.area_hectares,
-                crop.field_location
-            ])
-        zip_file.writestr('crops.csv', crop_buffer.getvalue())
-        
-        # 3. Export Pests
-        pest_buffer = io.StringIO()
-        pest_writer = csv.writer(pest_buffer)
-        pest_writer.writerow(['Name', 'Type', 'Description', 'Severity', 'Affected Crops'])
-        
-        pests = Pest.objects.all()
-        for pest in pests:
-            affected_crops_list = ', '.join([c.name for c in pest.affected_crops.all()])
-            pest_writer.writerow([
-                pest.name,
-                pest.get_pest_type_display(),
-                pest.description[:200] if pest.description else '',
-                pest.get_severity_level_display(),
-                affected_crops_list
-            ])
-        zip_file.writestr('pests.csv', pest_buffer.getvalue())
-        
-        # 4. Export Weather Data
-        from weather.models import WeatherData
-        weather_buffer = io.StringIO()
-        weather_writer = csv.writer(weather_buffer)
-        weather_writer.writerow(['Date', 'Location', 'Temp Min', 'Temp Max', 'Temp Avg', 'Humidity', 'Rainfall', 'Wind Speed'])
-        
-        weather_data = WeatherData.objects.all().order_by('-date')[:100]  # Last 100 records
-        for weather in weather_data:
-            weather_writer.writerow([
-                weather.date,
-                weather.location,
-                weather.temperature_min,
-                weather.temperature_max,
-                weather.temperature_avg,
-                weather.humidity,
-                weather.rainfall,
-                weather.wind_speed
-            ])
-        zip_file.writestr('weather_data.csv', weather_buffer.getvalue())
-        
-        # 5. Export Alerts
-        from alerts.models import Alert
-        alert_buffer = io.StringIO()
-        alert_writer = csv.writer(alert_buffer)
-        alert_writer.writerow(['Created', 'Severity', 'Message', 'Is Read', 'Crop', 'Pest', 'Risk Score'])
-        
-        alerts = Alert.objects.all().select_related('prediction__crop', 'prediction__pest').order_by('-created_at')[:100]
-        for alert in alerts:
-            alert_writer.writerow([
-                alert.created_at,
-                alert.severity,
-                alert.message,
-                'Yes' if alert.is_read else 'No',
-                alert.prediction.crop.name if alert.prediction else '-',
-                alert.prediction.pest.name if alert.prediction else '-',
-                alert.prediction.risk_score if alert.prediction else '-'
-            ])
-        zip_file.writestr('alerts.csv', alert_buffer.getvalue())
+    full_history = request.GET.get('full') == '1'
     
-    # Prepare response
-    zip_buffer.seek(0)
-    response = HttpResponse(zip_buffer.getvalue(), content_type='application/zip')
+    response = StreamingHttpResponse(
+        stream_zip(all_data_members(full_history=full_history)),
+        content_type='application/zip'
+    )
     response['Content-Disposition'] = f'attachment; filename="pest_prediction_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip"'
     
     return response
 
+
+def export_columnar(request):
+    """
+    Export predictions, weather, infestations and alerts as typed columnar files
+
+    ?format=parquet (default) or arrow; ?table=<name> returns a single table
+    instead of a ZIP of all four.
+    """
+    import zipfile
+    from django.http import StreamingHttpResponse
+    from datetime import datetime
+    from .exports import (
+        COLUMNAR_FORMATS, COLUMNAR_TABLE_NAMES,
+        columnar_member, columnar_members, stream_file, stream_zip,
+    )
+    
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        messages.error(request, 'Columnar export requires the pyarrow package.')
+        return redirect('predictions:prediction_list')
+    
+    file_format = request.GET.get('format', 'parquet')
+    table = request.GET.get('table', '')
+    if file_format not in COLUMNAR_FORMATS or (table and table not in COLUMNAR_TABLE_NAMES):
+        messages.error(request, 'Unknown export format or table.')
+        return redirect('predictions:prediction_list')
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if table:
+        response = StreamingHttpResponse(
+            stream_file(columnar_member(table, file_format)),
+            content_type='application/vnd.apache.parquet' if file_format == 'parquet' else 'application/vnd.apache.arrow.file'
+        )
+        filename = f'{table}_{timestamp}{COLUMNAR_FORMATS[file_format]}'
+    else:
+        # Both formats are written zstd-compressed; deflating them again gains little
+        response = StreamingHttpResponse(
+            stream_zip(columnar_members(file_format), compression=zipfile.ZIP_STORED),
+            content_type='application/zip'
+        )
+        filename = f'pest_prediction_data_{file_format}_{timestamp}.zip'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    
+    return response
@@ -5,16 +5,16 @@ from alerts.models import Alert
 
 def risk_assessment_report(request):
     """Generate risk assessment report"""
-    predictions = RiskPrediction.objects.all().select_related('crop', 'pest').order_by('-risk_score')[:50]
-    high_risk = predictions.filter(risk_level='HIGH')
-    medium_risk = predictions.filter(risk_level='MEDIUM')
-    low_risk = predictions.filter(risk_level='LOW')
+    predictions = list(RiskPrediction.objects.all().select_related('crop', 'pest').order_by('-risk_score')[:50])
+    high_risk = [prediction for prediction in predictions if prediction.risk_level == 'HIGH']
+    medium_risk = [prediction for prediction in predictions if prediction.risk_level == 'MEDIUM']
+    low_risk = [prediction for prediction in predictions if prediction.risk_level == 'LOW']
     
     context = {
         'predictions': predictions,
         'high_risk': high_risk,
         'medium_risk': medium_risk,
         'low_risk': low_risk,
-        'total_predictions': predictions.count(),
+        'total_predictions': len(predictions),
     }
     return render(request, 'reports/risk_assessment.html', context)
@@ -4,24 +4,48 @@
 function updateAlertCount() {
   fetch('/alerts/api/unread-count/')
     .then(response => response.json())
-    .then(data => {
-      const badge = document.getElementById('alert-count');
-      if (badge) {
-        badge.textContent = data.count || 0;
-        if (data.count > 0) {
-          badge.style.display = 'inline-flex';
-        } else {
-          badge.style.display = 'none';
-        }
-      }
-    })
+    .then(data => setAlertBadge(data.count))
     .catch(error => console.error('Error fetching alert count:', error));
 }
 
+function setAlertBadge(count) {
+  const badge = document.getElementById('alert-count');
+  if (badge) {
+    badge.textContent = count || 0;
+    badge.style.display = count > 0 ? 'inline-flex' : 'none';
+  }
+}
+
+// ===== Live Alert Stream =====
+// Server-sent events push new alerts and unread counts; falls back to
+// polling when the stream is unavailable (e.g. running under WSGI).
+const ALERT_POLL_INTERVAL = 30000;
+
+function startAlertStream() {
+  if (typeof EventSource === 'undefined') {
+    setInterval(updateAlertCount, ALERT_POLL_INTERVAL);
+    return;
+  }
+
+  const source = new EventSource('/alerts/api/stream/');
+  source.addEventListener('unread_count', event => {
+    setAlertBadge(JSON.parse(event.data).count);
+  });
+  source.addEventListener('alert', event => {
+    document.dispatchEvent(new CustomEvent('pest-alert', { detail: JSON.parse(event.data) }));
+  });
+  source.onerror = () => {
+    if (source.readyState === EventSource.CLOSED) {
+      setInterval(updateAlertCount, ALERT_POLL_INTERVAL);
+    }
+  };
+}
+
 // ===== Auto-dismiss alerts =====
 document.addEventListener('DOMContentLoaded', function () {
-  // Update alert count on page load
+  // Update alert count on page load, then follow the live stream
   updateAlertCount();
+  startAlertStream();
 
   // Auto-dismiss success messages after 5 seconds
   const alerts = document.querySelectorAll('.alert-success');
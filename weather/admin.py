@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import WeatherData
+from .models import WeatherData, Location, ObservationBlock
 
 
 @admin.register(WeatherData)
@@ -13,3 +13,19 @@ class WeatherDataAdmin(admin.ModelAdmin):
         if obj:  # Editing an existing object
             return ['created_at', 'updated_at']
         return []
+
+
+@admin.register(Location)
+class LocationAdmin(admin.ModelAdmin):
+    list_display = ['name', 'region', 'latitude', 'longitude']
+    list_filter = ['region']
+    search_fields = ['name', 'region']
+
+
+@admin.register(ObservationBlock)
+class ObservationBlockAdmin(admin.ModelAdmin):
+    list_display = ['location', 'date', 'count', 'updated_at']
+    list_filter = ['location']
+    date_hierarchy = 'date'
+    exclude = ['data']
+    readonly_fields = ['location', 'date', 'count', 'updated_at']
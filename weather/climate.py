@@ -0,0 +1,199 @@
+"""
+Pest climate suitability and growing-degree-day accumulation
+
+The daily series of every location are loaded with one query and missing
+days are filled (see weather.gapfill). Degree days are accumulated once per
+location and base temperature as a running (prefix) sum, so the accumulation
+since any planting date - or over any window - is a difference of two
+entries rather than another pass over the season.
+"""
+from datetime import timedelta
+
+import numpy as np
+
+from .gapfill import MISSING, fill_network, neighbour_order
+from .models import Location, WeatherData
+
+SERIES_FIELDS = [
+    'temperature_avg', 'temperature_min', 'temperature_max',
+    'humidity', 'rainfall', 'wind_speed',
+]
+
+# Rain on a day (mm) above which leaves count as wet regardless of humidity
+LEAF_WETNESS_RAINFALL = 1
+
+# Longest accumulation considered, so perennial crops stay bounded
+MAX_SEASON_DAYS = 365
+
+# Columns appended to the prediction features, in this order
+CLIMATE_FEATURES = [
+    'gdd_since_planting',
+    'gdd_recent',
+    'temp_suitable_ratio',
+    'humidity_suitable_ratio',
+    'leaf_wetness_ratio',
+    'imputed_ratio',
+]
+
+
+class ClimateSeries:
+    """
+    Daily weather of one location as arrays ordered by date
+
+    imputed holds the weather.gapfill flags of each day (0 = observed).
+    """
+
+    def __init__(self, dates, temperature_avg, temperature_min, temperature_max,
+                 humidity, rainfall, wind_speed=None, imputed=None):
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        self.temperature_avg = np.asarray(temperature_avg, dtype=np.float64)
+        # Days without min/max fall back to the average
+        self.temperature_min = np.where(
+            np.isnan(temperature_min), self.temperature_avg, temperature_min
+        )
+        self.temperature_max = np.where(
+            np.isnan(temperature_max), self.temperature_avg, temperature_max
+        )
+        self.humidity = np.asarray(humidity, dtype=np.float64)
+        self.rainfall = np.asarray(rainfall, dtype=np.float64)
+        self.wind_speed = (
+            np.zeros(len(self.dates)) if wind_speed is None else np.asarray(wind_speed, dtype=np.float64)
+        )
+        self.imputed = (
+            np.zeros(len(self.dates), dtype=np.uint8) if imputed is None else np.asarray(imputed, dtype=np.uint8)
+        )
+        self._cumulative = {}
+
+    def __len__(self):
+        return len(self.dates)
+
+    def index(self, day):
+        """Position of the first reading on or after day"""
+        return int(np.searchsorted(self.dates, np.datetime64(day, 'D')))
+
+    def cumulative_degree_days(self, base_temperature):
+        """
+        Running sum of daily degree days, with a leading zero
+
+        Daily degree days use the averaging method:
+        max(0, (Tmin + Tmax) / 2 - base). Cached per base temperature.
+        """
+        if base_temperature not in self._cumulative:
+            daily = np.maximum((self.temperature_min + self.temperature_max) / 2 - base_temperature, 0)
+            self._cumulative[base_temperature] = np.concatenate(([0.0], np.cumsum(daily)))
+        return self._cumulative[base_temperature]
+
+    def degree_days(self, base_temperature, start, end):
+        """Degree days accumulated from start to end (inclusive)"""
+        if start > end:
+            return 0.0
+        cumulative = self.cumulative_degree_days(base_temperature)
+        return float(cumulative[self.index(end + timedelta(days=1))] - cumulative[self.index(start)])
+
+    def window(self, start, end):
+        return slice(self.index(start), self.index(end + timedelta(days=1)))
+
+    def summary(self, start, end):
+        """
+        Weather summary over start..end in the shape of weather.rollups
+
+        Imputed days count like observed ones, so a station that missed days
+        no longer reports less rainfall. None if the window has no days.
+        """
+        window = self.window(start, end)
+        days = len(self.dates[window])
+        if not days:
+            return None
+        return {
+            'readings': days,
+            'avg_temp': float(self.temperature_avg[window].mean()),
+            'avg_humidity': float(self.humidity[window].mean()),
+            'total_rainfall': float(self.rainfall[window].sum()),
+            'avg_wind_speed': float(self.wind_speed[window].mean()),
+            'imputed_days': int(np.count_nonzero(self.imputed[window])),
+        }
+
+
+def load_climate_series(start, end, location_ids=None, fill_gaps=True):
+    """
+    Daily series from start to end for each location, keyed by location id
+
+    One query builds (location x day) grids; missing days are then filled
+    for all locations at once. Days that could not be filled are left out.
+    """
+    rows = WeatherData.objects.filter(
+        location_ref__isnull=False, date__gte=start, date__lte=end
+    )
+    if location_ids is not None:
+        rows = rows.filter(location_ref_id__in=location_ids)
+    rows = list(rows.order_by().values_list('location_ref_id', 'date', *SERIES_FIELDS))
+    if not rows:
+        return {}
+
+    location_column, dates, *values = zip(*rows)
+    location_values, row_location = np.unique(np.asarray(location_column), return_inverse=True)
+    row_day = (np.asarray(dates, dtype='datetime64[D]') - np.datetime64(start, 'D')).astype(int)
+
+    shape = (len(location_values), (end - start).days + 1)
+    missing = np.ones(shape, dtype=bool)
+    missing[row_location, row_day] = False
+    grids = {}
+    for name, column in zip(SERIES_FIELDS, values):
+        grid = np.full(shape, np.nan)
+        grid[row_location, row_day] = np.array(column, dtype=np.float64)
+        grids[name] = grid
+
+    if fill_gaps:
+        locations = Location.objects.in_bulk([int(location_id) for location_id in location_values])
+        neighbours = neighbour_order([locations[int(location_id)] for location_id in location_values])
+        grids, flags = fill_network(
+            grids, missing, neighbours, optional=('temperature_min', 'temperature_max')
+        )
+    else:
+        flags = np.where(missing, MISSING, 0).astype(np.uint8)
+
+    calendar = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+    series = {}
+    for i, location_id in enumerate(location_values):
+        keep = (flags[i] & MISSING) == 0
+        series[int(location_id)] = ClimateSeries(
+            calendar[keep],
+            *[grids[name][i][keep] for name in SERIES_FIELDS],
+            imputed=flags[i][keep],
+        )
+    return series
+
+
+def pest_climate_features(series, profile, planting_date, start, end):
+    """
+    Climate feature columns for one crop/pest pair
+
+    series: ClimateSeries of the crop's location (None gives zeros)
+    profile: Pest.climate_profile
+    start, end: recent window for the suitability ratios
+    """
+    if series is None or not len(series):
+        return dict.fromkeys(CLIMATE_FEATURES, 0.0)
+
+    base = profile['base_temperature']
+    season_start = max(planting_date or end, end - timedelta(days=MAX_SEASON_DAYS))
+
+    recent = series.window(start, end)
+    temperature = series.temperature_avg[recent]
+    humidity = series.humidity[recent]
+    rainfall = series.rainfall[recent]
+
+    if len(temperature):
+        temp_suitable = (temperature >= profile['optimal_temp_min']) & (temperature <= profile['optimal_temp_max'])
+        humidity_suitable = humidity > profile['humidity_threshold']
+        leaf_wet = (humidity >= profile['leaf_wetness_humidity']) | (rainfall > LEAF_WETNESS_RAINFALL)
+        imputed = series.imputed[recent] != 0
+        ratios = [float(mask.mean()) for mask in (temp_suitable, humidity_suitable, leaf_wet, imputed)]
+    else:
+        ratios = [0.0, 0.0, 0.0, 0.0]
+
+    return dict(zip(CLIMATE_FEATURES, [
+        series.degree_days(base, season_start, end),
+        series.degree_days(base, start, end),
+        *ratios,
+    ]))
@@ -0,0 +1,142 @@
+"""
+Local stand-in for a daily weather feed
+
+Serves GET /daily?location=&start=&end= in the format StandInFeedAdapter
+expects. Values are synthetic but deterministic per (location, date), so
+repeated fetches return the same data. Failures, latency and rate limiting
+can be injected to exercise the fetcher's retry path offline.
+"""
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from django.utils.dateparse import parse_date
+
+# Largest date range served by one request
+MAX_DAYS = 366
+
+
+def synthetic_day(location, day):
+    """Deterministic daily weather for a location name and date"""
+    seed = hashlib.md5(f'{location.strip().lower()}:{day.isoformat()}'.encode()).hexdigest()
+    rng = random.Random(int(seed, 16))
+    climate = random.Random(location.strip().lower())
+
+    season = math.sin(2 * math.pi * (day.timetuple().tm_yday - 80) / 365)
+    temperature = climate.uniform(18, 28) + 6 * season + rng.gauss(0, 2)
+    spread = rng.uniform(4, 10)
+    humidity = min(100, max(20, climate.uniform(55, 80) - 10 * season + rng.gauss(0, 8)))
+    rainfall = rng.expovariate(1 / 8) if rng.random() < 0.35 else 0
+
+    return {
+        'date': day.isoformat(),
+        'temperature_avg': round(temperature, 2),
+        'temperature_min': round(temperature - spread / 2, 2),
+        'temperature_max': round(temperature + spread / 2, 2),
+        'humidity': round(humidity, 2),
+        'rainfall': round(rainfall, 2),
+        'wind_speed': round(rng.uniform(0, 25), 2),
+    }
+
+
+class FeedRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        if server.rate_limited():
+            return self._send(429, {'error': 'rate limit exceeded'}, {'Retry-After': '1'})
+        if server.injected_failure():
+            return self._send(503, {'error': 'temporarily unavailable'})
+
+        url = urlsplit(self.path)
+        if url.path != '/daily':
+            return self._send(404, {'error': 'not found'})
+
+        query = parse_qs(url.query)
+        location = query.get('location', [''])[0].strip()
+        start = parse_date(query.get('start', [''])[0])
+        end = parse_date(query.get('end', [''])[0])
+        if not location or not start or not end or start > end:
+            return self._send(400, {'error': 'location, start and end (YYYY-MM-DD) are required'})
+        if (end - start).days >= MAX_DAYS:
+            return self._send(400, {'error': f'at most {MAX_DAYS} days per request'})
+
+        days = [synthetic_day(location, start + timedelta(days=i)) for i in range((end - start).days + 1)]
+        self._send(200, {'location': location, 'days': days})
+
+    def _send(self, status, payload, headers=None):
+        with self.server._lock:
+            self.server.statuses[status] += 1
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class FeedServer(ThreadingHTTPServer):
+    """
+    fail_rate: share of requests answered with 503
+    fail_first: number of initial requests answered with 503
+    latency: seconds added to every response
+    rate_limit: requests per second before answering 429 (None for no limit)
+
+    statuses counts the responses sent, by HTTP status.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, fail_rate=0, fail_first=0, latency=0, rate_limit=None, verbose=False):
+        super().__init__(address, FeedRequestHandler)
+        self.fail_rate = fail_rate
+        self.fail_first = fail_first
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.verbose = verbose
+        self.statuses = Counter()
+        self._lock = threading.Lock()
+        self._window = (0, 0)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def injected_failure(self):
+        with self._lock:
+            if self.fail_first:
+                self.fail_first -= 1
+                return True
+        return bool(self.fail_rate) and random.random() < self.fail_rate
+
+    def rate_limited(self):
+        if not self.rate_limit:
+            return False
+        with self._lock:
+            second, count = self._window
+            now = int(time.monotonic())
+            count = count + 1 if now == second else 1
+            self._window = (now, count)
+            return count > self.rate_limit
+
+
+def start_server(host='127.0.0.1', port=0, **options):
+    """Run a FeedServer on a background thread; port 0 picks a free port"""
+    server = FeedServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
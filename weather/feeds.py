@@ -0,0 +1,283 @@
+"""
+Concurrent daily weather feed fetching
+
+A feed adapter knows how to ask one provider for daily weather of a location
+and how to turn its response into WeatherData rows. FeedFetcher runs the
+requests of many locations concurrently over one bounded connection pool,
+with a token-bucket rate limit per host and retries with exponential backoff.
+Fetched rows are written through bulk_upsert_weather like CSV imports.
+
+The 'standin' adapter talks to the local server in weather.feed_server, so
+the whole path can be exercised offline.
+"""
+import asyncio
+import random
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+import httpx
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .utils import bulk_upsert_weather, parse_weather_row
+
+# Response statuses worth another attempt
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Upper bound on a server-requested Retry-After delay (seconds)
+MAX_RETRY_AFTER = 30
+
+FEED_ADAPTERS = {}
+
+
+class FeedError(Exception):
+    """A feed request failed for good (after any retries)"""
+
+
+def register_adapter(cls):
+    """Class decorator adding an adapter to FEED_ADAPTERS under its name"""
+    FEED_ADAPTERS[cls.name] = cls
+    return cls
+
+
+def get_adapter(name):
+    try:
+        return FEED_ADAPTERS[name]()
+    except KeyError:
+        raise FeedError(f'Unknown weather feed adapter: {name}')
+
+
+class FeedAdapter:
+    """
+    Base class for weather providers
+
+    Subclasses set name, and may lower max_days when the provider caps the
+    date range of a single request.
+    """
+    name = None
+    max_days = 366
+
+    def windows(self, start, end):
+        """Split start..end (inclusive) into ranges of at most max_days"""
+        while start <= end:
+            window_end = min(end, start + timedelta(days=self.max_days - 1))
+            yield start, window_end
+            start = window_end + timedelta(days=1)
+
+    def requests(self, location, start, end):
+        """(path, params) of each request needed for location over start..end"""
+        raise NotImplementedError
+
+    def rows(self, location, payload):
+        """
+        Rows shaped like weather CSV rows (date, location, temperature_avg, ...)
+        from a decoded JSON response; each is validated by parse_weather_row
+        """
+        raise NotImplementedError
+
+
+@register_adapter
+class StandInFeedAdapter(FeedAdapter):
+    """
+    Adapter for the local stand-in server (weather.feed_server)
+
+    GET /daily?location=&start=&end= returns
+    {"location": ..., "days": [{"date": ..., "temperature_avg": ..., ...}]}
+    """
+    name = 'standin'
+    max_days = 31
+
+    def requests(self, location, start, end):
+        for window_start, window_end in self.windows(start, end):
+            yield '/daily', {
+                'location': location,
+                'start': window_start.isoformat(),
+                'end': window_end.isoformat(),
+            }
+
+    def rows(self, location, payload):
+        for day in payload['days']:
+            # Decimal fields validate strings exactly; floats carry binary noise
+            yield {
+                **{name: None if value is None else str(value) for name, value in day.items()},
+                'location': location,
+            }
+
+
+class RateLimiter:
+    """Token bucket allowing rate requests per second, with bursts up to rate"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class FeedFetcher:
+    """
+    Fetch daily weather for many locations concurrently
+
+    max_connections: size of the shared connection pool
+    rate_limit: requests per second per host (None for no limit)
+    retries: extra attempts after a transport error or a retryable status
+    backoff: base delay in seconds, doubled on every retry, plus jitter
+    """
+
+    def __init__(self, adapter, base_url, max_connections=10, rate_limit=20,
+                 retries=3, backoff=0.5, timeout=10):
+        self.adapter = adapter
+        self.base_url = base_url.rstrip('/')
+        self.max_connections = max_connections
+        self.rate_limit = rate_limit
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._limiters = {}
+
+    def _limiter(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._limiters:
+            self._limiters[host] = RateLimiter(self.rate_limit)
+        return self._limiters[host]
+
+    def _delay(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(int(retry_after), MAX_RETRY_AFTER)
+        return self.backoff * 2 ** attempt * (1 + random.random())
+
+    async def _get(self, client, path, params):
+        """Decoded JSON of one request, retrying transient failures"""
+        url = self.base_url + path
+        for attempt in range(self.retries + 1):
+            if self.rate_limit:
+                await self._limiter(url).acquire()
+
+            response = None
+            try:
+                response = await client.get(url, params=params)
+            except httpx.TransportError as e:
+                error = f'{type(e).__name__}: {e}'
+            else:
+                if response.status_code == 200:
+                    try:
+                        return response.json()
+                    except ValueError:
+                        raise FeedError(f'{url}: response is not valid JSON')
+                error = f'HTTP {response.status_code}'
+                if response.status_code not in RETRY_STATUSES:
+                    break
+
+            if attempt < self.retries:
+                await asyncio.sleep(self._delay(attempt, response))
+
+        raise FeedError(f'{url} ({params.get("start")} to {params.get("end")}): {error}')
+
+    async def _fetch(self, client, location, path, params):
+        """(WeatherData rows, error messages) of one request"""
+        try:
+            payload = await self._get(client, path, params)
+            rows = list(self.adapter.rows(location, payload))
+        except FeedError as e:
+            return [], [f'{location}: {e}']
+        except (KeyError, TypeError) as e:
+            return [], [f'{location}: unexpected response format ({e})']
+
+        records = []
+        errors = []
+        for row in rows:
+            try:
+                records.append(parse_weather_row(row))
+            except ValidationError as e:
+                errors.append(f'{location} {row.get("date")}: {"; ".join(e.messages)}')
+        return records, errors
+
+    async def fetch_many(self, locations, start, end):
+        """
+        (WeatherData rows, error messages) for every location over start..end
+
+        All requests of all locations are in flight together; the pool and
+        the rate limiters decide how many actually run at once.
+        """
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+        async with httpx.AsyncClient(limits=limits, timeout=self.timeout) as client:
+            results = await asyncio.gather(*[
+                self._fetch(client, location, path, params)
+                for location in locations
+                for path, params in self.adapter.requests(location, start, end)
+            ])
+
+        records = []
+        errors = []
+        for request_records, request_errors in results:
+            records.extend(request_records)
+            errors.extend(request_errors)
+        return records, errors
+
+
+def feed_settings():
+    from django.conf import settings
+
+    return {
+        'ADAPTER': 'standin',
+        'BASE_URL': 'http://127.0.0.1:8765',
+        'MAX_CONNECTIONS': 10,
+        'RATE_LIMIT': 20,
+        'RETRIES': 3,
+        'BACKOFF': 0.5,
+        'TIMEOUT': 10,
+        **getattr(settings, 'WEATHER_FEED', {}),
+    }
+
+
+def fetch_weather(locations, start, end, batch_size=1000, **options):
+    """
+    Fetch daily weather for locations over start..end and store it
+
+    options override the WEATHER_FEED setting (adapter, base_url,
+    max_connections, rate_limit, retries, backoff, timeout). Locations that
+    fail keep whatever was fetched for their other date ranges.
+    """
+    config = feed_settings()
+    config.update({name.upper(): value for name, value in options.items() if value is not None})
+
+    fetcher = FeedFetcher(
+        get_adapter(config['ADAPTER']),
+        config['BASE_URL'],
+        max_connections=config['MAX_CONNECTIONS'],
+        rate_limit=config['RATE_LIMIT'],
+        retries=config['RETRIES'],
+        backoff=config['BACKOFF'],
+        timeout=config['TIMEOUT'],
+    )
+
+    started = time.monotonic()
+    records, errors = asyncio.run(fetcher.fetch_many(locations, start, end))
+
+    imported_count = 0
+    for i in range(0, len(records), batch_size):
+        with transaction.atomic():
+            imported_count += bulk_upsert_weather(records[i:i + batch_size])
+
+    return {
+        'locations': len(locations),
+        'imported_count': imported_count,
+        'errors': errors,
+        'elapsed_seconds': round(time.monotonic() - started, 2),
+    }
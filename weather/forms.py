@@ -1,5 +1,5 @@
 from django import forms
-from .models import WeatherData
+from .models import Location, WeatherData, normalize_location_name
 from django.utils import timezone
 
 
@@ -56,6 +56,22 @@ class WeatherDataForm(forms.ModelForm):
                 'step': '0.1'
             }),
         }
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        date = cleaned_data.get('date')
+        location = cleaned_data.get('location')
+        
+        # Rows are unique per canonical location, which the form does not edit
+        if date and location:
+            duplicate = WeatherData.objects.filter(
+                date=date,
+                location_ref__in=Location.objects.filter(normalized_name=normalize_location_name(location)),
+            ).exclude(pk=self.instance.pk)
+            if duplicate.exists():
+                self.add_error('location', 'Weather data for this location and date already exists.')
+        
+        return cleaned_data
 
 
 class WeatherImportForm(forms.Form):
@@ -68,9 +84,12 @@ class WeatherImportForm(forms.Form):
 
 
 class WeatherAPIForm(forms.Form):
-    """Form for fetching weather data from API"""
+    """Form for fetching weather data from the configured weather feed"""
+    MAX_DAYS = 366
+    
     location = forms.CharField(
-        max_length=200,
+        max_length=2000,
+        help_text='One or more locations separated by ";"',
         widget=forms.TextInput(attrs={
             'class': 'form-control',
             'placeholder': 'Enter city name or coordinates'
@@ -88,3 +107,27 @@ class WeatherAPIForm(forms.Form):
             'type': 'date'
         })
     )
+    
+    def clean_location(self):
+        """Split into distinct location names"""
+        names = []
+        for name in self.cleaned_data['location'].split(';'):
+            name = ' '.join(name.split())
+            if name and name.lower() not in {existing.lower() for existing in names}:
+                names.append(name)
+        if not names:
+            raise forms.ValidationError('Enter at least one location.')
+        return names
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        
+        if start_date and end_date:
+            if start_date > end_date:
+                self.add_error('end_date', 'End date must be on or after the start date.')
+            elif (end_date - start_date).days >= self.MAX_DAYS:
+                self.add_error('end_date', f'Fetch at most {self.MAX_DAYS} days at a time.')
+        
+        return cleaned_data
@@ -0,0 +1,141 @@
+"""
+Gap filling for missing weather days
+
+Weather is laid out as (location x day) grids with NaN where a station sent
+no reading. Missing days are filled for the whole network at once: linear
+interpolation along time for short gaps, and the value observed the same day
+at the nearest neighbouring location otherwise. A flag grid records how
+every cell was obtained, so downstream features can tell imputed values apart.
+"""
+import numpy as np
+
+# Flag bits (0 = observed)
+INTERPOLATED = 1
+NEIGHBOUR = 2
+MISSING = 4
+
+# Longest run of missing days bridged by interpolation
+MAX_INTERPOLATION_GAP = 5
+
+# Neighbours further away than this are not used (km)
+MAX_NEIGHBOUR_DISTANCE = 100
+
+# Fill methods tried per variable, in order. Rainfall is local and bursty, so
+# a neighbour's reading beats a line drawn between two dry days.
+FILL_ORDER = {
+    'rainfall': ['neighbour', 'interpolate'],
+}
+DEFAULT_FILL_ORDER = ['interpolate', 'neighbour']
+
+
+def interpolate_gaps(grid, targets, max_gap=MAX_INTERPOLATION_GAP):
+    """
+    Linearly interpolate target cells between the nearest valid days
+
+    Runs of more than max_gap missing days, and gaps at either end of a
+    row, are left as they are. Returns (filled grid, mask of filled cells).
+    """
+    rows, days = grid.shape
+    valid = ~np.isnan(grid)
+    positions = np.broadcast_to(np.arange(days), grid.shape)
+
+    previous = np.maximum.accumulate(np.where(valid, positions, -1), axis=1)
+    following = np.minimum.accumulate(np.where(valid, positions, days)[:, ::-1], axis=1)[:, ::-1]
+
+    fill = targets & (previous >= 0) & (following < days) & (following - previous - 1 <= max_gap)
+
+    row_index = np.arange(rows)[:, None]
+    before = grid[row_index, np.clip(previous, 0, days - 1)]
+    after = grid[row_index, np.clip(following, 0, days - 1)]
+    span = np.maximum(following - previous, 1)
+    values = before + (after - before) * (positions - previous) / span
+
+    filled = grid.copy()
+    filled[fill] = values[fill]
+    return filled, fill
+
+
+def fill_from_neighbours(grid, targets, neighbours):
+    """
+    Copy the same day's value from the nearest location that has one
+
+    neighbours: (locations x ranks) index array from neighbour_order(), -1
+    where no further neighbour is close enough.
+    Returns (filled grid, mask of filled cells).
+    """
+    filled = grid.copy()
+    fill = np.zeros(grid.shape, dtype=bool)
+    for rank in range(neighbours.shape[1]):
+        neighbour = neighbours[:, rank]
+        candidate = grid[np.maximum(neighbour, 0)]
+        use = targets & ~fill & (neighbour >= 0)[:, None] & ~np.isnan(candidate)
+        filled[use] = candidate[use]
+        fill |= use
+    return filled, fill
+
+
+def neighbour_order(locations, max_distance=MAX_NEIGHBOUR_DISTANCE):
+    """
+    Other locations ranked by distance, for each location
+
+    locations: sequence of objects with latitude, longitude and region.
+    Locations without coordinates fall back to others in the same region.
+    """
+    count = len(locations)
+    if count < 2:
+        return np.full((count, 0), -1)
+
+    latitude = np.array([np.nan if loc.latitude is None else float(loc.latitude) for loc in locations])
+    longitude = np.array([np.nan if loc.longitude is None else float(loc.longitude) for loc in locations])
+    located = ~np.isnan(latitude) & ~np.isnan(longitude)
+    measured = located[:, None] & located[None, :]
+
+    distances = haversine_matrix(np.radians(latitude), np.radians(longitude))
+    distances[~measured | (distances > max_distance)] = np.inf
+
+    # Unknown distance within a region ranks after measured ones
+    regions = np.array([loc.region or '' for loc in locations], dtype=object)
+    same_region = (regions[:, None] == regions[None, :]) & (regions != '')[:, None]
+    distances[same_region & ~measured] = max_distance + 1
+    np.fill_diagonal(distances, np.inf)
+
+    order = np.argsort(distances, axis=1, kind='stable')[:, :count - 1]
+    return np.where(np.isfinite(np.take_along_axis(distances, order, axis=1)), order, -1)
+
+
+def haversine_matrix(latitude, longitude):
+    """Great-circle distances (km) between every pair of points given in radians"""
+    dlat = latitude[None, :] - latitude[:, None]
+    dlon = longitude[None, :] - longitude[:, None]
+    h = np.sin(dlat / 2) ** 2 + np.cos(latitude)[:, None] * np.cos(latitude)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * 6371 * np.arcsin(np.sqrt(np.clip(h, 0, 1)))
+
+
+def fill_network(grids, missing, neighbours, optional=()):
+    """
+    Fill missing days in every variable grid
+
+    grids: dict of variable name -> (locations x days) float array
+    missing: bool grid of cells without a reading (nullable columns of
+    observed rows stay NaN and are not imputed)
+    optional: variables that may stay unfilled without flagging the day MISSING
+    Returns (filled grids, uint8 flag grid).
+    """
+    flags = np.zeros(missing.shape, dtype=np.uint8)
+    filled_grids = {}
+
+    for name, grid in grids.items():
+        remaining = missing.copy()
+        for method in FILL_ORDER.get(name, DEFAULT_FILL_ORDER):
+            if method == 'interpolate':
+                grid, fill = interpolate_gaps(grid, remaining)
+                flags[fill] |= INTERPOLATED
+            else:
+                grid, fill = fill_from_neighbours(grid, remaining, neighbours)
+                flags[fill] |= NEIGHBOUR
+            remaining &= ~fill
+        if name not in optional:
+            flags[remaining] |= MISSING
+        filled_grids[name] = grid
+
+    return filled_grids, flags
@@ -0,0 +1,237 @@
+"""
+Background weather CSV import jobs
+
+Uploads are spooled to MEDIA_ROOT and processed outside the request. Each
+batch of rows is written in the same transaction as the job's byte offset,
+so a job interrupted by a crash resumes exactly after the last committed row.
+
+Claiming a job gives the worker a new claim_token, and every progress write
+is conditional on it. A worker that stalled long enough for its job to be
+taken over finds its token gone at the next batch; that batch is rolled back
+and the worker stops, leaving the job to the new owner.
+"""
+import csv
+import logging
+import os
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import WeatherImportJob
+from .utils import parse_weather_row, bulk_upsert_weather, count_high_risk
+
+logger = logging.getLogger(__name__)
+
+IMPORT_DIR = 'weather_imports'
+
+# A RUNNING job not updated for this long is assumed dead and may be resumed
+STALE_AFTER = timedelta(seconds=60)
+
+
+def spool_upload(uploaded_file):
+    """Write an uploaded CSV to disk and create a pending import job"""
+    directory = os.path.join(settings.MEDIA_ROOT, IMPORT_DIR)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{uuid.uuid4().hex}.csv')
+
+    with open(path, 'wb') as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+
+    return WeatherImportJob.objects.create(
+        file_path=path,
+        original_name=uploaded_file.name,
+        file_size=os.path.getsize(path),
+    )
+
+
+def start_import_job(job):
+    """Process a job on a daemon thread"""
+    thread = threading.Thread(
+        target=_run_in_thread, args=(job.pk,), name=f'weather-import-{job.pk}', daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def _run_in_thread(job_id):
+    try:
+        run_import_job(job_id)
+    finally:
+        close_old_connections()
+
+
+class JobClaimLost(Exception):
+    """Another worker took over the job after this one stopped reporting"""
+
+
+def claim_job(job_id):
+    """
+    Atomically mark a job as running
+
+    Returns the new claim token, or None if the job is finished or another
+    worker is actively processing it.
+    """
+    now = timezone.now()
+    token = uuid.uuid4()
+    claimed = WeatherImportJob.objects.filter(
+        _resumable(now), pk=job_id
+    ).update(status='RUNNING', claim_token=token, updated_at=now)
+    return token if claimed == 1 else None
+
+
+def _save_claimed(job, **fields):
+    """
+    Write fields to the job if it is still claimed by job.claim_token
+
+    Also refreshes updated_at, the heartbeat that keeps the job from being
+    taken over. Raises JobClaimLost otherwise.
+    """
+    fields['updated_at'] = timezone.now()
+    updated = WeatherImportJob.objects.filter(pk=job.pk, claim_token=job.claim_token).update(**fields)
+    if updated != 1:
+        raise JobClaimLost(f'Import job {job.pk} was taken over by another worker')
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+
+def _resumable(now):
+    return Q(status='PENDING') | Q(status='RUNNING', updated_at__lt=now - STALE_AFTER)
+
+
+def resumable_jobs():
+    """Pending jobs and running jobs whose worker stopped reporting progress"""
+    return WeatherImportJob.objects.filter(_resumable(timezone.now())).order_by('created_at')
+
+
+def is_resumable(job):
+    """True for a pending or running job nothing has touched for STALE_AFTER"""
+    return job.status in ('PENDING', 'RUNNING') and job.updated_at < timezone.now() - STALE_AFTER
+
+
+def run_import_job(job_id, batch_size=1000):
+    """
+    Process a job from its committed offset to the end of the file
+
+    Returns None if the job could not be claimed or was taken over.
+    """
+    token = claim_job(job_id)
+    if token is None:
+        return None
+
+    job = WeatherImportJob.objects.get(pk=job_id)
+    job.claim_token = token
+    try:
+        if job.started_at is None:
+            _save_claimed(job, started_at=timezone.now())
+
+        try:
+            _process_file(job, batch_size)
+        except JobClaimLost:
+            raise
+        except Exception as e:
+            logger.exception('Weather import job %s failed', job.pk)
+            _save_claimed(
+                job,
+                status='FAILED',
+                errors=(job.errors + [f'File error: {str(e)}'])[-WeatherImportJob.MAX_STORED_ERRORS:],
+                finished_at=timezone.now(),
+            )
+            return job
+
+        _save_claimed(job, status='COMPLETED', finished_at=timezone.now())
+    except JobClaimLost:
+        logger.warning('Weather import job %s was taken over; stopping this worker', job.pk)
+        return None
+
+    # The spooled copy is no longer needed once every row is committed
+    if os.path.exists(job.file_path):
+        os.remove(job.file_path)
+    return job
+
+
+def _process_file(job, batch_size):
+    """
+    Stream rows from job.byte_offset, committing progress with each batch
+
+    Rows are read line by line so the byte offset of every row boundary is
+    known; quoted fields spanning several lines are not supported.
+    """
+    with open(job.file_path, 'rb') as source:
+        header_line = source.readline()
+        fieldnames = next(csv.reader([header_line.decode('utf-8-sig')]))
+        fieldnames = [name.strip() for name in fieldnames]
+
+        source.seek(max(job.byte_offset, source.tell()))
+
+        batch = []
+        batch_rows = 0
+        batch_errors = []
+
+        while True:
+            line = source.readline()
+            if line:
+                batch_rows += 1
+                row_num = job.rows_processed + batch_rows + 1
+                text = line.decode('utf-8').strip()
+                if text:
+                    values = next(csv.reader([text]))
+                    try:
+                        batch.append(parse_weather_row(dict(zip(fieldnames, values))))
+                    except ValidationError as e:
+                        batch_errors.append(f'Row {row_num}: {"; ".join(e.messages)}')
+
+            if batch_rows and (batch_rows >= batch_size or not line):
+                _commit_batch(job, batch, batch_rows, batch_errors, source.tell())
+                batch = []
+                batch_rows = 0
+                batch_errors = []
+
+            if not line:
+                break
+
+
+def _commit_batch(job, batch, batch_rows, batch_errors, offset):
+    """
+    Write a batch and advance the job offset in one transaction
+
+    Raises JobClaimLost (rolling the batch back) if the job was taken over.
+    """
+    with transaction.atomic():
+        written = bulk_upsert_weather(batch) if batch else 0
+        errors = job.errors
+        if batch_errors and len(errors) < WeatherImportJob.MAX_STORED_ERRORS:
+            errors = (errors + batch_errors)[:WeatherImportJob.MAX_STORED_ERRORS]
+        _save_claimed(
+            job,
+            byte_offset=offset,
+            rows_processed=job.rows_processed + batch_rows,
+            imported_count=job.imported_count + written,
+            high_risk_count=job.high_risk_count + (count_high_risk(batch) if batch else 0),
+            error_count=job.error_count + len(batch_errors),
+            errors=errors,
+        )
+
+
+def job_status(job):
+    """Progress summary for the status endpoint"""
+    return {
+        'id': job.pk,
+        'status': job.status,
+        'file_name': job.original_name,
+        'progress_percent': job.progress_percent,
+        'rows_processed': job.rows_processed,
+        'imported_count': job.imported_count,
+        'high_risk_count': job.high_risk_count,
+        'error_count': job.error_count,
+        'errors': job.errors[:5],
+        'rows_per_second': job.rows_per_second,
+        'is_finished': job.is_finished,
+        'is_resumable': is_resumable(job),
+    }
@@ -0,0 +1,60 @@
+"""
+Django management command to fetch daily weather from the configured feed.
+Usage: python manage.py fetch_weather --days 30
+       python manage.py fetch_weather --location Pune --location Nashik --start 2024-01-01 --end 2024-03-31
+
+Without --location, every known Location is fetched. Feed settings come from
+WEATHER_FEED and can be overridden per run.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from weather.feeds import FeedError, fetch_weather
+from weather.models import Location
+
+
+class Command(BaseCommand):
+    help = 'Fetches daily weather for many locations concurrently and stores it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--location', action='append', dest='locations', help='Location name (repeatable)')
+        parser.add_argument('--start', help='First date (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last date (YYYY-MM-DD), default today')
+        parser.add_argument('--days', type=int, default=7, help='Days back from --end when --start is not given')
+        parser.add_argument('--adapter', help='Feed adapter name')
+        parser.add_argument('--base-url', help='Feed base URL')
+        parser.add_argument('--max-connections', type=int, help='Concurrent connections')
+        parser.add_argument('--rate-limit', type=float, help='Requests per second per host')
+        parser.add_argument('--retries', type=int, help='Retries per request')
+
+    def handle(self, *args, **options):
+        end = parse_date(options['end']) if options['end'] else timezone.now().date()
+        start = parse_date(options['start']) if options['start'] else end - timedelta(days=options['days'] - 1)
+        if not start or not end or start > end:
+            raise CommandError('Give valid dates with --start on or before --end')
+
+        locations = options['locations'] or list(Location.objects.order_by('name').values_list('name', flat=True))
+        if not locations:
+            raise CommandError('No locations to fetch; pass --location')
+
+        try:
+            result = fetch_weather(
+                locations, start, end,
+                adapter=options['adapter'],
+                base_url=options['base_url'],
+                max_connections=options['max_connections'],
+                rate_limit=options['rate_limit'],
+                retries=options['retries'],
+            )
+        except FeedError as e:
+            raise CommandError(str(e))
+
+        for error in result['errors']:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Fetched {result["imported_count"]} weather records for {result["locations"]} '
+            f'locations in {result["elapsed_seconds"]}s ({len(result["errors"])} errors)'
+        ))
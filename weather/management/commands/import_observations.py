@@ -0,0 +1,37 @@
+"""
+Django management command to ingest sub-daily weather readings from CSV.
+Usage: python manage.py import_observations readings.csv
+
+Expected columns: timestamp (UTC, ISO 8601), location, and any of
+temperature, humidity, rainfall, wind_speed, soil_moisture.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from weather.observations import import_observations_csv
+
+
+class Command(BaseCommand):
+    help = 'Stores hourly/sub-daily weather readings and rolls them up into daily weather data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='CSV file of readings')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100000,
+            help='Readings ingested per batch',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            readings, blocks = import_observations_csv(options['csv_path'], chunk_size=options['chunk_size'])
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError(f'Could not import {options["csv_path"]}: {e}')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Ingested {readings} readings into {blocks} daily blocks in {elapsed:.1f}s'
+        ))
@@ -0,0 +1,20 @@
+"""
+Django management command to rebuild the daily/weekly weather rollups.
+Usage: python manage.py rebuild_weather_rollups
+
+Needed only after WeatherData is changed with queryset.update()/delete() or
+raw SQL, which bypass the incremental rollup maintenance.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from weather.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recomputes all daily and weekly weather rollups from WeatherData'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            days = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f'✓ Rolled up {days} location-days'))
@@ -0,0 +1,29 @@
+"""
+Django management command to finish interrupted weather CSV imports.
+Usage: python manage.py resume_weather_imports
+"""
+
+from django.core.management.base import BaseCommand
+from weather.imports import resumable_jobs, run_import_job
+
+
+class Command(BaseCommand):
+    help = 'Resumes pending or interrupted weather import jobs from their last committed row'
+
+    def handle(self, *args, **options):
+        jobs = list(resumable_jobs())
+        if not jobs:
+            self.stdout.write('No interrupted imports found.')
+            return
+
+        for job in jobs:
+            self.stdout.write(f'Resuming {job} at row {job.rows_processed + 1}...')
+            result = run_import_job(job.pk)
+            if result is None:
+                self.stdout.write(self.style.WARNING('  Skipped - already being processed'))
+            elif result.status == 'COMPLETED':
+                self.stdout.write(self.style.SUCCESS(
+                    f'  ✓ {result.imported_count} records imported, {result.error_count} rows skipped'
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f'  ✗ Failed: {result.errors[-1]}'))
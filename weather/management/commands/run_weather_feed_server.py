@@ -0,0 +1,44 @@
+"""
+Django management command to run the local stand-in weather feed.
+Usage: python manage.py run_weather_feed_server [--port 8765] [--fail-rate 0.1]
+
+Serves synthetic daily weather for any location name, for offline use of
+python manage.py fetch_weather.
+"""
+
+from django.core.management.base import BaseCommand
+from weather.feed_server import FeedServer
+
+
+class Command(BaseCommand):
+    help = 'Runs a local stand-in weather feed server for offline fetching'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--fail-rate',
+            type=float,
+            default=0,
+            help='Share of requests answered with 503 (0-1)',
+        )
+        parser.add_argument('--latency', type=float, default=0, help='Seconds added to every response')
+        parser.add_argument('--rate-limit', type=int, default=None, help='Requests per second before 429')
+
+    def handle(self, *args, **options):
+        server = FeedServer(
+            (options['host'], options['port']),
+            fail_rate=options['fail_rate'],
+            latency=options['latency'],
+            rate_limit=options['rate_limit'],
+            verbose=options['verbosity'] > 1,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Weather feed listening on http://{options["host"]}:{server.server_port} (Ctrl+C to stop)'
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
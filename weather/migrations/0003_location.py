@@ -0,0 +1,68 @@
+# Generated by Django 4.2 on 2026-10-19 14:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def normalize(name):
+    return ' '.join((name or '').split()).casefold()
+
+
+def get_or_create_location(Location, cache, name):
+    key = normalize(name)
+    if not key:
+        return None
+    if key not in cache:
+        canonical = ' '.join(name.split())
+        parts = [part.strip() for part in canonical.split(',')]
+        cache[key], _ = Location.objects.get_or_create(
+            normalized_name=key,
+            defaults={'name': canonical, 'region': parts[-1] if len(parts) > 1 else ''},
+        )
+    return cache[key]
+
+
+def backfill_locations(apps, schema_editor):
+    """Create a Location per distinct free-text weather location and link the rows"""
+    Location = apps.get_model('weather', 'Location')
+    WeatherData = apps.get_model('weather', 'WeatherData')
+    cache = {}
+    for name in WeatherData.objects.values_list('location', flat=True).distinct():
+        location = get_or_create_location(Location, cache, name)
+        WeatherData.objects.filter(location=name).update(location_ref=location)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0002_weatherimportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('normalized_name', models.CharField(editable=False, max_length=200, unique=True)),
+                ('region', models.CharField(blank=True, max_length=100)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='weatherdata',
+            name='location_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='weather_records', to='weather.location'),
+        ),
+        migrations.AddIndex(
+            model_name='weatherdata',
+            index=models.Index(fields=['location_ref', 'date'], name='weather_wea_locatio_2f8b2f_idx'),
+        ),
+        migrations.RunPython(backfill_locations, migrations.RunPython.noop),
+    ]
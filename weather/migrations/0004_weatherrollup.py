@@ -0,0 +1,86 @@
+# Generated by Django 4.2 on 2026-10-19 14:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+from datetime import timedelta
+
+
+SUM_FIELDS = {
+    'temperature_sum': 'temperature_avg',
+    'humidity_sum': 'humidity',
+    'rainfall_sum': 'rainfall',
+    'wind_speed_sum': 'wind_speed',
+}
+
+
+def backfill_rollups(apps, schema_editor):
+    """Build day and week rollups for existing weather records"""
+    WeatherData = apps.get_model('weather', 'WeatherData')
+    WeatherRollup = apps.get_model('weather', 'WeatherRollup')
+    high_risk = models.Q(humidity__gt=70, temperature_avg__gte=20, temperature_avg__lte=30, rainfall__gt=5)
+
+    days = WeatherData.objects.filter(location_ref__isnull=False).order_by().values(
+        'location_ref_id', 'date'
+    ).annotate(
+        readings=models.Count('id'),
+        high_risk_days=models.Count('id', filter=high_risk),
+        **{name: models.Sum(source) for name, source in SUM_FIELDS.items()}
+    )
+
+    day_rollups = []
+    weeks = {}
+    for row in days.iterator():
+        location_id = row.pop('location_ref_id')
+        day = row.pop('date')
+        day_rollups.append(WeatherRollup(location_id=location_id, period='DAY', period_start=day, **row))
+
+        week = weeks.setdefault(
+            (location_id, day - timedelta(days=day.weekday())),
+            {'readings': 0, 'high_risk_days': 0, **{name: 0 for name in SUM_FIELDS}},
+        )
+        for name, value in row.items():
+            week[name] += value
+
+    WeatherRollup.objects.bulk_create(day_rollups, batch_size=1000)
+    WeatherRollup.objects.bulk_create([
+        WeatherRollup(location_id=location_id, period='WEEK', period_start=start, **values)
+        for (location_id, start), values in weeks.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0003_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeatherRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('DAY', 'Daily'), ('WEEK', 'Weekly (ISO, from Monday)')], max_length=4)),
+                ('period_start', models.DateField()),
+                ('readings', models.IntegerField(default=0, help_text='WeatherData rows summed')),
+                ('temperature_sum', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('humidity_sum', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('rainfall_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('wind_speed_sum', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('high_risk_days', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='weather.location')),
+            ],
+            options={
+                'ordering': ['period', 'period_start'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='weatherrollup',
+            index=models.Index(fields=['period', 'period_start'], name='weather_wea_period_c09a38_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='weatherrollup',
+            unique_together={('location', 'period', 'period_start')},
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
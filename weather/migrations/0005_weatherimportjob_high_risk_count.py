@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 14:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0004_weatherrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weatherimportjob',
+            name='high_risk_count',
+            field=models.IntegerField(default=0, help_text='Imported rows with high-risk conditions'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-19 14:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0005_weatherimportjob_high_risk_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ObservationBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('count', models.IntegerField(default=0, help_text='Readings in the block')),
+                ('data', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='observation_blocks', to='weather.location')),
+            ],
+            options={
+                'ordering': ['location', 'date'],
+                'unique_together': {('location', 'date')},
+            },
+        ),
+    ]
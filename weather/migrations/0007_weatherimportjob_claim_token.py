@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0006_observationblock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weatherimportjob',
+            name='claim_token',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+    ]
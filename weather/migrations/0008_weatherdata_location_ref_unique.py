@@ -0,0 +1,88 @@
+# Generated by Django 4.2 on 2026-10-19 16:05
+
+from django.db import migrations, models
+from datetime import timedelta
+
+
+SUM_FIELDS = {
+    'temperature_sum': 'temperature_avg',
+    'humidity_sum': 'humidity',
+    'rainfall_sum': 'rainfall',
+    'wind_speed_sum': 'wind_speed',
+}
+
+
+def merge_duplicates(apps, schema_editor):
+    """
+    Keep the most recently updated row per (location_ref, date)
+
+    Spellings of one place ("Ludhiana" / "ludhiana ") resolved to the same
+    Location but were stored as separate rows. Rollups of the merged
+    locations are recomputed, since they summed every copy.
+    """
+    WeatherData = apps.get_model('weather', 'WeatherData')
+    WeatherRollup = apps.get_model('weather', 'WeatherRollup')
+
+    duplicates = WeatherData.objects.filter(location_ref__isnull=False).order_by().values(
+        'location_ref_id', 'date'
+    ).annotate(copies=models.Count('id')).filter(copies__gt=1)
+
+    merged_locations = set()
+    for key in duplicates.iterator():
+        rows = WeatherData.objects.filter(location_ref_id=key['location_ref_id'], date=key['date'])
+        keep = rows.order_by('-updated_at', '-id').values_list('id', flat=True)[0]
+        rows.exclude(id=keep).delete()
+        merged_locations.add(key['location_ref_id'])
+
+    if not merged_locations:
+        return
+
+    high_risk = models.Q(humidity__gt=70, temperature_avg__gte=20, temperature_avg__lte=30, rainfall__gt=5)
+    WeatherRollup.objects.filter(location_id__in=merged_locations).delete()
+    days = WeatherData.objects.filter(location_ref_id__in=merged_locations).order_by().values(
+        'location_ref_id', 'date'
+    ).annotate(
+        readings=models.Count('id'),
+        high_risk_days=models.Count('id', filter=high_risk),
+        **{name: models.Sum(source) for name, source in SUM_FIELDS.items()}
+    )
+
+    day_rollups = []
+    weeks = {}
+    for row in days.iterator():
+        location_id = row.pop('location_ref_id')
+        day = row.pop('date')
+        day_rollups.append(WeatherRollup(location_id=location_id, period='DAY', period_start=day, **row))
+
+        week = weeks.setdefault(
+            (location_id, day - timedelta(days=day.weekday())),
+            {'readings': 0, 'high_risk_days': 0, **{name: 0 for name in SUM_FIELDS}},
+        )
+        for name, value in row.items():
+            week[name] += value
+
+    WeatherRollup.objects.bulk_create(day_rollups, batch_size=1000)
+    WeatherRollup.objects.bulk_create([
+        WeatherRollup(location_id=location_id, period='WEEK', period_start=start, **values)
+        for (location_id, start), values in weeks.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0007_weatherimportjob_claim_token'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='weatherdata',
+            unique_together={('location_ref', 'date')},
+        ),
+        # The unique constraint's index covers (location_ref, date) lookups
+        migrations.RemoveIndex(
+            model_name='weatherdata',
+            name='weather_wea_locatio_2f8b2f_idx',
+        ),
+    ]
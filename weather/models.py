@@ -1,11 +1,120 @@
+import numpy as np
+from django.core.cache import cache
 from django.db import models
 from django.utils import timezone
 
+from . import risk
+
+
+LOCATION_CACHE_KEY = 'weather:location_names'
+
+
+def normalize_location_name(name):
+    """Case- and whitespace-insensitive key used to match free-text locations"""
+    return ' '.join((name or '').split()).casefold()
+
+
+def invalidate_location_cache():
+    cache.delete(LOCATION_CACHE_KEY)
+
+
+class LocationManager(models.Manager):
+    def matching(self, query):
+        """Locations whose name contains query (the small table is scanned, not WeatherData)"""
+        return self.filter(normalized_name__contains=normalize_location_name(query))
+    
+    def resolve(self, names):
+        """
+        Map free-text location names to Location rows, creating missing ones
+        Returns: dict of normalized name -> Location
+        """
+        canonical = {}
+        for name in names:
+            key = normalize_location_name(name)
+            if key:
+                canonical.setdefault(key, ' '.join(name.split()))
+        
+        found = {loc.normalized_name: loc for loc in self.filter(normalized_name__in=canonical)}
+        missing = [key for key in canonical if key not in found]
+        if missing:
+            self.bulk_create([
+                Location(
+                    name=canonical[key],
+                    normalized_name=key,
+                    region=Location.region_from_name(canonical[key]),
+                )
+                for key in missing
+            ], ignore_conflicts=True)
+            found.update({loc.normalized_name: loc for loc in self.filter(normalized_name__in=missing)})
+            invalidate_location_cache()
+        return found
+    
+    def for_name(self, name):
+        """Location for a single free-text name, or None if blank"""
+        return self.resolve([name]).get(normalize_location_name(name))
+
+
+class Location(models.Model):
+    """Canonical location shared by weather records and crop fields"""
+    name = models.CharField(max_length=200)
+    normalized_name = models.CharField(max_length=200, unique=True, editable=False)
+    region = models.CharField(max_length=100, blank=True)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = LocationManager()
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+    
+    @staticmethod
+    def region_from_name(name):
+        """'Ludhiana, Punjab' -> 'Punjab'"""
+        parts = [part.strip() for part in name.split(',')]
+        return parts[-1] if len(parts) > 1 else ''
+    
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_location_name(self.name)
+        super().save(*args, **kwargs)
+        invalidate_location_cache()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_location_cache()
+        return result
+
+
+# High humidity + moderate temperature + recent rainfall = high risk.
+# Query form of weather.risk.HIGH_RISK_FLAGS, for filters and conditional
+# aggregates.
+HIGH_RISK_CONDITIONS = models.Q(
+    humidity__gt=risk.HIGH_HUMIDITY,
+    temperature_avg__gte=risk.OPTIMAL_TEMP_MIN,
+    temperature_avg__lte=risk.OPTIMAL_TEMP_MAX,
+    rainfall__gt=risk.RAINFALL_RISK,
+)
+
+
+class WeatherDataQuerySet(models.QuerySet):
+    def high_risk(self):
+        """Days whose conditions are favorable for pest outbreaks"""
+        return self.filter(HIGH_RISK_CONDITIONS)
+
 
 class WeatherData(models.Model):
     """Model for storing weather and environmental conditions"""
     date = models.DateField(default=timezone.now)
     location = models.CharField(max_length=200)
+    location_ref = models.ForeignKey(
+        Location, on_delete=models.SET_NULL, null=True, blank=True,
+        editable=False, related_name='weather_records'
+    )
     
     # Temperature data (in Celsius)
     temperature_avg = models.DecimalField(max_digits=5, decimal_places=2)
@@ -27,16 +136,195 @@ class WeatherData(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = WeatherDataQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-date']
-        unique_together = ['date', 'location']
+        # Keyed on the canonical location, so spellings of one place share a row
+        unique_together = ['location_ref', 'date']
     
     def __str__(self):
         return f"{self.location} - {self.date}"
     
+    def save(self, *args, **kwargs):
+        from .rollups import refresh_rollups
+        
+        if self.location_ref_id is None or normalize_location_name(self.location) != self.location_ref.normalized_name:
+            self.location_ref = Location.objects.for_name(self.location)
+        
+        # A changed date or location also needs its old rollup recomputed
+        previous = None
+        if self.pk:
+            previous = WeatherData.objects.filter(pk=self.pk).values_list('location_ref_id', 'date').first()
+        
+        super().save(*args, **kwargs)
+        refresh_rollups([(self.location_ref_id, self.date), previous])
+    
+    def delete(self, *args, **kwargs):
+        from .rollups import refresh_rollups
+        
+        key = (self.location_ref_id, self.date)
+        result = super().delete(*args, **kwargs)
+        refresh_rollups([key])
+        return result
+    
     def is_high_risk_conditions(self):
         """Check if weather conditions are favorable for pest outbreaks"""
-        # High humidity + moderate temperature + recent rainfall = high risk
-        if self.humidity > 70 and 20 <= self.temperature_avg <= 30 and self.rainfall > 5:
-            return True
-        return False
+        # Views scoring many rows at once should use risk.annotate_risk()
+        return bool(risk.is_high_risk(risk.score_records([self]).flags)[0])
+
+
+
+class WeatherRollup(models.Model):
+    """
+    Pre-summed weather per location per day or ISO week
+
+    Sums and reading counts (rather than averages) are stored so any window
+    can be composed from whole weeks plus the days at its edges.
+    Maintained by weather.rollups.refresh_rollups.
+    """
+    PERIODS = [
+        ('DAY', 'Daily'),
+        ('WEEK', 'Weekly (ISO, from Monday)'),
+    ]
+    
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='rollups')
+    period = models.CharField(max_length=4, choices=PERIODS)
+    period_start = models.DateField()
+    
+    readings = models.IntegerField(default=0, help_text="WeatherData rows summed")
+    temperature_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    humidity_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    rainfall_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    wind_speed_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    high_risk_days = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['period', 'period_start']
+        unique_together = ['location', 'period', 'period_start']
+        indexes = [
+            models.Index(fields=['period', 'period_start']),
+        ]
+    
+    def __str__(self):
+        return f"{self.location} - {self.get_period_display()} {self.period_start}"
+    
+    @property
+    def temperature_avg(self):
+        return self.temperature_sum / self.readings if self.readings else None
+    
+    @property
+    def humidity_avg(self):
+        return self.humidity_sum / self.readings if self.readings else None
+    
+    @property
+    def wind_speed_avg(self):
+        return self.wind_speed_sum / self.readings if self.readings else None
+    
+    @property
+    def is_high_risk(self):
+        return self.high_risk_days > 0
+
+
+class ObservationBlock(models.Model):
+    """
+    Sub-daily readings of one location for one day, packed into a single row
+
+    data holds a little-endian uint32 column of seconds since midnight
+    followed by one float32 column per OBSERVATION_FIELDS entry (NaN where a
+    reading lacks the value). Managed by weather.observations, which also
+    rolls each block up into the day's WeatherData row.
+    """
+    OBSERVATION_FIELDS = ['temperature', 'humidity', 'rainfall', 'wind_speed', 'soil_moisture']
+    
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='observation_blocks')
+    date = models.DateField()
+    count = models.IntegerField(default=0, help_text="Readings in the block")
+    data = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['location', 'date']
+        unique_together = ['location', 'date']
+    
+    def __str__(self):
+        return f"{self.location} - {self.date} ({self.count} readings)"
+    
+    @classmethod
+    def pack(cls, seconds, columns):
+        """Encode seconds and a (fields x readings) array as block data"""
+        return (
+            np.asarray(seconds, dtype='<u4').tobytes()
+            + np.asarray(columns, dtype='<f4').tobytes()
+        )
+    
+    def unpack(self):
+        """Return (seconds, {field: float32 array}) for the block"""
+        data = bytes(self.data)
+        seconds = np.frombuffer(data, dtype='<u4', count=self.count)
+        columns = np.frombuffer(data, dtype='<f4', offset=4 * self.count).reshape(
+            len(self.OBSERVATION_FIELDS), self.count
+        )
+        return seconds, dict(zip(self.OBSERVATION_FIELDS, columns))
+
+
+class WeatherImportJob(models.Model):
+    """Background CSV import of weather data, resumable from the last committed offset"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    # Number of per-row error messages kept; error_count has the full total
+    MAX_STORED_ERRORS = 100
+    
+    file_path = models.CharField(max_length=500, help_text="Spooled upload on disk")
+    original_name = models.CharField(max_length=255, blank=True)
+    file_size = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    
+    # Progress - byte_offset points just past the last committed row
+    byte_offset = models.BigIntegerField(default=0)
+    rows_processed = models.IntegerField(default=0)
+    imported_count = models.IntegerField(default=0)
+    high_risk_count = models.IntegerField(default=0, help_text="Imported rows with high-risk conditions")
+    error_count = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    
+    # Set by each claim; progress is only written while the token still matches
+    claim_token = models.UUIDField(null=True, blank=True, editable=False)
+    
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Import {self.original_name or self.pk} - {self.status}"
+    
+    @property
+    def is_finished(self):
+        return self.status in ('COMPLETED', 'FAILED')
+    
+    @property
+    def progress_percent(self):
+        if self.status == 'COMPLETED':
+            return 100
+        if not self.file_size:
+            return 0
+        return round(self.byte_offset / self.file_size * 100, 1)
+    
+    @property
+    def rows_per_second(self):
+        if not self.started_at:
+            return 0
+        end = self.finished_at or self.updated_at
+        elapsed = (end - self.started_at).total_seconds()
+        return round(self.rows_processed / elapsed) if elapsed > 0 else 0
@@ -0,0 +1,206 @@
+"""
+Sub-daily weather observations
+
+Hourly (or finer) readings are stored as one ObservationBlock per location
+per day with packed float32 columns, instead of one ORM row per reading.
+Each ingest merges the new readings into the blocks they touch and rewrites
+the matching daily WeatherData rows through bulk_upsert_weather, so the rest
+of the app keeps working from daily data.
+"""
+import csv
+import warnings
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+
+from .models import Location, ObservationBlock, WeatherData, normalize_location_name
+from .utils import bulk_upsert_weather
+
+FIELDS = ObservationBlock.OBSERVATION_FIELDS
+
+
+def ingest_observations(locations, timestamps, columns):
+    """
+    Store readings and roll the days they fall on up into WeatherData
+
+    locations: location name per reading
+    timestamps: UTC timestamps per reading (anything numpy reads as datetime64)
+    columns: dict of field -> values per reading; absent fields and None
+    values are stored as NaN
+    A later reading with the same location and timestamp replaces the
+    earlier one. Returns the number of (location, day) blocks written.
+    """
+    timestamps = np.asarray(timestamps, dtype='datetime64[s]')
+    if not len(timestamps):
+        return 0
+
+    values = np.full((len(FIELDS), len(timestamps)), np.nan, dtype=np.float32)
+    for i, field in enumerate(FIELDS):
+        if field in columns:
+            values[i] = np.asarray(columns[field], dtype=np.float64)
+
+    # Resolve each distinct name once
+    names, name_index = np.unique(np.asarray(locations, dtype=str), return_inverse=True)
+    resolved = Location.objects.resolve(names)
+    location_ids = np.array([
+        resolved[normalize_location_name(name)].pk for name in names
+    ])[name_index]
+
+    days = timestamps.astype('datetime64[D]')
+    seconds = (timestamps - days).astype(np.int64)
+
+    order = np.lexsort((seconds, days, location_ids))
+    location_ids, days, seconds, values = location_ids[order], days[order], seconds[order], values[:, order]
+
+    # Boundaries of each (location, day) group in the sorted readings
+    changes = np.flatnonzero((location_ids[1:] != location_ids[:-1]) | (days[1:] != days[:-1])) + 1
+    starts = np.concatenate(([0], changes))
+    ends = np.concatenate((changes, [len(days)]))
+
+    existing = {
+        (block.location_id, block.date): block
+        for block in ObservationBlock.objects.filter(
+            location_id__in=set(location_ids.tolist()),
+            date__gte=days.min().item(),
+            date__lte=days.max().item(),
+        )
+    }
+
+    blocks = []
+    daily = []
+    locations_by_id = {location.pk: location for location in resolved.values()}
+    for start, end in zip(starts, ends):
+        key = (int(location_ids[start]), days[start].item())
+        block_seconds, block_values = _merge(existing.get(key), seconds[start:end], values[:, start:end])
+
+        blocks.append(ObservationBlock(
+            location_id=key[0],
+            date=key[1],
+            count=len(block_seconds),
+            data=ObservationBlock.pack(block_seconds, block_values),
+        ))
+        record = daily_summary(block_values)
+        if record:
+            daily.append(WeatherData(date=key[1], location=locations_by_id[key[0]].name, **record))
+
+    with transaction.atomic():
+        ObservationBlock.objects.bulk_create(
+            blocks,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['location', 'date'],
+            update_fields=['count', 'data', 'updated_at'],
+        )
+        if daily:
+            bulk_upsert_weather(daily)
+
+    return len(blocks)
+
+
+def _merge(block, seconds, values):
+    """Combine a stored block with new readings; new readings win on equal timestamps"""
+    if block is not None:
+        stored_seconds, stored = block.unpack()
+        seconds = np.concatenate((stored_seconds.astype(np.int64), seconds))
+        values = np.concatenate((np.stack([stored[field] for field in FIELDS]), values), axis=1)
+        order = np.argsort(seconds, kind='stable')
+        seconds, values = seconds[order], values[:, order]
+
+    # Keep the last reading of each timestamp
+    keep = np.append(seconds[1:] != seconds[:-1], True)
+    return seconds[keep], values[:, keep]
+
+
+def daily_summary(values):
+    """
+    WeatherData field values for one day of readings
+
+    values: (fields x readings) array. Returns None when the day has no
+    temperature or humidity readings.
+    """
+    columns = dict(zip(FIELDS, values.astype(np.float64)))
+    if np.isnan(columns['temperature']).all() or np.isnan(columns['humidity']).all():
+        return None
+
+    with warnings.catch_warnings():
+        # All-NaN optional columns are handled below
+        warnings.simplefilter('ignore', RuntimeWarning)
+        summary = {
+            'temperature_avg': np.nanmean(columns['temperature']),
+            'temperature_min': np.nanmin(columns['temperature']),
+            'temperature_max': np.nanmax(columns['temperature']),
+            'humidity': np.nanmean(columns['humidity']),
+            'rainfall': np.nansum(columns['rainfall']),
+            'wind_speed': np.nanmean(columns['wind_speed']),
+            'soil_moisture': np.nanmean(columns['soil_moisture']),
+        }
+
+    defaults = {'wind_speed': 0, 'soil_moisture': None}
+    return {
+        name: _decimal(value) if not np.isnan(value) else defaults[name]
+        for name, value in summary.items()
+    }
+
+
+def _decimal(value):
+    return Decimal(str(round(float(value), 2)))
+
+
+def read_observations(location, start, end):
+    """
+    Readings of one Location between two dates (inclusive)
+
+    Returns (datetime64 timestamps, {field: float32 array}).
+    """
+    blocks = ObservationBlock.objects.filter(
+        location=location, date__gte=start, date__lte=end
+    ).order_by('date')
+
+    timestamps = []
+    columns = {field: [] for field in FIELDS}
+    for block in blocks:
+        seconds, values = block.unpack()
+        timestamps.append(np.datetime64(block.date, 's') + seconds.astype('timedelta64[s]'))
+        for field in FIELDS:
+            columns[field].append(values[field])
+
+    if not timestamps:
+        return np.array([], dtype='datetime64[s]'), {field: np.array([], dtype=np.float32) for field in FIELDS}
+    return np.concatenate(timestamps), {field: np.concatenate(parts) for field, parts in columns.items()}
+
+
+def import_observations_csv(path, chunk_size=100000):
+    """
+    Ingest a CSV of readings in chunks
+
+    Columns: timestamp, location and any of OBSERVATION_FIELDS; blank values
+    are stored as missing. Returns (readings, blocks written).
+    """
+    readings = 0
+    blocks = 0
+    with open(path, newline='', encoding='utf-8-sig') as source:
+        reader = csv.DictReader(source)
+        chunk = []
+        for row in reader:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                blocks += _ingest_rows(chunk)
+                readings += len(chunk)
+                chunk = []
+        if chunk:
+            blocks += _ingest_rows(chunk)
+            readings += len(chunk)
+    return readings, blocks
+
+
+def _ingest_rows(rows):
+    fields = [field for field in FIELDS if field in rows[0]]
+    return ingest_observations(
+        [row['location'] for row in rows],
+        [row['timestamp'].strip() for row in rows],
+        {
+            field: [float(row[field]) if row[field].strip() else np.nan for row in rows]
+            for field in fields
+        },
+    )
@@ -0,0 +1,136 @@
+"""
+Vectorized weather risk scoring
+
+The thresholds for pest-favorable weather are defined here once.
+score_weather() evaluates whole arrays of readings in a single call; the
+WeatherData helpers, the HIGH_RISK_CONDITIONS query, the import pipeline and
+the prediction engine all build on it.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+# Thresholds (temperature in °C, humidity in %, rainfall in mm)
+OPTIMAL_TEMP_MIN = 20
+OPTIMAL_TEMP_MAX = 30
+LOW_TEMP = 15
+HIGH_HUMIDITY = 70
+MODERATE_HUMIDITY = 60
+RAINFALL_RISK = 5
+HEAVY_RAINFALL = 10
+
+# Rainfall total over a week that counts as wet (prediction features)
+WEEKLY_RAINFALL_RISK = 50
+
+# Flag bits
+FLAG_OPTIMAL_TEMP = 1
+FLAG_HIGH_TEMP = 2
+FLAG_LOW_TEMP = 4
+FLAG_HIGH_HUMIDITY = 8
+FLAG_MODERATE_HUMIDITY = 16
+FLAG_RAINFALL = 32
+FLAG_HEAVY_RAINFALL = 64
+
+# High humidity + moderate temperature + recent rainfall = high risk
+HIGH_RISK_FLAGS = FLAG_OPTIMAL_TEMP | FLAG_HIGH_HUMIDITY | FLAG_RAINFALL
+
+# Score contributed by each flag; the total is 0-100
+SCORE_WEIGHTS = {
+    FLAG_OPTIMAL_TEMP: 30,
+    FLAG_HIGH_HUMIDITY: 40,
+    FLAG_RAINFALL: 30,
+}
+
+# Scores at or above each bound move up one level
+LEVEL_BOUNDS = [40, 70]
+LEVELS = np.array(['LOW', 'MEDIUM', 'HIGH'])
+
+FAVORABLE_MESSAGES = [
+    (FLAG_OPTIMAL_TEMP, f'Temperature is in optimal range for pest activity ({OPTIMAL_TEMP_MIN}-{OPTIMAL_TEMP_MAX}°C)'),
+    (FLAG_HIGH_HUMIDITY, 'High humidity favors fungal diseases and many pests'),
+    (FLAG_MODERATE_HUMIDITY, 'Moderate humidity - some pest risk'),
+    (FLAG_HEAVY_RAINFALL, 'Recent significant rainfall increases disease risk'),
+]
+
+WARNING_MESSAGES = [
+    (FLAG_HIGH_TEMP, 'High temperature may reduce some pest activity'),
+    (FLAG_LOW_TEMP, 'Low temperature may slow pest development'),
+]
+
+WeatherRisk = namedtuple('WeatherRisk', ['scores', 'levels', 'flags'])
+
+
+def _as_array(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def score_weather(temperature, humidity, rainfall, rainfall_threshold=RAINFALL_RISK):
+    """
+    Score arrays of readings (scalars and Decimals are accepted too)
+
+    Returns WeatherRisk(scores, levels, flags): int scores 0-100, level
+    strings and uint8 flag bitmasks, each shaped like the broadcast inputs.
+    rainfall_threshold lets callers score totals over longer periods.
+    """
+    temperature = _as_array(temperature)
+    humidity = _as_array(humidity)
+    rainfall = _as_array(rainfall)
+
+    conditions = [
+        (FLAG_OPTIMAL_TEMP, (temperature >= OPTIMAL_TEMP_MIN) & (temperature <= OPTIMAL_TEMP_MAX)),
+        (FLAG_HIGH_TEMP, temperature > OPTIMAL_TEMP_MAX),
+        (FLAG_LOW_TEMP, temperature < LOW_TEMP),
+        (FLAG_HIGH_HUMIDITY, humidity > HIGH_HUMIDITY),
+        (FLAG_MODERATE_HUMIDITY, (humidity > MODERATE_HUMIDITY) & (humidity <= HIGH_HUMIDITY)),
+        (FLAG_RAINFALL, rainfall > rainfall_threshold),
+        (FLAG_HEAVY_RAINFALL, rainfall > HEAVY_RAINFALL),
+    ]
+
+    shape = np.broadcast_shapes(temperature.shape, humidity.shape, rainfall.shape)
+    flags = np.zeros(shape, dtype=np.uint8)
+    scores = np.zeros(shape, dtype=np.int64)
+    for bit, mask in conditions:
+        flags |= np.where(mask, bit, 0).astype(np.uint8)
+        scores += np.where(mask, SCORE_WEIGHTS.get(bit, 0), 0)
+
+    levels = LEVELS[np.searchsorted(LEVEL_BOUNDS, scores, side='right')]
+    return WeatherRisk(scores, levels, flags)
+
+
+def is_high_risk(flags):
+    """Boolean mask of readings meeting every high-risk condition"""
+    return (np.asarray(flags) & HIGH_RISK_FLAGS) == HIGH_RISK_FLAGS
+
+
+def score_records(records):
+    """Score WeatherData instances (or objects with the same fields)"""
+    records = list(records)
+    return score_weather(
+        [record.temperature_avg for record in records],
+        [record.humidity for record in records],
+        [record.rainfall for record in records],
+    )
+
+
+def annotate_risk(records):
+    """
+    Set risk_score, risk_level and high_risk on each record with one scoring call
+
+    Returns the records as a list, for use in templates.
+    """
+    records = list(records)
+    risk = score_records(records)
+    high_risk = is_high_risk(risk.flags)
+    for i, record in enumerate(records):
+        record.risk_score = int(risk.scores[i])
+        record.risk_level = str(risk.levels[i])
+        record.high_risk = bool(high_risk[i])
+    return records
+
+
+def describe_flags(flags):
+    """(favorable factors, warnings) messages for a single flag bitmask"""
+    flags = int(flags)
+    favorable = [message for bit, message in FAVORABLE_MESSAGES if flags & bit]
+    warnings = [message for bit, message in WARNING_MESSAGES if flags & bit]
+    return favorable, warnings
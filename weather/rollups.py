@@ -0,0 +1,188 @@
+"""
+Incremental daily/weekly weather rollups
+
+WeatherData.save()/delete() and the bulk import path call refresh_rollups()
+with the (location, date) pairs they touched. Readers compose any window from
+whole-week rollups plus the day rollups at its edges, so a year costs about
+as much as a week.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Count, Q, Sum
+from django.utils.dateparse import parse_date
+
+from .models import WeatherData, WeatherRollup, HIGH_RISK_CONDITIONS
+
+SUM_FIELDS = {
+    'temperature_sum': 'temperature_avg',
+    'humidity_sum': 'humidity',
+    'rainfall_sum': 'rainfall',
+    'wind_speed_sum': 'wind_speed',
+}
+
+
+def week_start(day):
+    """Monday of the ISO week containing day"""
+    return day - timedelta(days=day.weekday())
+
+
+def _as_date(value):
+    return parse_date(value) if isinstance(value, str) else value
+
+
+def refresh_rollups(keys):
+    """
+    Recompute day and week rollups for the given (location_id, date) pairs
+
+    None entries and pairs without a location are ignored.
+    """
+    days_by_location = defaultdict(set)
+    for key in keys:
+        if not key or key[0] is None:
+            continue
+        location_id, day = key
+        days_by_location[location_id].add(_as_date(day))
+
+    if not days_by_location:
+        return
+
+    for location_id, days in days_by_location.items():
+        _refresh_days(location_id, days)
+        _refresh_weeks(location_id, {week_start(day) for day in days})
+
+
+def _refresh_days(location_id, days):
+    totals = WeatherData.objects.filter(
+        location_ref_id=location_id, date__in=days
+    ).order_by().values('date').annotate(
+        readings=Count('id'),
+        high_risk_days=Count('id', filter=HIGH_RISK_CONDITIONS),
+        **{name: Sum(source) for name, source in SUM_FIELDS.items()}
+    )
+    _write(location_id, 'DAY', days, {row.pop('date'): row for row in totals})
+
+
+def _refresh_weeks(location_id, weeks):
+    period_filter = Q()
+    for start in weeks:
+        period_filter |= Q(period_start__gte=start, period_start__lte=start + timedelta(days=6))
+
+    days = WeatherRollup.objects.filter(
+        period_filter, location_id=location_id, period='DAY'
+    ).values_list('period_start', 'readings', 'high_risk_days', *SUM_FIELDS)
+
+    totals = {}
+    for period_start, readings, high_risk_days, *sums in days:
+        row = totals.setdefault(week_start(period_start), {
+            'readings': 0, 'high_risk_days': 0, **{name: 0 for name in SUM_FIELDS}
+        })
+        row['readings'] += readings
+        row['high_risk_days'] += high_risk_days
+        for name, value in zip(SUM_FIELDS, sums):
+            row[name] += value
+    _write(location_id, 'WEEK', weeks, totals)
+
+
+def _write(location_id, period, periods, totals):
+    """Upsert periods that still have readings and drop the ones that emptied"""
+    empty = [start for start in periods if start not in totals]
+    if empty:
+        WeatherRollup.objects.filter(
+            location_id=location_id, period=period, period_start__in=empty
+        ).delete()
+
+    if totals:
+        WeatherRollup.objects.bulk_create(
+            [
+                WeatherRollup(location_id=location_id, period=period, period_start=start, **values)
+                for start, values in totals.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['location', 'period', 'period_start'],
+            update_fields=['readings', 'high_risk_days', *SUM_FIELDS, 'updated_at'],
+        )
+
+
+def rebuild_rollups(batch_size=500):
+    """Recompute every rollup from WeatherData; returns number of days rolled up"""
+    WeatherRollup.objects.all().delete()
+    keys = WeatherData.objects.filter(location_ref__isnull=False).order_by().values_list(
+        'location_ref_id', 'date'
+    ).distinct()
+
+    batch = []
+    count = 0
+    for key in keys.iterator(chunk_size=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            refresh_rollups(batch)
+            count += len(batch)
+            batch = []
+    refresh_rollups(batch)
+    return count + len(batch)
+
+
+def window_filter(start, end):
+    """
+    Rollup rows covering start..end (inclusive) exactly once
+
+    Whole ISO weeks inside the window are read from WEEK rollups and the
+    partial weeks at either edge from DAY rollups.
+    """
+    first_monday = week_start(start) if start.weekday() == 0 else week_start(start) + timedelta(days=7)
+    last_monday = week_start(end + timedelta(days=1)) - timedelta(days=7)
+
+    if first_monday > last_monday:
+        return Q(period='DAY', period_start__gte=start, period_start__lte=end)
+
+    return (
+        Q(period='WEEK', period_start__gte=first_monday, period_start__lte=last_monday)
+        | Q(period='DAY', period_start__gte=start, period_start__lt=first_monday)
+        | Q(period='DAY', period_start__gt=last_monday + timedelta(days=6), period_start__lte=end)
+    )
+
+
+def _totals_annotations():
+    return {
+        'readings': Sum('readings'),
+        'high_risk_days': Sum('high_risk_days'),
+        **{name: Sum(name) for name in SUM_FIELDS},
+    }
+
+
+def summarize_totals(totals):
+    """Turn summed rollup columns into the averages/totals readers use"""
+    readings = totals.get('readings') or 0
+    if not readings:
+        return None
+    return {
+        'readings': readings,
+        'avg_temp': totals['temperature_sum'] / readings,
+        'avg_humidity': totals['humidity_sum'] / readings,
+        'total_rainfall': totals['rainfall_sum'],
+        'avg_wind_speed': totals['wind_speed_sum'] / readings,
+        'high_risk_days': totals['high_risk_days'] or 0,
+    }
+
+
+def window_summary(start, end, rollups=None):
+    """Weather summary over start..end from rollups (optionally pre-filtered by location)"""
+    rollups = WeatherRollup.objects.all() if rollups is None else rollups
+    return summarize_totals(rollups.filter(window_filter(start, end)).aggregate(**_totals_annotations()))
+
+
+def window_summary_by_location(start, end):
+    """Weather summaries over start..end keyed by location id"""
+    rows = WeatherRollup.objects.filter(window_filter(start, end)).order_by().values(
+        'location_id'
+    ).annotate(**_totals_annotations())
+    return {row['location_id']: summarize_totals(row) for row in rows}
+
+
+def daily_rollups(start, end, rollups=None):
+    """Day rollups in start..end ordered by date"""
+    rollups = WeatherRollup.objects.all() if rollups is None else rollups
+    return rollups.filter(
+        period='DAY', period_start__gte=start, period_start__lte=end
+    ).order_by('period_start', 'location_id')
@@ -1,3 +1,583 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.db.models import Avg, Count, Sum
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from . import feeds
+from .forms import WeatherDataForm
+from .feed_server import start_server
+from .feeds import fetch_weather
+from . import risk
+from .gapfill import (
+    INTERPOLATED, MAX_INTERPOLATION_GAP, MISSING, NEIGHBOUR,
+    fill_network, interpolate_gaps, neighbour_order,
+)
+from .imports import JobClaimLost, _commit_batch, claim_job, run_import_job
+from .models import HIGH_RISK_CONDITIONS, Location, ObservationBlock, WeatherData, WeatherImportJob, WeatherRollup
+from .observations import FIELDS, _merge, daily_summary
+from .rollups import refresh_rollups, window_filter, window_summary
+from .utils import (
+    bulk_upsert_weather, filter_by_location, get_weather_trend, import_weather_from_csv, parse_weather_row,
+)
+
+CSV = (
+    'date,location,temperature_avg,humidity,rainfall,wind_speed\n'
+    '2026-10-01,"Ludhiana, Punjab",25,80,6,3\n'
+    '2026-10-02,"Ludhiana, Punjab",26,82,0,2\n'
+    '2026-10-03,"Ludhiana, Punjab",27,,0,2\n'
+)
+
+
+class ImportJobClaimTests(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w') as csv_file:
+            csv_file.write(CSV)
+        self.addCleanup(lambda: os.path.exists(self.path) and os.remove(self.path))
+        self.job = WeatherImportJob.objects.create(file_path=self.path, original_name='weather.csv', file_size=len(CSV))
+
+    def make_stale(self):
+        WeatherImportJob.objects.filter(pk=self.job.pk).update(updated_at=timezone.now() - timedelta(minutes=5))
+
+    def test_run_import_job(self):
+        job = run_import_job(self.job.pk, batch_size=2)
+        self.assertEqual(job.status, 'COMPLETED')
+        self.assertEqual((job.rows_processed, job.imported_count, job.error_count), (3, 2, 1))
+        self.assertEqual(WeatherData.objects.count(), 2)
+        self.assertIsNone(run_import_job(self.job.pk))
+
+    def test_live_job_is_not_claimed_twice(self):
+        self.assertIsNotNone(claim_job(self.job.pk))
+        self.assertIsNone(claim_job(self.job.pk))
+
+    def test_stalled_worker_cannot_overwrite_new_owner(self):
+        stalled = WeatherImportJob.objects.get(pk=self.job.pk)
+        stalled.claim_token = claim_job(self.job.pk)
+        self.make_stale()
+        self.assertIsNotNone(claim_job(self.job.pk))
+
+        with self.assertRaises(JobClaimLost):
+            _commit_batch(stalled, [], 2, ['Row 2: bad'], 100)
+        job = WeatherImportJob.objects.get(pk=self.job.pk)
+        self.assertEqual((job.byte_offset, job.rows_processed, job.errors), (0, 0, []))
+
+    def test_status_does_not_restart_jobs(self):
+        self.make_stale()
+        with mock.patch('weather.imports.start_import_job') as start:
+            response = self.client.get(reverse('weather:weather_import_status', args=[self.job.pk]))
+        start.assert_not_called()
+        self.assertTrue(response.json()['is_resumable'])
+
+    def test_resume_restarts_stale_jobs_only(self):
+        url = reverse('weather:weather_import_resume', args=[self.job.pk])
+        with mock.patch('weather.imports.start_import_job') as start:
+            self.client.post(url)
+            start.assert_not_called()
+
+            self.make_stale()
+            self.client.post(url)
+            start.assert_called_once()
+
+
+class WeatherLocationKeyTests(TestCase):
+    """Spellings of one place share a (location_ref, date) row"""
+
+    def test_upsert_matches_canonical_location(self):
+        day = timezone.now().date()
+        bulk_upsert_weather([WeatherData(date=day, location='Ludhiana, Punjab', temperature_avg=25, humidity=80)])
+        bulk_upsert_weather([
+            WeatherData(date=day, location='ludhiana,  PUNJAB ', temperature_avg=26, humidity=70),
+            WeatherData(date=day, location='LUDHIANA, Punjab', temperature_avg=27, humidity=75),
+        ])
+
+        rows = filter_by_location(WeatherData.objects.all(), 'ludhiana')
+        self.assertEqual(list(rows.values_list('location', 'temperature_avg', 'humidity')), [('Ludhiana, Punjab', 27, 75)])
+        rollup = WeatherRollup.objects.get(period='DAY', period_start=day)
+        self.assertEqual((rollup.readings, rollup.humidity_sum), (1, 75))
+
+    def test_form_rejects_other_spelling_of_existing_row(self):
+        day = timezone.now().date()
+        existing = WeatherData.objects.create(date=day, location='Karnal, Haryana', temperature_avg=25, humidity=80)
+        data = {'date': day, 'location': ' karnal,  HARYANA', 'temperature_avg': 25, 'humidity': 80, 'rainfall': 0, 'wind_speed': 0}
+
+        self.assertFalse(WeatherDataForm(data).is_valid())
+        self.assertTrue(WeatherDataForm(data, instance=existing).is_valid())
+
+
+class RollupTests(TestCase):
+    """Day/week rollups and the windows composed from them"""
+
+    # Wednesday 2026-09-02 .. Tuesday 2026-09-29: 4 whole ISO weeks from 09-07
+    START = date(2026, 9, 2)
+
+    def make_days(self, count, location='Ludhiana, Punjab'):
+        """bulk_create bypasses save(), so no rollups are written"""
+        return WeatherData.objects.bulk_create([
+            WeatherData(
+                date=self.START + timedelta(days=i),
+                location=location,
+                location_ref=Location.objects.for_name(location),
+                temperature_avg=18 + i % 15,
+                humidity=60 + i % 35,
+                rainfall=i % 9,
+                wind_speed=2,
+            )
+            for i in range(count)
+        ])
+
+    def rollup_keys(self, queryset):
+        return list(queryset.order_by('period', 'period_start').values_list('period', 'period_start'))
+
+    def test_refresh_rollups(self):
+        rows = self.make_days(3)
+        self.assertFalse(WeatherRollup.objects.exists())
+
+        refresh_rollups([None, (None, self.START)] + [(row.location_ref_id, row.date.isoformat()) for row in rows])
+
+        days = WeatherRollup.objects.filter(period='DAY').order_by('period_start')
+        self.assertEqual(
+            [(day.period_start, day.readings, day.temperature_sum, day.rainfall_sum) for day in days],
+            [(row.date, 1, row.temperature_avg, row.rainfall) for row in rows],
+        )
+        week = WeatherRollup.objects.get(period='WEEK')
+        self.assertEqual((week.period_start, week.readings), (date(2026, 8, 31), 3))
+        self.assertEqual(week.humidity_sum, sum(row.humidity for row in rows))
+
+    def test_emptied_periods_are_deleted(self):
+        first, second = WeatherData.objects.filter(
+            pk__in=[row.pk for row in self.make_days(2)]
+        ).order_by('date')
+        refresh_rollups([(row.location_ref_id, row.date) for row in (first, second)])
+
+        first.delete()
+        self.assertEqual(self.rollup_keys(WeatherRollup.objects.all()), [
+            ('DAY', second.date), ('WEEK', date(2026, 8, 31)),
+        ])
+        self.assertEqual(WeatherRollup.objects.get(period='WEEK').readings, 1)
+
+        second.delete()
+        self.assertFalse(WeatherRollup.objects.exists())
+
+    def test_window_filter_splits_weeks_and_edge_days(self):
+        rows = self.make_days(35)
+        refresh_rollups([(row.location_ref_id, row.date) for row in rows])
+        end = date(2026, 9, 29)
+
+        self.assertEqual(self.rollup_keys(WeatherRollup.objects.filter(window_filter(self.START, end))), [
+            ('DAY', date(2026, 9, 2)), ('DAY', date(2026, 9, 3)), ('DAY', date(2026, 9, 4)),
+            ('DAY', date(2026, 9, 5)), ('DAY', date(2026, 9, 6)), ('DAY', date(2026, 9, 28)),
+            ('DAY', date(2026, 9, 29)),
+            ('WEEK', date(2026, 9, 7)), ('WEEK', date(2026, 9, 14)), ('WEEK', date(2026, 9, 21)),
+        ])
+        # No whole week inside: day rollups only
+        self.assertEqual(
+            self.rollup_keys(WeatherRollup.objects.filter(window_filter(date(2026, 9, 9), date(2026, 9, 15)))),
+            [('DAY', date(2026, 9, 9) + timedelta(days=i)) for i in range(7)],
+        )
+
+    def test_window_summary_matches_direct_aggregate(self):
+        rows = self.make_days(35) + self.make_days(20, location='Karnal, Haryana')
+        refresh_rollups([(row.location_ref_id, row.date) for row in rows])
+
+        for start, end in [
+            (self.START, self.START + timedelta(days=34)),
+            (date(2026, 9, 4), date(2026, 9, 17)),
+            (date(2026, 9, 7), date(2026, 9, 20)),
+            (date(2026, 9, 10), date(2026, 9, 12)),
+        ]:
+            with self.subTest(start=start, end=end):
+                expected = WeatherData.objects.filter(date__gte=start, date__lte=end).aggregate(
+                    readings=Count('id'),
+                    avg_temp=Avg('temperature_avg'),
+                    avg_humidity=Avg('humidity'),
+                    total_rainfall=Sum('rainfall'),
+                    high_risk_days=Count('id', filter=HIGH_RISK_CONDITIONS),
+                )
+                summary = window_summary(start, end)
+
+                self.assertEqual(summary['readings'], expected['readings'])
+                self.assertEqual(summary['high_risk_days'], expected['high_risk_days'])
+                self.assertEqual(summary['total_rainfall'], expected['total_rainfall'])
+                self.assertAlmostEqual(float(summary['avg_temp']), float(expected['avg_temp']))
+                self.assertAlmostEqual(float(summary['avg_humidity']), float(expected['avg_humidity']))
+
+
+class WeatherCSVImportTests(TestCase):
+    ROW = {'date': '2026-10-01', 'location': ' Ludhiana, Punjab ', 'temperature_avg': '25.5', 'humidity': '80'}
+
+    def test_parse_weather_row_applies_defaults(self):
+        record = parse_weather_row({**self.ROW, 'rainfall': '', 'soil_moisture': ' '})
+
+        self.assertEqual((record.date, record.location), (date(2026, 10, 1), 'Ludhiana, Punjab'))
+        self.assertEqual((record.temperature_avg, record.humidity), (Decimal('25.5'), Decimal('80')))
+        self.assertEqual((record.rainfall, record.wind_speed, record.soil_moisture, record.temperature_min), (0, 0, None, None))
+
+    def test_parse_weather_row_names_bad_column(self):
+        for row, message in [
+            ({**self.ROW, 'humidity': ''}, 'humidity: this column is required'),
+            ({key: value for key, value in self.ROW.items() if key != 'date'}, 'date: this column is required'),
+            ({**self.ROW, 'temperature_avg': 'warm'}, 'temperature_avg: “warm” value must be a decimal number.'),
+            ({**self.ROW, 'date': '2026-13-01'}, 'date:'),
+        ]:
+            with self.subTest(row=row):
+                with self.assertRaises(ValidationError) as raised:
+                    parse_weather_row(row)
+                self.assertTrue(raised.exception.messages[0].startswith(message), raised.exception.messages)
+
+    @mock.patch('time.monotonic', side_effect=[100.0, 102.0])
+    def test_import_result(self, monotonic):
+        result = import_weather_from_csv(io.BytesIO(CSV.encode()), batch_size=2)
+
+        self.assertEqual(result, {
+            'success': True,
+            'imported_count': 2,
+            'high_risk_count': 1,
+            'rows_processed': 3,
+            'elapsed_seconds': 2.0,
+            'rows_per_second': 2,
+            'errors': ['Row 4: humidity: this column is required'],
+        })
+
+    def test_reimport_updates_existing_values(self):
+        import_weather_from_csv(io.BytesIO(CSV.encode()))
+        updated = (
+            'date,location,temperature_avg,humidity,rainfall,wind_speed\n'
+            '2026-10-01,"ludhiana,  PUNJAB",22,65,0,4\n'
+        )
+        result = import_weather_from_csv(io.BytesIO(updated.encode()))
+
+        self.assertEqual((result['imported_count'], result['high_risk_count'], result['errors']), (1, 0, []))
+        self.assertEqual(
+            list(WeatherData.objects.order_by('date').values_list('location', 'temperature_avg', 'humidity', 'rainfall')),
+            [('Ludhiana, Punjab', 22, 65, 0), ('Ludhiana, Punjab', 26, 82, 0)],
+        )
+        rollup = WeatherRollup.objects.get(period='DAY', period_start=date(2026, 10, 1))
+        self.assertEqual((rollup.readings, rollup.temperature_sum, rollup.high_risk_days), (1, 22, 0))
+
+
+class WeatherAPITests(TestCase):
+    def test_decimals_are_numbers(self):
+        WeatherData.objects.create(date=timezone.now().date(), location='Ludhiana, Punjab', temperature_avg='25.50', humidity=80)
+        response = self.client.get(reverse('weather:weather_analysis_api'), {'days': 7})
+
+        self.assertEqual(response.json()['avg_temperature'], 25.5)
+
+
+class WeatherTrendTests(TestCase):
+    def test_locations_are_downsampled_to_bucket_limit(self):
+        today = timezone.now().date()
+        start = today - timedelta(days=365)
+        records = [
+            WeatherData(date=start + timedelta(days=i), location='Ludhiana, Punjab', temperature_avg=25, humidity=70)
+            for i in range(366)
+        ]
+        # Karnal reports days 100-200 only, peaking on its last day
+        records += [
+            WeatherData(date=start + timedelta(days=i), location='Karnal, Haryana', temperature_avg=40 if i == 200 else 20, humidity=60)
+            for i in range(100, 201)
+        ]
+        records[0].temperature_avg = 10
+        bulk_upsert_weather(records)
+
+        trend = get_weather_trend(days=365, max_points=30)
+        bucket_days = trend['bucket_days']
+        self.assertEqual(bucket_days, 13)
+        self.assertLessEqual(len(trend['dates']), 30)
+        self.assertEqual(trend['dates'][0], start.strftime('%b %d, %Y'))
+
+        karnal, ludhiana = trend['locations']
+        for location in (karnal, ludhiana):
+            for name in ('temperatures', 'temperature_min', 'temperature_max', 'humidity', 'rainfall', 'risk_status'):
+                self.assertEqual(len(location[name]), len(trend['dates']), (location['name'], name))
+
+        # Ludhiana spans the whole range, including the first-day extreme
+        self.assertNotIn(None, ludhiana['temperatures'])
+        self.assertEqual(ludhiana['temperature_min'][0], 10)
+
+        # Karnal's series starts and ends in the buckets holding its first and last days
+        present = [i for i, value in enumerate(karnal['temperatures']) if value is not None]
+        self.assertEqual((present[0], present[-1]), (100 // bucket_days, 200 // bucket_days))
+        self.assertEqual(present, list(range(present[0], present[-1] + 1)))
+        self.assertEqual(karnal['temperature_max'][present[-1]], 40)
+
+
+class RiskScoringTests(SimpleTestCase):
+    """Scores, flags and levels either side of each threshold"""
+
+    # (temperature, humidity, rainfall, score, level, flags)
+    CASES = [
+        (19.99, 50, 0, 0, 'LOW', 0),
+        (20, 50, 0, 30, 'LOW', risk.FLAG_OPTIMAL_TEMP),
+        (30, 50, 0, 30, 'LOW', risk.FLAG_OPTIMAL_TEMP),
+        (30.01, 50, 0, 0, 'LOW', risk.FLAG_HIGH_TEMP),
+        (15, 50, 0, 0, 'LOW', 0),
+        (14.99, 50, 0, 0, 'LOW', risk.FLAG_LOW_TEMP),
+        (10, 60, 0, 0, 'LOW', risk.FLAG_LOW_TEMP),
+        (10, 60.01, 0, 0, 'LOW', risk.FLAG_LOW_TEMP | risk.FLAG_MODERATE_HUMIDITY),
+        (10, 70, 0, 0, 'LOW', risk.FLAG_LOW_TEMP | risk.FLAG_MODERATE_HUMIDITY),
+        (10, 70.01, 0, 40, 'MEDIUM', risk.FLAG_LOW_TEMP | risk.FLAG_HIGH_HUMIDITY),
+        (10, 50, 5, 0, 'LOW', risk.FLAG_LOW_TEMP),
+        (10, 50, 5.01, 30, 'LOW', risk.FLAG_LOW_TEMP | risk.FLAG_RAINFALL),
+        (10, 50, 10.01, 30, 'LOW', risk.FLAG_LOW_TEMP | risk.FLAG_RAINFALL | risk.FLAG_HEAVY_RAINFALL),
+        (25, 50, 6, 60, 'MEDIUM', risk.FLAG_OPTIMAL_TEMP | risk.FLAG_RAINFALL),
+        (25, 71, 0, 70, 'HIGH', risk.FLAG_OPTIMAL_TEMP | risk.FLAG_HIGH_HUMIDITY),
+        (25, 71, 6, 100, 'HIGH', risk.HIGH_RISK_FLAGS),
+    ]
+
+    def test_score_weather_boundaries(self):
+        for temperature, humidity, rainfall, score, level, flags in self.CASES:
+            with self.subTest(temperature=temperature, humidity=humidity, rainfall=rainfall):
+                result = risk.score_weather(temperature, humidity, rainfall)
+                self.assertEqual((int(result.scores), str(result.levels), int(result.flags)), (score, level, flags))
+
+    def test_score_weather_arrays_match_scalars(self):
+        temperature, humidity, rainfall, scores, levels, flags = zip(*self.CASES)
+        result = risk.score_weather(temperature, humidity, [Decimal(str(value)) for value in rainfall])
+
+        self.assertEqual(result.scores.tolist(), list(scores))
+        self.assertEqual(result.levels.tolist(), list(levels))
+        self.assertEqual(result.flags.tolist(), list(flags))
+
+    def test_weekly_rainfall_threshold(self):
+        weekly = risk.score_weather(25, 50, [50, 50.01], rainfall_threshold=risk.WEEKLY_RAINFALL_RISK)
+        self.assertEqual(weekly.scores.tolist(), [30, 60])
+        self.assertEqual((weekly.flags & risk.FLAG_RAINFALL).tolist(), [0, risk.FLAG_RAINFALL])
+
+    def test_is_high_risk_needs_every_condition(self):
+        cases = [
+            ((25, 71, 6), True),
+            ((20, 70.01, 5.01), True),
+            ((30, 90, 20), True),
+            ((19.99, 71, 6), False),
+            ((30.01, 71, 6), False),
+            ((25, 70, 6), False),
+            ((25, 71, 5), False),
+        ]
+        temperature, humidity, rainfall = zip(*(values for values, _ in cases))
+        flags = risk.score_weather(temperature, humidity, rainfall).flags
+
+        self.assertEqual(risk.is_high_risk(flags).tolist(), [expected for _, expected in cases])
+
+    def test_annotate_risk(self):
+        records = [
+            WeatherData(temperature_avg=Decimal('20.00'), humidity=Decimal('70.01'), rainfall=Decimal('5.01')),
+            WeatherData(temperature_avg=Decimal('30.00'), humidity=Decimal('70.00'), rainfall=Decimal('6.00')),
+            WeatherData(temperature_avg=Decimal('14.99'), humidity=Decimal('90.00'), rainfall=Decimal('0.00')),
+        ]
+
+        annotated = risk.annotate_risk(iter(records))
+        self.assertEqual(
+            [(record.risk_score, record.risk_level, record.high_risk) for record in annotated],
+            [(100, 'HIGH', True), (60, 'MEDIUM', False), (40, 'MEDIUM', False)],
+        )
+        self.assertEqual([type(record.risk_score) for record in annotated], [int] * 3)
+
+
+class ObservationBlockTests(SimpleTestCase):
+    """Packed sub-daily readings, merging and the daily rollup"""
+
+    def block(self, seconds, values):
+        return ObservationBlock(count=len(seconds), data=ObservationBlock.pack(seconds, values))
+
+    def readings(self, *rows):
+        """(fields x readings) float32 array from one tuple per reading"""
+        return np.array(rows, dtype=np.float32).T
+
+    def test_pack_unpack_round_trip(self):
+        seconds = [0, 3600, 86399]
+        values = self.readings(
+            (21.5, 80, 0, 2.5, np.nan),
+            (-3.25, 100, 12.75, 0, 35),
+            (45, 0.5, np.nan, np.nan, np.nan),
+        )
+
+        unpacked_seconds, columns = self.block(seconds, values).unpack()
+        self.assertEqual(unpacked_seconds.tolist(), seconds)
+        self.assertEqual(list(columns), FIELDS)
+        np.testing.assert_array_equal(np.stack([columns[field] for field in FIELDS]), values)
+
+    def test_empty_block_round_trip(self):
+        seconds, columns = self.block([], np.empty((len(FIELDS), 0))).unpack()
+        self.assertEqual(len(seconds), 0)
+        self.assertTrue(all(len(column) == 0 for column in columns.values()))
+
+    def test_merge_keeps_stored_readings_at_other_timestamps(self):
+        stored = self.block([0, 7200], self.readings((20, 80, 0, 1, 30), (22, 78, 1, 2, 30)))
+
+        seconds, values = _merge(stored, np.array([3600, 10800]), self.readings((21, 79, 0, 1, 30), (23, 75, 0, 3, 30)))
+        self.assertEqual(seconds.tolist(), [0, 3600, 7200, 10800])
+        self.assertEqual(values[FIELDS.index('temperature')].tolist(), [20, 21, 22, 23])
+
+    def test_merge_new_readings_replace_equal_timestamps(self):
+        stored = self.block([0, 3600], self.readings((20, 80, 0, 1, 30), (22, 78, 1, 2, 30)))
+
+        seconds, values = _merge(stored, np.array([3600]), self.readings((25, np.nan, 4, 2, 30)))
+        self.assertEqual(seconds.tolist(), [0, 3600])
+        # The whole reading is replaced, including values it lacks
+        np.testing.assert_array_equal(values[:, 1], np.array([25, np.nan, 4, 2, 30], dtype=np.float32))
+
+        # Within one batch the later duplicate wins
+        seconds, values = _merge(None, np.array([0, 0, 60]), self.readings((20, 80, 0, 1, 30), (21, 80, 0, 1, 30), (22, 80, 0, 1, 30)))
+        self.assertEqual(seconds.tolist(), [0, 60])
+        self.assertEqual(values[FIELDS.index('temperature')].tolist(), [21, 22])
+
+    def test_daily_summary(self):
+        summary = daily_summary(self.readings(
+            (20, 80, 1.5, np.nan, np.nan),
+            (30, 60, np.nan, np.nan, np.nan),
+            (np.nan, 70, 2.25, np.nan, np.nan),
+        ))
+
+        self.assertEqual(summary, {
+            'temperature_avg': Decimal('25.0'),
+            'temperature_min': Decimal('20.0'),
+            'temperature_max': Decimal('30.0'),
+            'humidity': Decimal('70.0'),
+            'rainfall': Decimal('3.75'),
+            'wind_speed': 0,
+            'soil_moisture': None,
+        })
+
+    def test_daily_summary_needs_temperature_and_humidity(self):
+        self.assertIsNone(daily_summary(self.readings((np.nan, 80, 1, 2, 30))))
+        self.assertIsNone(daily_summary(self.readings((20, np.nan, 1, 2, 30))))
+
+
+class NeighbourOrderTests(SimpleTestCase):
+    def test_ranks_by_distance_with_region_fallback(self):
+        locations = [
+            Location(name='Ludhiana', region='Punjab', latitude=30.90, longitude=75.85),
+            Location(name='Jalandhar', region='Punjab', latitude=31.33, longitude=75.58),
+            Location(name='Moga', region='Punjab'),
+            Location(name='Chennai', region='Tamil Nadu', latitude=13.08, longitude=80.27),
+        ]
+
+        self.assertEqual(neighbour_order(locations).tolist(), [
+            [1, 2, -1],   # Jalandhar ~55 km, then Moga by region
+            [0, 2, -1],
+            [0, 1, -1],   # no coordinates: same-region locations only
+            [-1, -1, -1],  # Ludhiana is ~2000 km away
+        ])
+
+
+class GapFillTests(SimpleTestCase):
+    """Interpolation limits, fill order and flags of fill_network"""
+
+    def test_interpolation_bridges_short_gaps_only(self):
+        nan = np.nan
+        short = [10] + [nan] * MAX_INTERPOLATION_GAP + [22]
+        long = [10] + [nan] * (MAX_INTERPOLATION_GAP + 1) + [24]
+        grid = np.array([short + [nan], long])
+
+        filled, fill = interpolate_gaps(grid, np.isnan(grid))
+        self.assertEqual(filled[0, :-1].tolist(), [10, 12, 14, 16, 18, 20, 22])
+        self.assertFalse(fill[1].any())
+        self.assertTrue(np.isnan(filled[1, 1:-1]).all())
+
+    def test_edge_gaps_are_left_unfilled(self):
+        nan = np.nan
+        grid = np.array([[nan, nan, 10, 12, nan], [nan, 5, nan, nan, nan]])
+
+        filled, fill = interpolate_gaps(grid, np.isnan(grid))
+        self.assertFalse(fill.any())
+        np.testing.assert_array_equal(filled, grid)
+
+    def test_rainfall_prefers_neighbour_over_interpolation(self):
+        nan = np.nan
+        grids = {
+            'temperature_avg': np.array([[20, nan, 24], [30, 31, 32]]),
+            'rainfall': np.array([[0, nan, 0], [8, 40, 2]]),
+        }
+        missing = np.array([[False, True, False], [False, False, False]])
+        neighbours = np.array([[1], [0]])
+
+        filled, flags = fill_network(grids, missing, neighbours)
+        self.assertEqual(filled['temperature_avg'][0].tolist(), [20, 22, 24])
+        self.assertEqual(filled['rainfall'][0].tolist(), [0, 40, 0])
+        self.assertEqual(flags.tolist(), [[0, INTERPOLATED | NEIGHBOUR, 0], [0, 0, 0]])
+
+    def test_optional_variables_do_not_flag_missing(self):
+        nan = np.nan
+        grids = {
+            'temperature_avg': np.array([[20, nan, 24, nan]]),
+            'soil_moisture': np.array([[nan, nan, nan, nan]]),
+        }
+        missing = np.array([[False, True, False, True]])
+        no_neighbours = np.full((1, 0), -1)
+
+        filled, flags = fill_network(grids, missing, no_neighbours, optional={'soil_moisture'})
+        self.assertEqual(flags.tolist(), [[0, INTERPOLATED, 0, MISSING]])
+        self.assertTrue(np.isnan(filled['soil_moisture']).all())
+
+        _, flags = fill_network(grids, missing, no_neighbours)
+        self.assertEqual(flags.tolist(), [[0, INTERPOLATED | MISSING, 0, MISSING]])
+
+
+class FeedFetchTests(TestCase):
+    """fetch_weather against the stand-in feed server on a free port"""
+
+    def start(self, **options):
+        server = start_server(**options)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def fetch(self, server, locations, days, **options):
+        start = timezone.now().date() - timedelta(days=days - 1)
+        options = {'base_url': server.url, 'rate_limit': None, 'backoff': 0.01, **options}
+        return fetch_weather(locations, start, timezone.now().date(), **options)
+
+    def test_splits_range_into_windows_and_upserts(self):
+        server = self.start()
+        with mock.patch.object(feeds, 'bulk_upsert_weather', wraps=bulk_upsert_weather) as upsert:
+            result = self.fetch(server, ['Ludhiana, Punjab', 'Karnal, Haryana'], 70)
+
+        # 70 days in windows of at most 31 days, per location
+        self.assertEqual(server.statuses, {200: 6})
+        self.assertEqual((result['imported_count'], result['errors']), (140, []))
+        upsert.assert_called_once()
+        self.assertEqual(WeatherData.objects.filter(location_ref__isnull=False).count(), 140)
+
+        self.fetch(server, ['ludhiana, punjab'], 70)
+        self.assertEqual(WeatherData.objects.count(), 140)
+
+    def test_retries_injected_failures(self):
+        server = self.start(fail_first=2)
+        result = self.fetch(server, ['Ludhiana, Punjab'], 5, retries=2)
+
+        self.assertEqual(server.statuses, {503: 2, 200: 1})
+        self.assertEqual((result['imported_count'], result['errors']), (5, []))
+
+    def test_gives_up_after_retries(self):
+        server = self.start(fail_first=3)
+        result = self.fetch(server, ['Ludhiana, Punjab'], 5, retries=2)
+
+        self.assertEqual(server.statuses, {503: 3})
+        self.assertEqual(result['imported_count'], 0)
+        self.assertIn('HTTP 503', result['errors'][0])
+
+    def test_waits_for_retry_after_when_rate_limited(self):
+        server = self.start(rate_limit=2)
+        result = self.fetch(server, ['Ludhiana, Punjab'], 124, max_connections=4)
+
+        self.assertEqual(server.statuses[200], 4)
+        self.assertGreater(server.statuses[429], 0)
+        self.assertEqual((result['imported_count'], result['errors']), (124, []))
+        self.assertGreaterEqual(result['elapsed_seconds'], 1)
+
+    def test_client_rate_limit_stays_under_server_limit(self):
+        server = self.start(rate_limit=6)
+        result = self.fetch(server, ['Ludhiana, Punjab', 'Karnal, Haryana'], 124, rate_limit=3)
+
+        self.assertEqual(server.statuses, {200: 8})
+        self.assertEqual(result['errors'], [])
+        self.assertGreaterEqual(result['elapsed_seconds'], 1)
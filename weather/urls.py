@@ -9,5 +9,11 @@ urlpatterns = [
     path('<int:pk>/update/', views.weather_update, name='weather_update'),
     path('<int:pk>/delete/', views.weather_delete, name='weather_delete'),
     path('import/', views.weather_import, name='weather_import'),
+    path('import/<int:pk>/', views.weather_import_progress, name='weather_import_progress'),
+    path('import/<int:pk>/status/', views.weather_import_status, name='weather_import_status'),
+    path('import/<int:pk>/resume/', views.weather_import_resume, name='weather_import_resume'),
+    path('fetch/', views.weather_fetch, name='weather_fetch'),
     path('analysis/', views.weather_analysis, name='weather_analysis'),
+    path('api/trend/', views.weather_trend_api, name='weather_trend_api'),
+    path('api/analysis/', views.weather_analysis_api, name='weather_analysis_api'),
 ]
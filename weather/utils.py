@@ -2,8 +2,50 @@
 Weather analysis utilities for environmental condition assessment
 """
 from datetime import timedelta
+from django.core.cache import cache
+from django.db.models import Count, Max
 from django.utils import timezone
-from .models import WeatherData
+from .models import (
+    WeatherData, WeatherRollup, Location,
+    LOCATION_CACHE_KEY, normalize_location_name,
+)
+from .rollups import refresh_rollups, window_summary, daily_rollups
+from . import risk
+from .risk import score_weather, score_records, is_high_risk, describe_flags
+
+
+def filter_by_location(queryset, location, field='location_ref'):
+    """
+    Restrict a queryset to locations whose name contains the search text
+
+    Matching runs against the small Location table; the large table is then
+    filtered on its indexed foreign key.
+    """
+    if not location:
+        return queryset
+    return queryset.filter(**{f'{field}__in': Location.objects.matching(location)})
+
+
+def get_location_names(timeout=3600):
+    """Cached list of known location names for filter dropdowns"""
+    return cache.get_or_set(
+        LOCATION_CACHE_KEY,
+        lambda: list(Location.objects.order_by('name').values_list('name', flat=True)),
+        timeout,
+    )
+
+
+def weather_data_version(location=None):
+    """
+    (latest updated_at, record count) of the weather data for a location
+
+    The count changes when records are deleted, which updated_at alone
+    would miss.
+    """
+    version = filter_by_location(WeatherData.objects.all(), location).aggregate(
+        latest=Max('updated_at'), records=Count('id')
+    )
+    return version['latest'], version['records']
 
 
 def analyze_conditions(location=None, days=7):
@@ -14,28 +56,24 @@ def analyze_conditions(location=None, days=7):
     end_date = timezone.now().date()
     start_date = end_date - timedelta(days=days)
     
-    # Get weather data
-    weather_query = WeatherData.objects.filter(date__gte=start_date, date__lte=end_date)
-    if location:
-        weather_query = weather_query.filter(location__icontains=location)
+    # Sum pre-aggregated rollups: whole weeks plus the days at the edges
+    rollups = filter_by_location(WeatherRollup.objects.all(), location, field='location')
+    summary = window_summary(start_date, end_date, rollups)
     
-    weather_data = list(weather_query.order_by('-date'))
-    
-    if not weather_data:
+    if not summary:
         return {
             'has_data': False,
             'message': 'No weather data available for the specified period'
         }
     
-    # Calculate metrics
-    avg_temp = sum(w.temperature_avg for w in weather_data) / len(weather_data)
-    avg_humidity = sum(w.humidity for w in weather_data) / len(weather_data)
-    total_rainfall = sum(w.rainfall for w in weather_data)
-    avg_wind_speed = sum(w.wind_speed for w in weather_data) / len(weather_data)
+    avg_temp = summary['avg_temp']
+    avg_humidity = summary['avg_humidity']
+    total_rainfall = summary['total_rainfall']
+    avg_wind_speed = summary['avg_wind_speed']
     
     # Risk assessment
-    high_risk_days = sum(1 for w in weather_data if w.is_high_risk_conditions())
-    risk_percentage = (high_risk_days / len(weather_data)) * 100
+    high_risk_days = summary['high_risk_days']
+    risk_percentage = (high_risk_days / summary['readings']) * 100
     
     # Determine overall risk level
     if risk_percentage >= 50:
@@ -49,17 +87,20 @@ def analyze_conditions(location=None, days=7):
         risk_color = 'success'
     
     # Identify risk factors
+    flags = int(score_weather(
+        avg_temp, avg_humidity, total_rainfall, rainfall_threshold=risk.WEEKLY_RAINFALL_RISK
+    ).flags)
     risk_factors = []
-    if avg_humidity > 70:
-        risk_factors.append('High average humidity (>70%)')
-    if total_rainfall > 50:
+    if flags & risk.FLAG_HIGH_HUMIDITY:
+        risk_factors.append(f'High average humidity (>{risk.HIGH_HUMIDITY}%)')
+    if flags & risk.FLAG_RAINFALL:
         risk_factors.append(f'Significant rainfall ({total_rainfall:.1f}mm in {days} days)')
-    if 20 <= avg_temp <= 30:
+    if flags & risk.FLAG_OPTIMAL_TEMP:
         risk_factors.append('Optimal temperature range for pest activity')
     
     return {
         'has_data': True,
-        'days_analyzed': len(weather_data),
+        'days_analyzed': summary['readings'],
         'avg_temperature': round(avg_temp, 1),
         'avg_humidity': round(avg_humidity, 1),
         'total_rainfall': round(total_rainfall, 1),
@@ -72,33 +113,116 @@ def analyze_conditions(location=None, days=7):
     }
 
 
-def get_weather_trend(location=None, days=30):
+def get_weather_trend(location=None, days=30, max_points=90):
     """
     Get weather trend data for charting
+    
+    Daily rollups are grouped per location and averaged into at most
+    max_points equal-width date buckets, so the payload stays bounded for
+    long ranges. Top-level series combine the selected locations (weighted
+    by readings); 'locations' holds the same series per location, with None
+    where a location has no data in a bucket. Rainfall is the mean daily
+    rainfall of the bucket, and temperature_min/max keep the extremes of the
+    daily averages that were folded into each point.
     """
+    import math
+    import numpy as np
+    
     end_date = timezone.now().date()
     start_date = end_date - timedelta(days=days)
     
-    weather_query = WeatherData.objects.filter(date__gte=start_date, date__lte=end_date)
-    if location:
-        weather_query = weather_query.filter(location__icontains=location)
+    total_days = days + 1
+    bucket_days = max(1, math.ceil(total_days / max(1, max_points)))
+    bucket_count = math.ceil(total_days / bucket_days)
     
-    weather_data = weather_query.order_by('date')
+    rollups = filter_by_location(WeatherRollup.objects.all(), location, field='location')
+    rows = list(daily_rollups(start_date, end_date, rollups).values_list(
+        'location__name', 'period_start', 'readings',
+        'temperature_sum', 'humidity_sum', 'rainfall_sum', 'high_risk_days'
+    ))
     
     trend_data = {
         'dates': [],
         'temperatures': [],
+        'temperature_min': [],
+        'temperature_max': [],
         'humidity': [],
         'rainfall': [],
         'risk_status': [],
+        'bucket_days': bucket_days,
+        'locations': [],
     }
+    if not rows:
+        return trend_data
     
-    for weather in weather_data:
-        trend_data['dates'].append(weather.date.strftime('%b %d'))
-        trend_data['temperatures'].append(float(weather.temperature_avg))
-        trend_data['humidity'].append(float(weather.humidity))
-        trend_data['rainfall'].append(float(weather.rainfall))
-        trend_data['risk_status'].append(1 if weather.is_high_risk_conditions() else 0)
+    names = sorted({row[0] for row in rows})
+    location_index = {name: i for i, name in enumerate(names)}
+    cells = (
+        np.array([location_index[row[0]] for row in rows]),
+        np.array([(row[1] - start_date).days // bucket_days for row in rows]),
+    )
+    readings, temperature, humidity, rainfall, high_risk = (
+        np.array([float(row[i]) for row in rows]) for i in range(2, 7)
+    )
+    
+    shape = (len(names), bucket_count)
+    
+    def bucket_sum(values):
+        grid = np.zeros(shape)
+        np.add.at(grid, cells, values)
+        return grid
+    
+    sums = {
+        'readings': bucket_sum(readings),
+        'temperature': bucket_sum(temperature),
+        'humidity': bucket_sum(humidity),
+        'rainfall': bucket_sum(rainfall),
+        'high_risk': bucket_sum(high_risk),
+    }
+    daily_temperature = temperature / readings
+    temperature_min = np.full(shape, np.inf)
+    temperature_max = np.full(shape, -np.inf)
+    np.minimum.at(temperature_min, cells, daily_temperature)
+    np.maximum.at(temperature_max, cells, daily_temperature)
+    
+    # Drop buckets without any reading so the chart has no empty labels
+    keep = sums['readings'].sum(axis=0) > 0
+    
+    def series(values, counts):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            averaged = values / counts
+        return [round(float(v), 2) if count else None for v, count in zip(averaged[keep], counts[keep])]
+    
+    def extremes(values, counts):
+        return [round(float(v), 2) if count else None for v, count in zip(values[keep], counts[keep])]
+    
+    total_readings = sums['readings'].sum(axis=0)
+    date_format = '%b %d' if days < 365 else '%b %d, %Y'
+    trend_data['dates'] = [
+        (start_date + timedelta(days=int(i) * bucket_days)).strftime(date_format)
+        for i in np.flatnonzero(keep)
+    ]
+    trend_data['temperatures'] = series(sums['temperature'].sum(axis=0), total_readings)
+    trend_data['temperature_min'] = extremes(temperature_min.min(axis=0), total_readings)
+    trend_data['temperature_max'] = extremes(temperature_max.max(axis=0), total_readings)
+    trend_data['humidity'] = series(sums['humidity'].sum(axis=0), total_readings)
+    trend_data['rainfall'] = series(sums['rainfall'].sum(axis=0), total_readings)
+    trend_data['risk_status'] = [1 if v > 0 else 0 for v in sums['high_risk'].sum(axis=0)[keep]]
+    
+    for name, i in location_index.items():
+        counts = sums['readings'][i]
+        trend_data['locations'].append({
+            'name': name,
+            'temperatures': series(sums['temperature'][i], counts),
+            'temperature_min': extremes(temperature_min[i], counts),
+            'temperature_max': extremes(temperature_max[i], counts),
+            'humidity': series(sums['humidity'][i], counts),
+            'rainfall': series(sums['rainfall'][i], counts),
+            'risk_status': [
+                (1 if risk > 0 else 0) if count else None
+                for risk, count in zip(sums['high_risk'][i][keep], counts[keep])
+            ],
+        })
     
     return trend_data
 
@@ -107,47 +231,15 @@ def check_pest_favorable_conditions(temperature, humidity, rainfall):
     """
     Check if current conditions are favorable for pest outbreaks
     Returns dict with assessment details
+    
+    For many readings at once, call risk.score_weather() with arrays.
     """
-    favorable_factors = []
-    warnings = []
-    
-    # Temperature check
-    if 20 <= temperature <= 30:
-        favorable_factors.append('Temperature is in optimal range for pest activity (20-30°C)')
-    elif temperature > 30:
-        warnings.append('High temperature may reduce some pest activity')
-    elif temperature < 15:
-        warnings.append('Low temperature may slow pest development')
-    
-    # Humidity check
-    if humidity > 70:
-        favorable_factors.append('High humidity favors fungal diseases and many pests')
-    elif humidity > 60:
-        favorable_factors.append('Moderate humidity - some pest risk')
-    
-    # Rainfall check
-    if rainfall > 10:
-        favorable_factors.append('Recent significant rainfall increases disease risk')
-    
-    # Overall assessment
-    risk_score = 0
-    if 20 <= temperature <= 30:
-        risk_score += 30
-    if humidity > 70:
-        risk_score += 40
-    if rainfall > 5:
-        risk_score += 30
-    
-    if risk_score >= 70:
-        risk_level = 'HIGH'
-    elif risk_score >= 40:
-        risk_level = 'MEDIUM'
-    else:
-        risk_level = 'LOW'
+    assessment = score_weather(temperature, humidity, rainfall)
+    favorable_factors, warnings = describe_flags(assessment.flags)
     
     return {
-        'risk_score': risk_score,
-        'risk_level': risk_level,
+        'risk_score': int(assessment.scores),
+        'risk_level': str(assessment.levels),
         'favorable_factors': favorable_factors,
         'warnings': warnings,
     }
@@ -163,65 +255,161 @@ def get_weather_alerts(days=7):
     weather_data = WeatherData.objects.filter(
         date__gte=start_date,
         date__lte=end_date
-    ).order_by('-date')
+    ).high_risk().order_by('-date')
     
     alerts = []
     
     for weather in weather_data:
-        if weather.is_high_risk_conditions():
-            alert = {
-                'date': weather.date,
-                'location': weather.location,
-                'temperature': weather.temperature_avg,
-                'humidity': weather.humidity,
-                'rainfall': weather.rainfall,
-                'message': f'High-risk conditions detected at {weather.location} on {weather.date}'
-            }
-            alerts.append(alert)
+        alert = {
+            'date': weather.date,
+            'location': weather.location,
+            'temperature': weather.temperature_avg,
+            'humidity': weather.humidity,
+            'rainfall': weather.rainfall,
+            'message': f'High-risk conditions detected at {weather.location} on {weather.date}'
+        }
+        alerts.append(alert)
     
     return alerts
 
 
-def import_weather_from_csv(csv_file):
+WEATHER_IMPORT_FIELDS = [
+    'temperature_avg', 'temperature_min', 'temperature_max',
+    'humidity', 'rainfall', 'wind_speed', 'soil_moisture',
+]
+
+# Columns that may be missing or blank in the CSV, with the value to use
+WEATHER_IMPORT_DEFAULTS = {
+    'temperature_min': None,
+    'temperature_max': None,
+    'rainfall': 0,
+    'wind_speed': 0,
+    'soil_moisture': None,
+}
+
+
+def parse_weather_row(row):
+    """
+    Validate one CSV row and return an unsaved WeatherData
+
+    Raises ValidationError with a message naming the missing or invalid column.
+    """
+    from django.core.exceptions import ValidationError
+    
+    values = {}
+    for name in ['date', 'location'] + WEATHER_IMPORT_FIELDS:
+        raw = row.get(name)
+        raw = raw.strip() if isinstance(raw, str) else raw
+        if raw in (None, ''):
+            if name not in WEATHER_IMPORT_DEFAULTS:
+                raise ValidationError(f'{name}: this column is required')
+            values[name] = WEATHER_IMPORT_DEFAULTS[name]
+            continue
+        
+        field = WeatherData._meta.get_field(name)
+        try:
+            values[name] = field.clean(raw, None)
+        except ValidationError as e:
+            raise ValidationError(f'{name}: {"; ".join(e.messages)}')
+    
+    return WeatherData(**values)
+
+
+def bulk_upsert_weather(records):
+    """
+    Insert or update WeatherData rows in one statement
+
+    Rows are matched on (location_ref, date), so different spellings of a
+    location update the same row; the last record wins when a batch repeats
+    a key. Returns the number of rows written.
+    """
+    locations = Location.objects.resolve({record.location for record in records})
+    
+    unique = {}
+    for record in records:
+        record.location_ref = locations.get(normalize_location_name(record.location))
+        unique[(record.location_ref_id, record.date)] = record
+    
+    WeatherData.objects.bulk_create(
+        unique.values(),
+        update_conflicts=True,
+        unique_fields=['location_ref', 'date'],
+        update_fields=WEATHER_IMPORT_FIELDS + ['updated_at'],
+    )
+    refresh_rollups(unique)
+    return len(unique)
+
+
+def count_high_risk(records):
+    """Number of records meeting every high-risk condition, scored in one call"""
+    return int(is_high_risk(score_records(records).flags).sum())
+
+
+def import_weather_from_csv(csv_file, batch_size=1000):
     """
     Import weather data from CSV file
     Expected columns: date, location, temperature_avg, humidity, rainfall, wind_speed
+    Optional columns: temperature_min, temperature_max, soil_moisture
+    
+    The file is read row by row and written in batches, one transaction per
+    batch. Rows for an existing location and date are updated instead of failing.
     """
     import csv
+    import time
     from io import TextIOWrapper
+    from django.core.exceptions import ValidationError
+    from django.db import transaction
     
     imported_count = 0
+    high_risk_count = 0
+    rows_processed = 0
     errors = []
+    started = time.monotonic()
+    
+    def flush(batch):
+        nonlocal high_risk_count
+        high_risk_count += count_high_risk(batch)
+        with transaction.atomic():
+            return bulk_upsert_weather(batch)
     
     try:
         # Decode the file
-        file_data = TextIOWrapper(csv_file, encoding='utf-8')
+        file_data = TextIOWrapper(csv_file, encoding='utf-8-sig')
         reader = csv.DictReader(file_data)
         
+        batch = []
         for row_num, row in enumerate(reader, start=2):
+            rows_processed += 1
             try:
-                weather_data = WeatherData(
-                    date=row['date'],
-                    location=row['location'],
-                    temperature_avg=float(row['temperature_avg']),
-                    humidity=float(row['humidity']),
-                    rainfall=float(row.get('rainfall', 0)),
-                    wind_speed=float(row.get('wind_speed', 0)),
-                )
-                weather_data.save()
-                imported_count += 1
-            except Exception as e:
-                errors.append(f'Row {row_num}: {str(e)}')
+                batch.append(parse_weather_row(row))
+            except ValidationError as e:
+                errors.append(f'Row {row_num}: {"; ".join(e.messages)}')
+                continue
+            
+            if len(batch) >= batch_size:
+                imported_count += flush(batch)
+                batch = []
         
-        return {
-            'success': True,
-            'imported_count': imported_count,
-            'errors': errors
-        }
+        if batch:
+            imported_count += flush(batch)
     
     except Exception as e:
+        errors.append(f'File error: {str(e)}')
         return {
             'success': False,
-            'imported_count': 0,
-            'errors': [f'File error: {str(e)}']
+            'imported_count': imported_count,
+            'high_risk_count': high_risk_count,
+            'rows_processed': rows_processed,
+            'errors': errors
         }
+    
+    elapsed = time.monotonic() - started
+    return {
+        'success': True,
+        'imported_count': imported_count,
+        'high_risk_count': high_risk_count,
+        'rows_processed': rows_processed,
+        'elapsed_seconds': round(elapsed, 2),
+        'rows_per_second': round(rows_processed / elapsed) if elapsed else rows_processed,
+        'errors': errors
+    }
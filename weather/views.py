@@ -1,10 +1,23 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
 from django.db.models import Avg
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition, require_GET
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+import hashlib
 import json
-from .models import WeatherData
-from .forms import WeatherDataForm, WeatherImportForm
-from .utils import analyze_conditions, get_weather_trend, get_weather_alerts
+from .models import WeatherData, WeatherImportJob
+from .risk import annotate_risk
+from .forms import WeatherAPIForm, WeatherDataForm, WeatherImportForm
+from .utils import (
+    analyze_conditions, get_weather_trend, get_weather_alerts,
+    filter_by_location, get_location_names, weather_data_version,
+)
 
 
 def weather_dashboard(request):
@@ -14,9 +27,7 @@ def weather_dashboard(request):
     days = int(request.GET.get('days', 7))
     
     # Recent weather data
-    weather_data = WeatherData.objects.all().order_by('-date')[:30]
-    if location:
-        weather_data = weather_data.filter(location__icontains=location)
+    weather_data = filter_by_location(WeatherData.objects.all(), location).order_by('-date')
     
     # Analyze conditions
     analysis = analyze_conditions(location=location, days=days)
@@ -28,10 +39,10 @@ def weather_dashboard(request):
     alerts = get_weather_alerts(days=7)
     
     # Get unique locations for filter
-    locations = WeatherData.objects.values_list('location', flat=True).distinct()
+    locations = get_location_names()
     
     context = {
-        'weather_data': weather_data[:15],  # Show latest 15 records
+        'weather_data': annotate_risk(weather_data[:15]),  # Show latest 15 records
         'analysis': analysis,
         'trend_data': json.dumps(trend_data),
         'alerts': alerts,
@@ -87,32 +98,88 @@ def weather_delete(request, pk):
 
 
 def weather_import(request):
-    """Import weather data from CSV"""
+    """Import weather data from CSV in a background job"""
+    from .imports import spool_upload, start_import_job
+    
     if request.method == 'POST':
         form = WeatherImportForm(request.POST, request.FILES)
         if form.is_valid():
-            from .utils import import_weather_from_csv
-            
-            csv_file = request.FILES['csv_file']
-            result = import_weather_from_csv(csv_file)
+            job = spool_upload(request.FILES['csv_file'])
+            start_import_job(job)
             
-            if result['success']:
-                messages.success(
-                    request, 
-                    f'Successfully imported {result["imported_count"]} weather records!'
+            messages.info(request, f'Import of "{job.original_name}" started.')
+            return redirect('weather:weather_import_progress', pk=job.pk)
+    else:
+        form = WeatherImportForm()
+    
+    recent_jobs = WeatherImportJob.objects.all()[:5]
+    return render(request, 'weather/weather_import.html', {'form': form, 'recent_jobs': recent_jobs})
+
+
+def weather_fetch(request):
+    """Fetch daily weather for one or more locations from the weather feed"""
+    from .feeds import FeedError, feed_settings, fetch_weather
+    
+    result = None
+    if request.method == 'POST':
+        form = WeatherAPIForm(request.POST)
+        if form.is_valid():
+            try:
+                result = fetch_weather(
+                    form.cleaned_data['location'],
+                    form.cleaned_data['start_date'],
+                    form.cleaned_data['end_date'],
                 )
-                if result['errors']:
-                    for error in result['errors'][:5]:  # Show first 5 errors
-                        messages.warning(request, error)
+            except FeedError as e:
+                messages.error(request, str(e))
             else:
-                for error in result['errors']:
-                    messages.error(request, error)
-            
-            return redirect('weather:weather_dashboard')
+                if result['errors']:
+                    messages.warning(request, f'{len(result["errors"])} feed requests failed.')
+                messages.success(
+                    request,
+                    f'Fetched {result["imported_count"]} weather records for {result["locations"]} locations.'
+                )
     else:
-        form = WeatherImportForm()
+        today = timezone.now().date()
+        form = WeatherAPIForm(initial={'start_date': today - timedelta(days=6), 'end_date': today})
     
-    return render(request, 'weather/weather_import.html', {'form': form})
+    return render(request, 'weather/weather_fetch.html', {
+        'form': form,
+        'result': result,
+        'feed': feed_settings(),
+    })
+
+
+def weather_import_progress(request, pk):
+    """Import page for a running job; polls weather_import_status"""
+    job = get_object_or_404(WeatherImportJob, pk=pk)
+    return render(request, 'weather/weather_import.html', {
+        'form': WeatherImportForm(),
+        'job': job,
+        'recent_jobs': WeatherImportJob.objects.all()[:5],
+    })
+
+
+def weather_import_status(request, pk):
+    """API endpoint for import job progress"""
+    from .imports import job_status
+    
+    job = get_object_or_404(WeatherImportJob, pk=pk)
+    return JsonResponse(job_status(job))
+
+
+def weather_import_resume(request, pk):
+    """Restart a job whose worker died (e.g. server restart) from its last committed row"""
+    from .imports import is_resumable, start_import_job
+    
+    job = get_object_or_404(WeatherImportJob, pk=pk)
+    if request.method == 'POST':
+        if is_resumable(job):
+            start_import_job(job)
+            messages.info(request, f'Import of "{job.original_name}" resumed.')
+        else:
+            messages.warning(request, 'This import is finished or still running.')
+    return redirect('weather:weather_import_progress', pk=job.pk)
 
 
 def weather_analysis(request):
@@ -124,7 +191,7 @@ def weather_analysis(request):
     trend_data = get_weather_trend(location=location, days=days)
     
     # Get locations
-    locations = WeatherData.objects.values_list('location', flat=True).distinct()
+    locations = get_location_names()
     
     context = {
         'analysis': analysis,
@@ -134,3 +201,82 @@ def weather_analysis(request):
         'selected_days': days,
     }
     return render(request, 'weather/analysis.html', context)
+
+
+# ===== JSON API for client-side chart refresh =====
+
+# Browsers reuse a response this long, then revalidate and usually get a 304
+API_MAX_AGE = 60
+
+
+def _int_param(request, name, default, minimum, maximum):
+    try:
+        value = int(request.GET.get(name, default))
+    except (TypeError, ValueError):
+        value = default
+    return min(max(value, minimum), maximum)
+
+
+def _api_data_version(request):
+    """Weather data version for the requested location, computed once per request"""
+    if not hasattr(request, '_weather_data_version'):
+        request._weather_data_version = weather_data_version(request.GET.get('location', ''))
+    return request._weather_data_version
+
+
+def _api_etag(request, *args, **kwargs):
+    latest, records = _api_data_version(request)
+    # Windows end today, so the same data yields a new response every day
+    key = '|'.join([
+        request.path,
+        request.GET.urlencode(),
+        latest.isoformat() if latest else '',
+        str(records),
+        timezone.now().date().isoformat(),
+    ])
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def _api_last_modified(request, *args, **kwargs):
+    latest, _ = _api_data_version(request)
+    start_of_day = datetime.combine(timezone.now().date(), time.min, tzinfo=dt_timezone.utc)
+    return max(latest, start_of_day) if latest else start_of_day
+
+
+class NumberJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder writing Decimals as numbers rather than strings"""
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return super().default(o)
+
+
+def _api_json(data):
+    return JsonResponse(data, encoder=NumberJSONEncoder)
+
+
+@require_GET
+@cache_control(private=True, max_age=API_MAX_AGE, must_revalidate=True)
+@gzip_page
+@condition(etag_func=_api_etag, last_modified_func=_api_last_modified)
+def weather_trend_api(request):
+    """Chart series for the weather trend (see get_weather_trend)"""
+    location = request.GET.get('location', '')
+    days = _int_param(request, 'days', 30, 1, 3660)
+    max_points = _int_param(request, 'points', 90, 10, 500)
+    
+    trend_data = get_weather_trend(location=location, days=days, max_points=max_points)
+    return _api_json(trend_data)
+
+
+@require_GET
+@cache_control(private=True, max_age=API_MAX_AGE, must_revalidate=True)
+@gzip_page
+@condition(etag_func=_api_etag, last_modified_func=_api_last_modified)
+def weather_analysis_api(request):
+    """Risk assessment and key metrics (see analyze_conditions)"""
+    location = request.GET.get('location', '')
+    days = _int_param(request, 'days', 7, 1, 3660)
+    
+    analysis = analyze_conditions(location=location, days=days)
+    return _api_json(analysis)